@@ -0,0 +1,143 @@
+"""
+名字烘焙基准：默认名字画进预生成底图 vs 每次渲染时绘制名字
+
+每个场景分别以 bake_speaker_name 关 / 开 预生成 png 缓存，比较 render() 耗时，
+并校验两种方式对 默认说话人 / 显式写出默认名字 / 其他说话人 / 空名字 的输出逐像素一致
+（其他说话人使用实时合成的无名字底图，自定义 box_pos 时也必须与预生成底图的合成方式相同）。
+最后修改名字颜色：预生成前（烘焙失效，改用无名字底图）与重新预生成后的输出也必须一致。
+
+用法:
+    python benchmarks/bench_baked_name.py [--canvas 1920x1080] [--rounds 30] [--font path/to/font.ttf]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import yaml
+from PIL import ImageChops
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+TEXT = "早上好！今天也要元气满满地去上学哦，别忘了带便当。"
+SPEAKERS = (None, "测试角色", "路人", "")
+ADVANCED_STYLE = {
+    "mode": "advanced",
+    "advanced": {
+        "name_layers": {
+            "default": [
+                {"text": "{name}", "position": [3, 3], "font_color": [0, 0, 0]},
+                {"text": "{name}", "position": [0, 0], "font_color": [255, 200, 80]},
+            ],
+            "路人": [{"text": "？？？", "position": [0, 0]}],
+        }
+    },
+}
+# (名称, render 覆盖项, 角色 style 覆盖项, 角色 layout 覆盖项, 是否启用裁剪)
+SCENARIOS = (
+    ("basic", {}, None, None, False),
+    ("advanced", {}, ADVANCED_STYLE, None, False),
+    ("dirty_region", {"compositing": "dirty_region"}, None, None, False),
+    ("crop 无内存缓存", {"use_memory_canvas_cache": False}, None, None, True),
+    ("自定义 box_pos", {}, None, {"box_pos": [0, 100]}, False),
+)
+
+
+def _patch_config(char_root: str, section: str, values: Optional[Dict[str, Any]]) -> None:
+    if not values:
+        return
+    path = os.path.join(char_root, "config.yaml")
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config[section].update(values)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+
+def _same(a: Any, b: Any) -> bool:
+    # RGBA 图像默认只比较 alpha 通道，必须显式比较全部通道
+    return ImageChops.difference(a, b).getbbox(alpha_only=False) is None
+
+
+def _best_ms(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--canvas", default="1920x1080")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    ok = True
+    print(f"🏷️ 画布 {args.canvas}，png 缓存，render() 最快一轮耗时（{args.rounds} 轮）")
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from core.prebuild import ensure_character_cache, prebuild_character
+        from core.renderer import CharacterRenderer
+
+        cache = os.path.join(assets, "cache")
+        renderer = None
+        char_id = ""
+        char_root = ""
+        for index, (label, overrides, style, layout, enable_crop) in enumerate(SCENARIOS):
+            char_id = f"bench{index}"
+            char_root = make_character(assets, char_id=char_id, canvas_size=canvas, portraits=1,  # type: ignore[arg-type]
+                                       backgrounds=1, font_path=args.font, enable_crop=enable_crop)
+            _patch_config(char_root, "style", style)
+            _patch_config(char_root, "layout", layout)
+
+            outputs: Dict[bool, List[Any]] = {}
+            timings: Dict[bool, float] = {}
+            for bake in (False, True):
+                make_workspace(tmp, {"cache_format": "png", "bake_speaker_name": bake, **overrides})
+                with contextlib.redirect_stdout(io.StringIO()):
+                    prebuild_character(char_id, assets, cache, force=True)
+                    renderer = CharacterRenderer(char_id, assets)
+                outputs[bake] = [renderer.render(TEXT, "1", "1", speaker_name=s).copy() for s in SPEAKERS]
+                timings[bake] = _best_ms(lambda: renderer.render(TEXT, "1", "1"), args.rounds)
+
+            same = all(_same(a, b) for a, b in zip(outputs[False], outputs[True]))
+            assert renderer is not None
+            baked = renderer._baked_name_state()[1] is not None
+            print(
+                f"   {label:<16} 绘制名字 {timings[False]:7.2f} ms   烘焙名字 {timings[True]:7.2f} ms"
+                f"   {'已烘焙' if baked else '❌ 未烘焙'}   {'一致' if same else '❌ 输出不一致'}"
+            )
+            ok = ok and same and baked
+
+        # 名字样式变化：重新预生成之前改用无名字底图，之后重新烘焙，两者输出一致
+        assert renderer is not None
+        with open(os.path.join(char_root, "config.yaml"), "r", encoding="utf-8") as f:
+            basic = yaml.safe_load(f)["style"]["basic"]
+        _patch_config(char_root, "style", {"basic": {**basic, "name_color": [80, 200, 255]}})
+        with contextlib.redirect_stdout(io.StringIO()):
+            renderer.refresh()
+            stale = renderer.render(TEXT, "1", "1").copy()
+            ensure_character_cache(char_id, assets, cache)
+            renderer.refresh()
+        rebaked = renderer._baked_name_state()[1] is not None
+        same = _same(stale, renderer.render(TEXT, "1", "1"))
+        print(f"   {'改名字颜色后':<12} {'已重新烘焙' if rebaked else '❌ 未重新烘焙'}   {'一致' if same else '❌ 输出不一致'}")
+        ok = ok and rebaked and same
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+底图缓存格式基准：jpeg / png / raw(mmap) 命中缓存时的加载耗时
+
+关闭内存缓存，每次都从磁盘读取底图，模拟按键到粘贴路径上的冷命中。
+
+用法:
+    python benchmarks/bench_cache_format.py [--canvas 2560x1440] [--rounds 10]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+FORMATS = ("jpeg", "png", "raw")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--canvas", default="2560x1440")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from PIL import ImageChops
+
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+        from core.utils import CACHE_FORMAT_EXTENSIONS
+
+        make_character(assets, canvas_size=canvas, portraits=1, backgrounds=1)  # type: ignore[arg-type]
+        print(f"🗂️ 画布 {args.canvas}，关闭内存缓存，每次从磁盘读取底图")
+
+        reference = None
+        ok = True
+        for fmt in FORMATS:
+            make_workspace(tmp, {"cache_format": fmt})
+            with contextlib.redirect_stdout(io.StringIO()):
+                prebuild_character("bench", assets, os.path.join(assets, "cache"), force=True)
+                renderer = CharacterRenderer("bench", assets)
+            renderer.cache_ext = CACHE_FORMAT_EXTENSIONS[fmt]
+            renderer.use_memory_cache = False
+
+            path = renderer._cache_file_path("1", "1")
+            size_mb = os.path.getsize(path) / (1024 * 1024) if path else 0.0
+
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                renderer._get_base_canvas("1", "1").copy()
+            load_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                image = renderer.render("早上好！", "1", "1")
+            render_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+            if fmt == "png":
+                reference = image.copy()
+            elif fmt == "raw" and reference is not None:
+                if ImageChops.difference(reference, image).getbbox() is not None:
+                    print("   ❌ raw 与 png 渲染结果不一致")
+                    ok = False
+            print(f"   {fmt:<5} 文件 {size_mb:6.1f} MB   读取底图 {load_ms:7.2f} ms   render {render_ms:7.2f} ms")
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
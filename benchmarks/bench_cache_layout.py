@@ -0,0 +1,119 @@
+"""
+底图缓存组织方式基准：matrix（N×M 整图）对比 layered（N+M 图层，渲染时合成）
+
+对每种方式分别统计：预生成耗时、缓存占用磁盘、冷命中（关闭内存缓存，每次从磁盘读取
+或合成底图）与热命中（内存缓存）时的 render 延迟，并校验两种方式输出逐像素一致。
+
+用法:
+    python benchmarks/bench_cache_layout.py [--canvas 2560x1440] [--portraits 4] [--backgrounds 4]
+                                            [--format png] [--rounds 5] [--font path/to/font.ttf]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+LAYOUTS = ("matrix", "layered")
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(folder, name))
+    return total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--canvas", default="2560x1440")
+    parser.add_argument("--portraits", type=int, default=4)
+    parser.add_argument("--backgrounds", type=int, default=4)
+    parser.add_argument("--format", default="png", choices=("jpeg", "png", "raw"))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from PIL import ImageChops
+
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+
+        make_character(
+            assets,
+            canvas_size=canvas,  # type: ignore[arg-type]
+            portraits=args.portraits,
+            backgrounds=args.backgrounds,
+            font_path=args.font,
+        )
+        cache_dir = os.path.join(assets, "cache")
+        keys = [
+            (str(p), str(b))
+            for p in range(1, args.portraits + 1)
+            for b in range(1, args.backgrounds + 1)
+        ]
+        print(
+            f"🗂️ 画布 {args.canvas}，{args.portraits} 立绘 × {args.backgrounds} 背景，格式 {args.format}"
+        )
+
+        references = {}
+        ok = True
+        for layout in LAYOUTS:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            make_workspace(tmp, {"cache_format": args.format, "cache_layout": layout})
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                prebuild_character("bench", assets, cache_dir, force=True, workers=1)
+                prebuild_s = time.perf_counter() - start
+                renderer = CharacterRenderer("bench", assets)
+            renderer.cache_layout = layout
+            disk_mb = _dir_size(os.path.join(cache_dir, "bench")) / (1024 * 1024)
+
+            renderer.use_memory_cache = False
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for p_key, b_key in keys:
+                    renderer.render("早上好！", p_key, b_key)
+            cold_ms = (time.perf_counter() - start) / (args.rounds * len(keys)) * 1000
+
+            renderer.use_memory_cache = True
+            for p_key, b_key in keys:
+                renderer.render("早上好！", p_key, b_key)
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for p_key, b_key in keys:
+                    image = renderer.render("早上好！", p_key, b_key)
+            warm_ms = (time.perf_counter() - start) / (args.rounds * len(keys)) * 1000
+
+            if args.format != "jpeg":
+                for p_key, b_key in keys:
+                    image = renderer.render("早上好！", p_key, b_key)
+                    if layout == "matrix":
+                        references[(p_key, b_key)] = image.copy()
+                    elif ImageChops.difference(references[(p_key, b_key)], image).getbbox() is not None:
+                        print(f"   ❌ p_{p_key}__b_{b_key} 与 matrix 渲染结果不一致")
+                        ok = False
+
+            print(
+                f"   {layout:<8} 预生成 {prebuild_s:6.2f} s   磁盘 {disk_mb:7.1f} MB   "
+                f"冷命中 render {cold_ms:7.2f} ms   热命中 render {warm_ms:7.2f} ms"
+            )
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+合成模式基准：整图 copy (full) vs 脏区合成 (dirty_region)
+
+在临时目录生成合成角色，交替渲染不同长度的台词，逐张校验两种模式像素一致。
+
+用法:
+    python benchmarks/bench_compositing.py [--font 字体路径] [--rounds 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import ImageChops
+
+from benchmarks.synthetic import make_character
+from core.prebuild import prebuild_character
+from core.renderer import CharacterRenderer
+
+TEXTS = [
+    "早上好！",
+    "今天天气真好，我们一起去散步吧。",
+    "这是一个比较长的句子，用来测试多行文本的渲染效果，看看换行之后是否依旧正常。" * 2,
+    "ok",
+]
+
+
+def run(canvas_size, font_path: str, rounds: int) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        make_character(tmp, canvas_size=canvas_size, font_path=font_path)
+        prebuild_character("bench", tmp, os.path.join(tmp, "cache"))
+        full = CharacterRenderer("bench", tmp)
+        full.compositing_mode = "full"
+        dirty = CharacterRenderer("bench", tmp)
+        dirty.compositing_mode = "dirty_region"
+
+        # 预热底图缓存
+        full.render(TEXTS[0])
+        dirty.render(TEXTS[0])
+
+        # 以独立渲染器逐条整图合成的结果为基准；正序再倒序渲染，覆盖长短台词互相切换时的脏区域
+        reference = CharacterRenderer("bench", tmp)
+        reference.compositing_mode = "full"
+        expected = [reference.render(text).copy() for text in TEXTS]
+        order = list(range(len(TEXTS))) + list(reversed(range(len(TEXTS))))
+        for name, renderer in (("full", full), ("dirty_region", dirty)):
+            for idx in order:
+                output = renderer.render(TEXTS[idx])
+                # RGBA 图像默认只比较 alpha 通道，必须显式比较全部通道
+                if ImageChops.difference(expected[idx], output).getbbox(alpha_only=False) is not None:
+                    print(f"   ❌ {name}: 第 {idx} 条台词与基准像素不一致")
+                    return False
+
+        results = {}
+        for name, renderer in (("full", full), ("dirty_region", dirty)):
+            start = time.perf_counter()
+            for i in range(rounds):
+                renderer.render(TEXTS[i % len(TEXTS)])
+            results[name] = (time.perf_counter() - start) / rounds
+
+        print(f"\n🖼️ 画布 {canvas_size[0]}x{canvas_size[1]}")
+        for name, avg in results.items():
+            print(f"   {name:<14} {avg * 1000:8.2f} ms/次")
+        print(f"   ✅ 像素一致, 加速 x{results['full'] / results['dirty_region']:.2f}")
+        return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--font", default=os.path.join("assets", "common", "fonts", "LXGWWenKai-Medium.ttf"))
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    ok = True
+    for size in ((2560, 1440), (3840, 2160)):
+        ok = run(size, args.font, args.rounds) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+裁剪渲染基准：整图绘制后裁剪 (旧路径) vs 先裁剪后绘制 (crop-first)
+
+分别测试内存缓存命中与关闭内存缓存（直接读磁盘缓存，PNG 可按行提前停止解码）两种情况，
+并逐张校验两条路径输出像素一致。
+
+用法:
+    python benchmarks/bench_crop.py [--font 字体路径] [--cache-format png] [--rounds 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import ImageChops
+
+from benchmarks.synthetic import make_character, make_workspace
+
+TEXTS = [
+    "早上好！",
+    "今天天气真好，我们一起去散步吧。",
+    "这是一个比较长的句子，用来测试多行文本的渲染效果，看看换行之后是否依旧正常。",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--font", default=os.path.join(ROOT, "assets", "common", "fonts", "LXGWWenKai-Medium.ttf"))
+    parser.add_argument("--cache-format", default="png", choices=["jpeg", "png"])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    font = os.path.abspath(args.font)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp, {"cache_format": args.cache_format})
+        os.chdir(tmp)
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+
+        make_character(assets, font_path=font, enable_crop=True)
+        prebuild_character("bench", assets, os.path.join(assets, "cache"))
+
+        ok = True
+        for use_memory in (True, False):
+            renderer = CharacterRenderer("bench", assets)
+            renderer.use_memory_cache = use_memory
+            print(f"\n✂️ 裁剪 {renderer.layout['crop_area']}，内存缓存 {'开' if use_memory else '关'}，缓存格式 {args.cache_format}")
+
+            def legacy(text: str):
+                spec = renderer.spec
+                renderer.spec = spec.replace(crop_area=None)
+                canvas = renderer.render(text)
+                renderer.spec = spec
+                return renderer._apply_crop(canvas)
+
+            for text in TEXTS:
+                if ImageChops.difference(legacy(text), renderer.render(text)).getbbox() is not None:
+                    print("   ❌ 两条路径像素不一致")
+                    ok = False
+
+            results = {}
+            for name, func in (("legacy", legacy), ("crop-first", renderer.render)):
+                start = time.perf_counter()
+                for i in range(args.rounds):
+                    func(TEXTS[i % len(TEXTS)])
+                results[name] = (time.perf_counter() - start) / args.rounds
+                print(f"   {name:<12} {results[name] * 1000:8.2f} ms/次")
+            print(f"   加速 x{results['legacy'] / results['crop-first']:.2f}")
+
+        os.chdir(ROOT)
+    print("\n✅ 像素一致" if ok else "\n❌ 存在像素差异")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
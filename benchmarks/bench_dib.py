@@ -0,0 +1,85 @@
+"""
+CF_DIB 编码基准：旧的 BMP→BytesIO→切头 做法 对比 core.dib.encode_dib
+
+先逐字节校验两种做法在各种尺寸（含需要行填充的奇数宽度）和图片模式下输出一致，
+再比较 1080p / 1440p / 4K 的编码耗时。不依赖 win32clipboard，可在 Linux 上运行。
+
+用法:
+    python benchmarks/bench_dib.py [--rounds 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image
+
+from core.dib import encode_dib
+
+CHECK_SIZES = ((1, 1), (2, 3), (3, 2), (5, 7), (33, 17), (641, 359))
+CHECK_MODES = ("RGB", "RGBA", "L", "P", "LA")
+BENCH_SIZES = ((1920, 1080), (2560, 1440), (3840, 2160))
+
+
+def legacy_dib(image: Image.Image) -> bytes:
+    """旧版 clipboard.set_image 的编码方式"""
+    buffer = BytesIO()
+    image.convert("RGB").save(buffer, "BMP")
+    data = buffer.getvalue()[14:]
+    buffer.close()
+    return data
+
+
+def _noise(size, mode: str, rng: random.Random) -> Image.Image:
+    width, height = size
+    img = Image.frombytes("RGBA", size, bytes(rng.randrange(256) for _ in range(width * height * 4)))
+    return img if mode == "RGBA" else img.convert(mode)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ok = True
+    checked = 0
+    for size in CHECK_SIZES:
+        for mode in CHECK_MODES:
+            img = _noise(size, mode, rng)
+            if encode_dib(img) != legacy_dib(img):
+                print(f"   ❌ {mode} {size[0]}x{size[1]} 与旧实现输出不一致")
+                ok = False
+            checked += 1
+    print(f"🔍 逐字节校验 {checked} 组（尺寸 × 模式）：{'全部一致' if ok else '存在差异'}")
+
+    for width, height in BENCH_SIZES:
+        img = Image.effect_noise((width, height), 64).convert("RGBA")
+        if encode_dib(img) != legacy_dib(img):
+            print(f"   ❌ {width}x{height} 与旧实现输出不一致")
+            ok = False
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            legacy_dib(img)
+        legacy_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            encode_dib(img)
+        new_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        print(
+            f"   {width}x{height}  旧实现 {legacy_ms:7.2f} ms   encode_dib {new_ms:7.2f} ms   "
+            f"加速 {legacy_ms / new_ms:4.2f}x"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
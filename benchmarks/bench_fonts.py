@@ -0,0 +1,99 @@
+"""
+字体加载基准：每次 ImageFont.truetype(路径) vs 进程级字体注册表
+
+模拟 "新建一个渲染器并用到若干字号"（GUI 每次预览都会这样做）：
+旧做法每个实例、每个字号都从磁盘重新打开并解析字体文件；注册表让同一 (文件, 字号)
+的字体对象在整个进程内只创建一次。同时校验两种方式绘制的文字逐像素一致。
+
+用法:
+    python benchmarks/bench_fonts.py --font path/to/font.ttf [--sizes 20-70] [--renderers 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw, ImageFont
+
+from core.font_registry import FontRegistry
+
+SAMPLE_TEXT = "早上好 Good morning 0123"
+
+
+def parse_sizes(spec: str) -> List[int]:
+    if "-" in spec:
+        start, end = (int(v) for v in spec.split("-", 1))
+        return list(range(start, end + 1))
+    return [int(v) for v in spec.split(",") if v.strip()]
+
+
+def time_renderers(load: Callable[[int], object], sizes: List[int], renderers: int) -> List[float]:
+    """每个“渲染器”从空的实例级缓存开始，依次取所有字号，返回每个实例的耗时 (ms)"""
+    samples = []
+    for _ in range(renderers):
+        started = time.perf_counter()
+        instance_cache = {}
+        for size in sizes:
+            if size not in instance_cache:
+                instance_cache[size] = load(size)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def draw_sample(font) -> bytes:
+    image = Image.new("L", (900, 120))
+    ImageDraw.Draw(image).text((4, 4), SAMPLE_TEXT, font=font, fill=255)
+    return image.tobytes()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--font", required=True, help="TrueType/OpenType 字体文件")
+    parser.add_argument("--sizes", default="20-70", help="字号范围 (20-70) 或逗号分隔列表")
+    parser.add_argument("--renderers", type=int, default=20, help="模拟新建渲染器的次数")
+    args = parser.parse_args()
+    sizes = parse_sizes(args.sizes)
+
+    registry = FontRegistry()
+    size_kb = os.path.getsize(args.font) / 1024
+    print(f"🔤 字体 {os.path.basename(args.font)} ({size_kb:.0f} KB)，{len(sizes)} 个字号，{args.renderers} 个渲染器")
+
+    legacy = time_renderers(lambda size: ImageFont.truetype(args.font, size), sizes, args.renderers)
+    cold_started = time.perf_counter()
+    time_renderers(lambda size: registry.get_font(args.font, size), sizes, 1)
+    cold_ms = (time.perf_counter() - cold_started) * 1000
+    warm = time_renderers(lambda size: registry.get_font(args.font, size), sizes, args.renderers)
+
+    legacy_ms = statistics.median(legacy)
+    warm_ms = statistics.median(warm)
+    print(f"   每次 truetype(路径)   {legacy_ms:8.2f} ms / 渲染器")
+    print(f"   注册表 首次加载       {cold_ms:8.2f} ms")
+    print(f"   注册表 之后的渲染器   {warm_ms:8.3f} ms / 渲染器  ({legacy_ms / max(warm_ms, 1e-6):.0f}x)")
+
+    # 换一个从未用过的字号：注册表只需解析已在内存中的字节
+    new_size = max(sizes) + 1
+    started = time.perf_counter()
+    ImageFont.truetype(args.font, new_size)
+    legacy_new = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    registry.get_font(args.font, new_size)
+    registry_new = (time.perf_counter() - started) * 1000
+    print(f"   新字号 {new_size}: truetype {legacy_new:.3f} ms，注册表 {registry_new:.3f} ms")
+    print(f"   统计: {registry.stats()}")
+
+    ok = all(
+        draw_sample(ImageFont.truetype(args.font, size)) == draw_sample(registry.get_font(args.font, size))
+        for size in sizes
+    )
+    if not ok:
+        print("   ❌ 注册表字体绘制结果与 truetype(路径) 不一致")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+字形图集基准：draw.text 每次光栅化整行 vs core.glyph_atlas 按字形缓存贴图
+
+1. 单行绘制：不同字号、行长下 draw.text 与图集（已预热）的耗时；
+2. 逐像素校验：整数 / 小数 / 负数坐标、不同颜色和字号下两种方式的输出完全一致；
+3. 小预算下的 LRU 淘汰（输出仍一致）、按频率表预热；
+4. 端到端：同一角色 render() 在图集关闭 / 开启时的耗时与输出。
+
+用法:
+    python benchmarks/bench_glyph_atlas.py --font path/to/font.ttf [--rounds 50] [--canvas 1920x1080]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from benchmarks.synthetic import make_character, make_workspace
+
+LINES = {
+    "短": "早上好！",
+    "中": "今天也要元气满满地去上学哦，别忘了带便当。",
+    "长": "AVATAR WAVE Toyota 「我们约好了」……明天见！ " * 3,
+}
+SAMPLE_CHARS = (
+    "今天天气真好我们一起去散步吧这是一个渲染测试用于验证字形缓存是否正常工作"
+    "abcdefghijklmnopqrstuvwxyzAVAWToTaYoLTfjff0123456789，。！？「」…—,.;:!?'\" "
+)
+SIZES = (24, 48, 96)
+COLORS = ((255, 255, 255, 255), (255, 200, 80, 255), (0, 0, 0, 128))
+
+
+def _best_us(fn: Callable[[], None], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1_000_000
+
+
+def _canvas(width: int, height: int) -> Image.Image:
+    return Image.new("RGBA", (width, height), (30, 60, 90, 255))
+
+
+def _check_pixels(atlas, fonts: List[ImageFont.FreeTypeFont], samples: int, seed: int) -> Tuple[int, int]:
+    """随机文字 / 位置 / 颜色下比较 draw.text 与图集，返回 (不一致数, 总数)"""
+    rng = random.Random(seed)
+    bad = 0
+    for _ in range(samples):
+        font = rng.choice(fonts)
+        text = "".join(rng.choice(SAMPLE_CHARS) for _ in range(rng.randint(1, 24)))
+        xy = (rng.uniform(-40, 200), rng.uniform(-30, 120))
+        if rng.random() < 0.3:
+            xy = (float(round(xy[0])), float(round(xy[1])))
+        fill = rng.choice(COLORS)
+        expected = _canvas(900, 260)
+        ImageDraw.Draw(expected).text(xy, text, font=font, fill=fill)
+        actual = _canvas(900, 260)
+        atlas.draw_text(ImageDraw.Draw(actual), xy, text, font, fill)
+        if ImageChops.difference(expected, actual).getbbox(alpha_only=False) is not None:
+            bad += 1
+    return bad, samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--font", required=True, help="TrueType/OpenType 字体文件")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=600, help="逐像素校验的随机样本数")
+    parser.add_argument("--canvas", default="1920x1080", help="端到端渲染的画布尺寸")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    from core.glyph_atlas import GlyphAtlas
+
+    fonts = [ImageFont.truetype(args.font, size, layout_engine=ImageFont.Layout.BASIC) for size in SIZES]
+    ok = True
+
+    print(f"🔤 单行绘制，最快一轮耗时（{args.rounds} 轮，图集已预热）")
+    atlas = GlyphAtlas()
+    for font in fonts:
+        for label, text in LINES.items():
+            image = _canvas(int(font.getlength(text)) + 40, font.size * 2)
+            draw = ImageDraw.Draw(image)
+            atlas.draw_text(draw, (10, 5), text, font, COLORS[0])
+            plain = _best_us(lambda: draw.text((10, 5), text, font=font, fill=COLORS[0]), args.rounds)
+            cached = _best_us(lambda: atlas.draw_text(draw, (10, 5), text, font, COLORS[0]), args.rounds)
+            print(
+                f"   {font.size:>3}px {label} ({len(text):>3} 字)   draw.text {plain:8.1f} µs"
+                f"   图集 {cached:8.1f} µs   {plain / cached:5.2f}x"
+            )
+
+    bad, total = _check_pixels(atlas, fonts, args.samples, seed=1)
+    print(f"🔍 逐像素校验：{total} 个随机样本，{'全部一致' if not bad else f'❌ {bad} 个不一致'}")
+    ok = ok and not bad
+
+    small = GlyphAtlas(budget_bytes=64 * 1024)
+    bad, total = _check_pixels(small, fonts, args.samples // 3, seed=2)
+    stats = small.stats()
+    evicted = stats["evictions"] > 0 and stats["bytes"] <= stats["budget_bytes"]
+    print(
+        f"♻️ 64 KB 预算：{stats['glyphs']} 个字形 / {stats['bytes']} 字节，淘汰 {stats['evictions']} 次"
+        f"   {'预算生效' if evicted else '❌ 未按预算淘汰'}   {'一致' if not bad else f'❌ {bad} 个不一致'}"
+    )
+    ok = ok and evicted and not bad
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from core import glyph_atlas
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+
+        # 频率表：先用一段对话积累字符计数，写出后在空图集上按表预热
+        shared = glyph_atlas.get_glyph_atlas()
+        shared.clear()
+        shared.char_counts.clear()
+        frequency_file = os.path.join(tmp, "glyph_frequency.txt")
+        for text in LINES.values():
+            glyph_atlas.draw_text(ImageDraw.Draw(_canvas(8, 8)), (0, 0), text, fonts[1], COLORS[0])
+        written = glyph_atlas.save_frequency_list(frequency_file)
+        shared.clear()
+        started = time.perf_counter()
+        warmed = glyph_atlas.warm_up([fonts[1]], glyph_atlas.DEFAULT_WARMUP, frequency_file)
+        elapsed = (time.perf_counter() - started) * 1000
+        misses = shared.stats()["misses"]
+        for text in LINES.values():
+            glyph_atlas.draw_text(ImageDraw.Draw(_canvas(8, 8)), (0, 0), text, fonts[1], COLORS[0])
+        cold = shared.stats()["misses"] - misses
+        print(
+            f"🔥 频率表 {written} 个字符，预热 {warmed} 个字形（{elapsed:.1f} ms），"
+            f"之后绘制 {'无需再光栅化' if not cold else f'❌ 仍光栅化 {cold} 个字形'}"
+        )
+        ok = ok and written > 0 and warmed == written and not cold
+
+        cache = os.path.join(assets, "cache")
+        make_character(assets, char_id="bench", canvas_size=canvas, portraits=1,  # type: ignore[arg-type]
+                       backgrounds=1, font_path=args.font)
+        with contextlib.redirect_stdout(io.StringIO()):
+            prebuild_character("bench", assets, cache, force=True)
+            renderer = CharacterRenderer("bench", assets)
+        text = LINES["中"] * 2
+        timings = {}
+        outputs = {}
+        for budget in (0, glyph_atlas.DEFAULT_BUDGET_BYTES):
+            shared.set_budget(budget)
+            outputs[budget] = renderer.render(text, "1", "1").copy()
+            timings[budget] = _best_us(lambda: renderer.render(text, "1", "1"), args.rounds) / 1000
+        same = ImageChops.difference(*outputs.values()).getbbox(alpha_only=False) is None
+        print(
+            f"🖼️ 端到端 render() {args.canvas}：关闭图集 {timings[0]:7.2f} ms"
+            f"   开启图集 {timings[glyph_atlas.DEFAULT_BUDGET_BYTES]:7.2f} ms   {'一致' if same else '❌ 输出不一致'}"
+        )
+        ok = ok and same
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+分页渲染基准：超出 text_area 的长台词按页切分，逐页绘制 vs 线程池并行绘制
+
+校验：
+    第一页与 render()（截断输出）逐像素一致，一页放得下的台词分页前后输出相同；
+    所有页的正文行拼起来等于整段文字换行后的全部行，页数符合 text_area 的容量；
+    裁剪模式下同样成立；目标程序延迟读取剪贴板时，经 SubmitPipeline 发送的每页都按顺序恰好粘贴一次；
+    多个线程共用同一字体并行绘制各页（字形图集开 / 关，关闭时每页都走 draw.text）时与逐页绘制逐像素一致。
+输出全部页绘制完的总耗时与拿到第一页的耗时（多线程时第一页画好即可先发出）。
+
+用法:
+    python benchmarks/bench_pagination.py [--font path/to/font.ttf] [--canvas 2560x1440]
+                                          [--workers 0] [--rounds 5] [--lines 30] [--read-delay 30]
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import ImageChops
+
+from benchmarks.synthetic import make_character, make_workspace
+
+SENTENCE = "“所以说，”她把书合上，认真地看着你，“如果明天还下雨的话，我们就改去图书馆吧。”"
+SHORT = "好的。"
+# 构造长台词时最多重复的句数
+MAX_SENTENCES = 4096
+
+
+def _same(a: Any, b: Any) -> bool:
+    # RGBA 图像默认只比较 alpha 通道，必须显式比较全部通道
+    return a.size == b.size and ImageChops.difference(a, b).getbbox(alpha_only=False) is None
+
+
+def _check(renderer: Any, text: str, label: str) -> bool:
+    """第一页 == render()；各页正文行 == 全部换行结果；页数 == ceil(行数 / 每页行数)"""
+    ok = True
+    spec = renderer.spec
+    lines = renderer._body_lines(text, spec)
+    per_page = max(1, spec.lines_per_page)
+    expected = max(1, math.ceil(len(lines) / per_page))
+
+    pages = list(renderer.render_pages(text, "1", "1"))
+    first = renderer.render(text, "1", "1")
+    if not _same(pages[0], first):
+        print(f"   ❌ {label}: 第一页与 render() 不一致")
+        ok = False
+    if len(pages) != expected or renderer.page_count(text) != expected:
+        print(f"   ❌ {label}: 页数 {len(pages)}，应为 {expected}")
+        ok = False
+
+    placed: List[str] = []
+    for page_ops in renderer._layout_pages(text, None, with_name=False):
+        placed.extend(op[1] for op in page_ops)
+    if placed != lines:
+        print(f"   ❌ {label}: 分页后的正文行与换行结果不一致")
+        ok = False
+    sizes = {page.size for page in pages}
+    if len(sizes) != 1:
+        print(f"   ❌ {label}: 各页尺寸不一致 {sizes}")
+        ok = False
+    print(f"   {label:<10} {len(lines)} 行 → {len(pages)} 页（每页 {per_page} 行）"
+          f"   {'一致' if ok else '❌'}")
+    return ok
+
+
+def _check_threads(renderer: Any, text: str, threads: int) -> bool:
+    """多线程并行绘制与逐页绘制逐像素一致：FreeType 调用按字体串行（font_lock），不会被并发破坏"""
+    from core.glyph_atlas import get_glyph_atlas
+
+    atlas = get_glyph_atlas()
+    budget = atlas.budget_bytes
+    ok = True
+    try:
+        for label, atlas_budget in (("图集", budget), ("draw.text", 0)):
+            atlas.set_budget(atlas_budget)
+            for _ in range(3):
+                serial = list(renderer.render_pages(text, "1", "1", workers=1))
+                with renderer.render_pages(text, "1", "1", workers=threads) as pages:
+                    parallel = list(pages)
+                same = len(serial) == len(parallel) and all(_same(a, b) for a, b in zip(serial, parallel))
+                ok = ok and same
+            print(f"   {threads} 线程    {label:<10} {len(serial)} 页   {'一致' if ok else '❌ 并行输出不一致'}")
+    finally:
+        atlas.set_budget(budget)
+    return ok
+
+
+def _time_pages(renderer: Any, text: str, workers: int, rounds: int) -> Tuple[float, float]:
+    """返回 (全部页完成, 拿到第一页) 的最快耗时，毫秒"""
+    best_total, best_first = float("inf"), float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        first = None
+        with renderer.render_pages(text, "1", "1", workers=workers) as pages:
+            for _page in pages:
+                if first is None:
+                    first = time.perf_counter() - started
+        best_total = min(best_total, time.perf_counter() - started)
+        best_first = min(best_first, first or 0.0)
+    return best_total * 1000, best_first * 1000
+
+
+class DelayedPasteApp:
+    """模拟聊天程序：收到 Ctrl+V 后过 delay_s 秒才读取剪贴板（真实程序处理按键也有延迟）"""
+
+    def __init__(self, clipboard: Any, text: str, delay_s: float):
+        self.clipboard = clipboard
+        self.text = text
+        self.delay_s = delay_s
+        self.pasted: List[Any] = []
+        self._timers: List[threading.Timer] = []
+
+    def send_keys(self, keys: str) -> None:
+        if keys == "ctrl+x":
+            self.clipboard.set_text(self.text)
+        elif keys == "ctrl+v":
+            timer = threading.Timer(self.delay_s, self._read)
+            self._timers.append(timer)
+            timer.start()
+
+    def _read(self) -> None:
+        self.pasted.append(self.clipboard.image)
+
+    def join(self) -> None:
+        for timer in self._timers:
+            timer.join()
+
+
+def _check_pipeline(renderer: Any, text: str, read_delay_ms: float) -> bool:
+    """目标程序延迟读取剪贴板时，每页都要按顺序恰好粘贴一次"""
+    from core.clipboard import MemoryClipboardBackend
+    from core.submit_pipeline import SubmitPipeline
+
+    expected = list(renderer.render_pages(text, "1", "1"))
+    ok = True
+    for interval_ms in (0.0, read_delay_ms * 2):
+        clipboard = MemoryClipboardBackend()
+        app = DelayedPasteApp(clipboard, text, read_delay_ms / 1000)
+        pipeline = SubmitPipeline(
+            lambda t: renderer.render_pages(t, "1", "1"),
+            app.send_keys,
+            clipboard=clipboard,
+            page_interval=interval_ms / 1000,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = pipeline.run()
+        app.join()
+        intact = (
+            result.status == "sent"
+            and result.pages == len(expected)
+            and len(app.pasted) == len(expected)
+            and all(_same(a, b) for a, b in zip(app.pasted, expected))
+        )
+        label = f"页间隔 {interval_ms:.0f} ms"
+        if interval_ms:
+            ok = ok and intact
+            print(f"   流水线     {label:<12} 读取延迟 {read_delay_ms:.0f} ms，依次粘贴 {len(app.pasted)} 页"
+                  f" · {result.summary()}   {'一致' if intact else '❌'}")
+        else:
+            # 不等待时目标程序读到的是后面的页：仅作对照，不计入结果
+            print(f"   流水线     {label:<12} 读取延迟 {read_delay_ms:.0f} ms，"
+                  f"{'各页完好' if intact else '出现丢页 / 重复页（对照）'}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    parser.add_argument("--canvas", default="2560x1440")
+    parser.add_argument("--workers", type=int, default=0, help="并行线程数，0 = 全部 CPU 核心")
+    parser.add_argument("--rounds", type=int, default=5, help="计时轮数（取最快一轮）")
+    parser.add_argument("--lines", type=int, default=30, help="长台词至少的行数（同时至少两页）")
+    parser.add_argument("--read-delay", type=float, default=30, help="模拟程序收到 Ctrl+V 后读取剪贴板的延迟 (ms)")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp, {"cache_format": "png"})
+        os.chdir(tmp)
+        from core.pagination import resolve_page_workers
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+
+        renderers: Dict[str, Any] = {}
+        for char_id, crop in (("page", False), ("pagecrop", True)):
+            make_character(assets, char_id=char_id, canvas_size=canvas, portraits=1, backgrounds=1,  # type: ignore[arg-type]
+                           font_path=args.font, enable_crop=crop)
+            with contextlib.redirect_stdout(io.StringIO()):
+                prebuild_character(char_id, assets, os.path.join(assets, "cache"), force=True)
+                renderers[char_id] = CharacterRenderer(char_id, assets)
+
+        renderer = renderers["page"]
+        # 句数逐次翻倍，直到达到 --lines 行且至少占两页（字体和字号不同，每行能放下的句数也不同）
+        sentences = 1
+        text = SENTENCE
+        while sentences < MAX_SENTENCES and not (
+            len(renderer._body_lines(text, renderer.spec)) >= args.lines and renderer.page_count(text) >= 2
+        ):
+            sentences *= 2
+            text = SENTENCE * sentences
+        if renderer.page_count(text) < 2:
+            print(f"❌ 长台词只占 {renderer.page_count(text)} 页，无法校验分页")
+            os.chdir(ROOT)
+            return 1
+
+        print(f"📄 分页校验（画布 {args.canvas}）")
+        ok = _check(renderer, text, "整图") and ok
+        ok = _check(renderers["pagecrop"], text, "裁剪") and ok
+        ok = _check(renderer, SHORT, "单页") and ok
+        ok = _check_pipeline(renderer, text, args.read_delay) and ok
+        ok = _check_threads(renderer, text, 4) and ok
+
+        pages = renderer.page_count(text)
+        workers = resolve_page_workers(args.workers, pages)
+        print(f"\n⏱️ {pages} 页，{args.rounds} 轮取最快（CPU 核心 {os.cpu_count()}）")
+        serial_total, serial_first = _time_pages(renderer, text, 1, args.rounds)
+        print(f"   逐页绘制   全部 {serial_total:8.2f} ms   第一页 {serial_first:7.2f} ms")
+        if workers > 1:
+            pool_total, pool_first = _time_pages(renderer, text, workers, args.rounds)
+            print(f"   {workers} 线程     全部 {pool_total:8.2f} ms   第一页 {pool_first:7.2f} ms"
+                  f"   x{serial_total / pool_total:.2f}")
+        else:
+            print("   只有 1 个可用线程，跳过并行计时")
+        os.chdir(ROOT)
+
+    print("\n✅ 分页输出正确" if ok else "\n❌ 分页输出有误")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+并行预生成基准：prebuild_character 在不同线程数下的耗时与加速比
+
+同时校验 composite 进度事件的 current 严格递增、最后以 done 结束。
+
+用法:
+    python benchmarks/bench_prebuild.py [--portraits 6] [--backgrounds 6] [--canvas 2560x1440] [--format jpeg]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+
+def worker_counts() -> List[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--portraits", type=int, default=6)
+    parser.add_argument("--backgrounds", type=int, default=6)
+    parser.add_argument("--canvas", default="2560x1440")
+    parser.add_argument("--format", default="jpeg", choices=["jpeg", "png", "raw"])
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp, {"cache_format": args.format})
+        os.chdir(tmp)
+        from core.prebuild import prebuild_character
+
+        make_character(
+            assets,
+            canvas_size=canvas,  # type: ignore[arg-type]
+            portraits=args.portraits,
+            backgrounds=args.backgrounds,
+        )
+        total = args.portraits * args.backgrounds
+        print(f"🏗️ {args.portraits}×{args.backgrounds}={total} 张底图 @ {args.canvas}, 格式 {args.format}, CPU {os.cpu_count()}")
+
+        ok = True
+        baseline = None
+        for workers in worker_counts():
+            events: List[Tuple[str, int, int]] = []
+
+            def progress(event: str, current: int, count: int, message: str) -> None:
+                events.append((event, current, count))
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                prebuild_character(
+                    "bench",
+                    assets,
+                    os.path.join(assets, "cache"),
+                    force=True,
+                    progress=progress,
+                    workers=workers,
+                )
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+
+            composite = [current for event, current, _ in events if event == "composite"]
+            if composite != list(range(total + 1)) or events[-1][0] != "done":
+                print(f"   ❌ {workers} 线程的进度事件顺序异常")
+                ok = False
+            print(f"   {workers:>2} 线程  {elapsed:7.2f} s   加速 x{baseline / elapsed:.2f}")
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
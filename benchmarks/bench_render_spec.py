@@ -0,0 +1,200 @@
+"""
+渲染规格基准：每次渲染重新解析 style / layout (旧路径) vs 预编译的 RenderSpec
+
+旧路径每次排版都要解析字体路径（逐个 os.path.exists）、转换颜色、逐项解析 name_layers、
+用 getbbox 计算行高。这里把旧实现原样保留为 legacy_layout，与 _layout_text 比较排版耗时，
+校验两者产生的文字操作完全相同，并统计一次 render() 内的文件系统调用次数。
+
+用法:
+    python benchmarks/bench_render_spec.py [--font path/to/font.ttf] [--rounds 2000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+TEXT = "早上好！今天也要元气满满地去上学哦，别忘了带便当。"
+SPEAKERS = (None, "路人", "")
+ADVANCED_STYLE = {
+    "mode": "advanced",
+    "text_wrapper": {"type": "preset", "preset": "corner_single"},
+    "advanced": {
+        "name_layers": {
+            "default": [
+                {"text": "{name}", "position": [3, 3], "font_color": [0, 0, 0]},
+                {"text": "{name}", "position": [0, 0], "font_color": [255, 200, 80], "font_size": 44},
+            ],
+            "路人": [{"text": "？？？", "position": [0, 0], "font_file": "missing.ttf"}],
+        }
+    },
+}
+SCENARIOS = (("basic", None), ("advanced", ADVANCED_STYLE))
+
+
+def legacy_layout(renderer: Any, text: str, speaker_name: Optional[str]) -> List[Any]:
+    """RenderSpec 之前的 _layout_text：每次都从 style / layout dict 重新解析"""
+    style = renderer.style
+    basic = style.get("basic", {})
+    text_color = renderer._color_tuple(basic.get("text_color"), (255, 255, 255))
+    text_size = max(1, int(basic.get("font_size", 40)))
+    font_text = renderer._get_font(text_size, renderer._resolve_font_path(style.get("font_file")))
+    text_area = renderer.layout.get("text_area", [100, 800, 1800, 1000])
+
+    name_color = renderer._color_tuple(basic.get("name_color"), (253, 145, 175))
+    name_size = max(1, int(basic.get("name_font_size", text_size)))
+    font_name = renderer._get_font(name_size, renderer._resolve_font_path(style.get("name_font_file")))
+    name_pos = renderer.layout.get("name_pos", [100, 100])
+    if speaker_name is None:
+        speaker_name = renderer.config.get("meta", {}).get("name", renderer.char_id)
+    ops: List[Any] = []
+    if style.get("mode") == "advanced":
+        ops.extend(_legacy_advanced_name(renderer, speaker_name, name_pos))
+    if not ops and speaker_name:
+        ops.append(((name_pos[0], name_pos[1]), speaker_name, font_name, name_color))
+
+    wrapper = style.get("text_wrapper", {})
+    if isinstance(wrapper, dict) and wrapper.get("type", "none") != "none":
+        prefix, suffix = renderer._resolve_wrapper_tokens(wrapper)
+        if prefix or suffix:
+            text = f"{prefix}{text}{suffix}"
+    x1, y1, x2, y2 = text_area
+    lines = renderer._wrap_text(text, font_text, max(10, x2 - x1))
+    line_height = renderer._line_height(font_text)
+    for i, line in enumerate(lines):
+        y = y1 + i * line_height
+        if y > y2 - line_height:
+            break
+        ops.append(((x1, y), line, font_text, text_color))
+    return ops
+
+
+def _legacy_advanced_name(renderer: Any, speaker_name: Optional[str], name_pos: Any) -> List[Any]:
+    layers_map = renderer.style.get("advanced", {}).get("name_layers")
+    if not isinstance(layers_map, dict):
+        return []
+    target_layers = None
+    if speaker_name and speaker_name in layers_map:
+        target_layers = layers_map[speaker_name]
+    elif "default" in layers_map:
+        target_layers = layers_map["default"]
+    if not isinstance(target_layers, list):
+        return []
+
+    base_x, base_y = float(name_pos[0]), float(name_pos[1])
+    basic = renderer.style.get("basic", {})
+    fallback_color = renderer._color_tuple(basic.get("name_color"), (255, 255, 255))
+    fallback_size = max(1, int(basic.get("name_font_size", 32)))
+    ops = []
+    for entry in target_layers:
+        if not isinstance(entry, dict):
+            continue
+        text_value = str(entry.get("text", ""))
+        if speaker_name is not None:
+            text_value = text_value.replace("{name}", speaker_name)
+        position = entry.get("position", [0, 0])
+        if not isinstance(position, (list, tuple)) or len(position) != 2:
+            offset_x, offset_y = 0.0, 0.0
+        else:
+            offset_x, offset_y = float(position[0]), float(position[1])
+        font_size = entry.get("font_size", fallback_size)
+        font_size = max(1, int(font_size)) if isinstance(font_size, (int, float)) else fallback_size
+        font = renderer._get_font(font_size, renderer._resolve_font_path(entry.get("font_file")))
+        color = renderer._color_tuple(entry.get("font_color"), fallback_color)
+        ops.append(((base_x + offset_x, base_y + offset_y), text_value, font, color))
+    return ops
+
+
+@contextlib.contextmanager
+def count_fs_calls(counter: Dict[str, int]):
+    """统计期间 os.path.exists / os.stat 的调用次数"""
+    exists, stat = os.path.exists, os.stat
+
+    def counted_exists(path: Any) -> bool:
+        counter["exists"] += 1
+        return exists(path)
+
+    def counted_stat(path: Any, *args: Any, **kwargs: Any) -> Any:
+        counter["stat"] += 1
+        return stat(path, *args, **kwargs)
+
+    os.path.exists, os.stat = counted_exists, counted_stat  # type: ignore[assignment]
+    try:
+        yield counter
+    finally:
+        os.path.exists, os.stat = exists, stat  # type: ignore[assignment]
+
+
+def _best_us(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / rounds * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    parser.add_argument("--rounds", type=int, default=2000, help="每轮排版次数（取 5 轮中最快的一轮）")
+    args = parser.parse_args()
+
+    ok = True
+    print(f"📐 排版耗时（每次 µs，{args.rounds} 次 × 5 轮取最快）")
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from core.renderer import CharacterRenderer
+
+        for index, (label, style) in enumerate(SCENARIOS):
+            char_id = f"spec{index}"
+            char_root = make_character(assets, char_id=char_id, canvas_size=(1920, 1080), portraits=1,
+                                       backgrounds=1, font_path=args.font)
+            if style:
+                path = os.path.join(char_root, "config.yaml")
+                with open(path, "r", encoding="utf-8") as f:
+                    config = yaml.safe_load(f)
+                config["style"].update(style)
+                with open(path, "w", encoding="utf-8") as f:
+                    yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+            with contextlib.redirect_stdout(io.StringIO()):
+                renderer = CharacterRenderer(char_id, assets)
+
+            same = all(legacy_layout(renderer, TEXT, s) == renderer._layout_text(TEXT, s) for s in SPEAKERS)
+            legacy = _best_us(lambda: legacy_layout(renderer, TEXT, None), args.rounds)
+            compiled = _best_us(lambda: renderer._layout_text(TEXT, None), args.rounds)
+
+            renderer.render(TEXT, "1", "1")
+            counts = {"exists": 0, "stat": 0}
+            with count_fs_calls(counts):
+                legacy_layout(renderer, TEXT, None)
+            legacy_fs = sum(counts.values())
+            counts = {"exists": 0, "stat": 0}
+            with count_fs_calls(counts):
+                renderer.render(TEXT, "1", "1")
+            render_fs = sum(counts.values())
+
+            print(
+                f"   {label:<9} 旧排版 {legacy:7.1f} µs   RenderSpec {compiled:7.1f} µs   x{legacy / compiled:.2f}"
+                f"   文件系统调用 旧排版 {legacy_fs} 次 / render() {render_fs} 次"
+                f"   {'一致' if same else '❌ 排版不一致'}"
+            )
+            ok = ok and same and render_fs == 0
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+渲染器注册表基准：每次新建 CharacterRenderer vs 从 RendererRegistry 取共享实例
+
+GUI 预览原先每次都新建渲染器（重新解析 YAML、重新解码素材、清空全部缓存）。
+这里比较两种方式 "取渲染器 + 渲染一张图" 的耗时，并依次模拟几种修改，
+检查注册表只做了最小重载，且输出与新建的渲染器逐像素一致：
+    1. 只改文字颜色（config）     → 底图保留
+    2. 替换一张立绘（assets）      → 只丢弃用到该立绘的底图
+    3. 重新预生成缓存（cache）     → 底图全部重新读取
+
+用法:
+    python benchmarks/bench_renderer_registry.py [--canvas 1920x1080] [--portraits 4] [--rounds 10]
+                                                 [--font path/to/font.ttf]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import _make_portrait, make_character, make_workspace
+
+TEXT = "这是一句用来测试渲染器复用的台词。"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--canvas", default="1920x1080")
+    parser.add_argument("--portraits", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp, {"cache_format": "png"})
+        os.chdir(tmp)
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+        from core.renderer_registry import RendererRegistry
+
+        char_root = make_character(
+            assets,
+            canvas_size=canvas,  # type: ignore[arg-type]
+            portraits=args.portraits,
+            backgrounds=2,
+            font_path=args.font,
+        )
+        cache_dir = os.path.join(assets, "cache")
+        with contextlib.redirect_stdout(io.StringIO()):
+            prebuild_character("bench", assets, cache_dir, force=True)
+        registry = RendererRegistry()
+        keys = [(str(p), str(b)) for p in range(1, args.portraits + 1) for b in (1, 2)]
+
+        def timed(fn) -> float:
+            samples = []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fn()
+                samples.append((time.perf_counter() - started) * 1000)
+            return statistics.median(samples)
+
+        fresh_ms = timed(lambda: CharacterRenderer("bench", assets).render(TEXT, "1", "1"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            shared = registry.get("bench", assets)
+            for p, b in keys:
+                shared.render(TEXT, p, b)
+        shared_ms = timed(lambda: registry.get("bench", assets).render(TEXT, "1", "1"))
+        print(f"🗂️ 画布 {args.canvas}，{args.portraits} 立绘 × 2 背景，取中位数")
+        print(f"   每次新建渲染器   {fresh_ms:8.2f} ms")
+        print(f"   注册表共享实例   {shared_ms:8.2f} ms  ({fresh_ms / max(shared_ms, 1e-6):.1f}x)")
+
+        ok = True
+
+        def step(label: str, expect: str) -> None:
+            """refresh() 就是 registry.get() 对已有实例做的事；直接调用以拿到重载了哪些部分"""
+            nonlocal ok
+            before = shared.canvas_cache_stats()["entries"]
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                reloaded = shared.refresh()
+            reload_ms = (time.perf_counter() - started) * 1000
+            kept = shared.canvas_cache_stats()["entries"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                reference = CharacterRenderer("bench", assets)
+                same = all(
+                    shared.render(TEXT, p, b).tobytes() == reference.render(TEXT, p, b).tobytes()
+                    for p, b in keys
+                )
+            print(f"   {label:<8} 重载 {', '.join(reloaded) or '-':<14} {reload_ms:6.2f} ms，底图保留 {kept}/{before}")
+            if not same or expect not in reloaded or registry.get("bench", assets) is not shared:
+                ok = False
+
+        # 1. 只改文字颜色
+        config_path = os.path.join(char_root, "config.yaml")
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        config["style"]["basic"]["text_color"] = [20, 20, 20]
+        time.sleep(0.01)
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+        step("改文字颜色", "config")
+
+        # 2. 替换一张立绘
+        portrait_path = os.path.join(char_root, "portrait", "1.png")
+        _make_portrait((int(canvas[0] * 0.3), int(canvas[1] * 0.9)), random.Random(99)).save(portrait_path)
+        step("替换立绘", "assets")
+
+        # 3. 重新预生成缓存
+        with contextlib.redirect_stdout(io.StringIO()):
+            prebuild_character("bench", assets, cache_dir)
+        step("重建缓存", "cache")
+
+        if not ok:
+            print("   ❌ 注册表没有按预期重载，或输出与新建的渲染器不一致")
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
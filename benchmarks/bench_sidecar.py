@@ -0,0 +1,127 @@
+"""
+渲染子进程基准：连续发送时键盘钩子线程的响应延迟，主进程渲染 vs 渲染子进程
+
+keyboard 的钩子回调是普通的 Python 线程，要拿到 GIL 才能处理按键。这里用一个 "钩子线程"
+每 1 ms 醒来一次，记录实际醒来时间比预期晚了多少（即一次按键在钩子里要多等多久），
+同时发送线程反复 渲染 + 编码 CF_DIB：
+    空闲       没有渲染，作为底噪
+    主进程     renderer.render() 在主进程里执行（原先的做法）
+    子进程     RenderSidecar.render()，主进程只等待管道回复和编码
+并校验两种方式编码出的 CF_DIB 逐字节一致。
+
+用法:
+    python benchmarks/bench_sidecar.py [--canvas 1920x1080] [--runs 40] [--font path/to/font.ttf]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+TEXTS = (
+    "好的。",
+    "早上好！今天也要元气满满地去上学哦，别忘了带便当。",
+    "如果明天还下雨的话，我们就改去图书馆吧。那里安静，也有空调，还可以顺便把上周没看完的那本推理小说借出来。",
+)
+TICK = 0.001
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(submit: Callable[[int], None], runs: int) -> dict:
+    """发送线程跑 runs 次 submit，同时记录钩子线程每次醒来的延迟（毫秒）"""
+    lateness: List[float] = []
+    submit_ms: List[float] = []
+    done = threading.Event()
+
+    def hook() -> None:
+        while not done.is_set():
+            expected = time.perf_counter() + TICK
+            time.sleep(TICK)
+            lateness.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    thread = threading.Thread(target=hook, daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    for i in range(runs):
+        started = time.perf_counter()
+        submit(i)
+        submit_ms.append((time.perf_counter() - started) * 1000)
+    if runs == 0:
+        time.sleep(0.5)
+    done.set()
+    thread.join()
+    return {
+        "p50": _percentile(lateness, 50),
+        "p99": _percentile(lateness, 99),
+        "max": max(lateness),
+        "submit": statistics.median(submit_ms) if submit_ms else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--canvas", default="1920x1080")
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp, {"cache_format": "jpeg", "use_memory_canvas_cache": False})
+        os.chdir(tmp)
+        from core.dib import encode_dib
+        from core.prebuild import prebuild_character
+        from core.render_sidecar import RenderSidecar
+        from core.renderer import CharacterRenderer
+
+        make_character(assets, canvas_size=canvas, portraits=2, backgrounds=1, font_path=args.font)  # type: ignore[arg-type]
+        with contextlib.redirect_stdout(io.StringIO()):
+            prebuild_character("bench", assets, os.path.join(assets, "cache"), force=True)
+            renderer = CharacterRenderer("bench", assets)
+        sidecar = RenderSidecar("bench", renderer.canvas_size, assets)
+
+        def in_process(i: int) -> None:
+            encode_dib(renderer.render(TEXTS[i % len(TEXTS)], str(i % 2 + 1)))
+
+        def via_sidecar(i: int) -> None:
+            encode_dib(sidecar.render(TEXTS[i % len(TEXTS)], str(i % 2 + 1)))
+
+        try:
+            same = all(
+                encode_dib(renderer.render(text, "1")) == encode_dib(sidecar.render(text, "1")) for text in TEXTS
+            )
+            results = {
+                "空闲": measure(lambda i: None, 0),
+                "主进程渲染": measure(in_process, args.runs),
+                "渲染子进程": measure(via_sidecar, args.runs),
+            }
+        finally:
+            sidecar.close()
+        os.chdir(ROOT)
+
+    print(f"⌨️ 画布 {args.canvas}，{args.runs} 次 渲染 + 编码 CF_DIB（关闭内存底图缓存，每次读取 JPEG 底图）")
+    print(f"   {'':<10} {'钩子延迟 p50':>12} {'p99':>8} {'max':>8}   每次发送")
+    for label, r in results.items():
+        submit = f"{r['submit']:7.1f} ms" if r["submit"] else "      -"
+        print(f"   {label:<10} {r['p50']:9.2f} ms {r['p99']:6.2f} ms {r['max']:6.2f} ms   {submit}")
+    if not same:
+        print("   ❌ 子进程渲染结果与主进程不一致")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
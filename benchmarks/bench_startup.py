@@ -0,0 +1,66 @@
+"""
+渲染器启动基准：惰性素材句柄 vs 全部立即解码
+
+在临时目录生成 50 张立绘 + 50 张背景的合成角色，测量 CharacterRenderer 构造耗时与
+常驻内存，再强制解码全部素材作为对照（等价于旧版 _load_resources 的行为）。
+
+用法:
+    python benchmarks/bench_startup.py [--portraits 50] [--backgrounds 50] [--canvas 1920x1080]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.metrics import current_rss_bytes, mb
+from benchmarks.synthetic import make_character, make_workspace
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--portraits", type=int, default=50)
+    parser.add_argument("--backgrounds", type=int, default=50)
+    parser.add_argument("--canvas", default="1920x1080")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from core.renderer import CharacterRenderer
+
+        print(f"🧪 生成合成角色: {args.portraits} 立绘 × {args.backgrounds} 背景 @ {args.canvas}")
+        make_character(
+            assets,
+            canvas_size=canvas,  # type: ignore[arg-type]
+            portraits=args.portraits,
+            backgrounds=args.backgrounds,
+        )
+
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            renderer = CharacterRenderer("bench", assets)
+        lazy_time = time.perf_counter() - start
+        lazy_rss = current_rss_bytes() - rss_before
+        print(f"   惰性构造   {lazy_time * 1000:9.1f} ms   RSS +{mb(lazy_rss)}")
+
+        start = time.perf_counter()
+        handles = list(renderer.assets["portraits"].values()) + list(renderer.assets["backgrounds"].values())
+        for handle in handles:
+            handle.image
+        eager_time = time.perf_counter() - start
+        eager_rss = current_rss_bytes() - rss_before
+        print(f"   全部解码   {(lazy_time + eager_time) * 1000:9.1f} ms   RSS +{mb(eager_rss)}")
+        os.chdir(ROOT)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+发送流水线基准：固定 sleep（旧流程）对比等待剪贴板序列号（SubmitPipeline）
+
+用 MemoryClipboardBackend 和一个模拟聊天程序代替真实的剪贴板与按键：
+模拟程序收到 Ctrl+X 后延迟 --app-delay 毫秒才把输入框文字写入剪贴板。
+输出每个阶段的 p50 耗时与端到端总耗时，可在 Linux 上运行。
+"结果缓存" 一行重复发送同一句话，展示命中 RenderResultCache 时跳过渲染与编码的耗时。
+"空输入" 一行发送空输入框（Ctrl+X 不会改动剪贴板，只能等到超时），耗时不得超过旧流程。
+
+用法:
+    python benchmarks/bench_submit_pipeline.py [--canvas 1920x1080] [--runs 20] [--app-delay 5,30]
+                                               [--font path/to/font.ttf]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+
+class FakeChatApp:
+    """模拟输入框：Ctrl+X 异步写入剪贴板，Ctrl+V 记录粘贴内容"""
+
+    def __init__(self, clipboard, delay_s: float):
+        self.clipboard = clipboard
+        self.delay_s = delay_s
+        self.input_text = ""
+        self.pasted: List[object] = []
+
+    def send_keys(self, keys: str) -> None:
+        if keys == "ctrl+x":
+            # 输入框为空时剪切不会改动剪贴板
+            text, self.input_text = self.input_text, ""
+            if text:
+                threading.Timer(self.delay_s, self.clipboard.set_text, args=(text,)).start()
+        elif keys == "ctrl+v":
+            self.pasted.append(self.clipboard.image or self.clipboard.get_text())
+
+
+def legacy_submit(app: FakeChatApp, render) -> Dict[str, float]:
+    """旧版 _on_submit 的时序：固定 sleep 0.05 / 0.1 / 0.1 秒（输入为空时剪切后直接粘贴还原）"""
+    stages: Dict[str, float] = {}
+    mark = time.perf_counter()
+
+    def stage(name: str) -> None:
+        nonlocal mark
+        now = time.perf_counter()
+        stages[name] = (now - mark) * 1000
+        mark = now
+
+    app.send_keys("ctrl+a")
+    time.sleep(0.05)
+    app.send_keys("ctrl+x")
+    time.sleep(0.1)
+    text = app.clipboard.get_text().strip()
+    stage("cut")
+    if not text:
+        app.send_keys("ctrl+v")
+        stage("paste")
+        return stages
+    image = render(text)
+    stage("render")
+    app.clipboard.set_image(image)
+    time.sleep(0.1)
+    stage("clipboard")
+    app.send_keys("ctrl+v")
+    stage("paste")
+    return stages
+
+
+def report(label: str, runs: List[Dict[str, float]]) -> None:
+    names = list(runs[0].keys())
+    parts = [f"{name} {statistics.median(r[name] for r in runs):7.2f}" for name in names]
+    total = statistics.median(sum(r.values()) for r in runs)
+    print(f"   {label:<10} " + "  ".join(parts) + f"   总计 {total:7.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--canvas", default="1920x1080")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--app-delay", default="5,30", help="模拟程序处理 Ctrl+X 的延迟 (ms)，逗号分隔")
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+    delays = [float(v) for v in args.app_delay.split(",") if v.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from core.clipboard import MemoryClipboardBackend
+        from core.prebuild import prebuild_character
+        from core.render_cache import RenderResultCache
+        from core.renderer import CharacterRenderer
+        from core.submit_pipeline import SubmitPipeline
+
+        make_character(assets, canvas_size=canvas, portraits=1, backgrounds=1, font_path=args.font)  # type: ignore[arg-type]
+        with contextlib.redirect_stdout(io.StringIO()):
+            prebuild_character("bench", assets, os.path.join(assets, "cache"), force=True)
+            renderer = CharacterRenderer("bench", assets)
+
+        def render(text: str):
+            return renderer.render(text, "1", "1")
+
+        ok = True
+        message = "早上好！今天也要元气满满地上学哦。"
+        print(f"🗂️ 画布 {args.canvas}，每组 {args.runs} 次，各阶段取中位数 (ms)")
+        for delay_ms in delays:
+            print(f"⏳ 模拟程序剪切延迟 {delay_ms:.0f} ms")
+            for label in ("固定 sleep", "序列号等待", "结果缓存"):
+                clipboard = MemoryClipboardBackend()
+                app = FakeChatApp(clipboard, delay_ms / 1000)
+                result_cache = RenderResultCache(64 * 1024 * 1024) if label == "结果缓存" else None
+                pipeline = SubmitPipeline(
+                    render,
+                    app.send_keys,
+                    clipboard=clipboard,
+                    result_cache=result_cache,
+                    cache_key=lambda text: renderer.result_key(text, "1", "1"),
+                )
+                if result_cache is not None:
+                    app.input_text = message
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        pipeline.run()  # 预热：第一次未命中
+                    app.pasted.clear()
+                runs: List[Dict[str, float]] = []
+                for _ in range(args.runs):
+                    app.input_text = message
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        if label == "固定 sleep":
+                            runs.append(legacy_submit(app, render))
+                        else:
+                            result = pipeline.run()
+                            runs.append(dict(result.stages))
+                            if result.status != "sent" or result.text != message:
+                                ok = False
+                            if result_cache is not None and not result.cache_hit:
+                                ok = False
+                report(label, runs)
+                if len(app.pasted) != args.runs:
+                    ok = False
+
+        # 空输入：序列号不会变化，剪切阶段等到超时为止，总耗时不得超过旧流程
+        print("🔕 空输入")
+        empty_runs: Dict[str, List[Dict[str, float]]] = {}
+        for label in ("固定 sleep", "序列号等待"):
+            clipboard = MemoryClipboardBackend()
+            app = FakeChatApp(clipboard, 0.0)
+            pipeline = SubmitPipeline(render, app.send_keys, clipboard=clipboard)
+            empty_runs[label] = []
+            for _ in range(max(1, args.runs // 4)):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if label == "固定 sleep":
+                        empty_runs[label].append(legacy_submit(app, render))
+                    else:
+                        result = pipeline.run()
+                        empty_runs[label].append(dict(result.stages))
+                        if result.status != "empty":
+                            ok = False
+            report(label, empty_runs[label])
+        legacy_empty, pipeline_empty = (
+            statistics.median(sum(r.values()) for r in empty_runs[label]) for label in ("固定 sleep", "序列号等待")
+        )
+        if pipeline_empty > legacy_empty + 5:
+            print(f"   ❌ 空输入比旧流程慢 {pipeline_empty - legacy_empty:.1f} ms")
+            ok = False
+
+        if not ok:
+            print("   ❌ 流水线没有按预期完成粘贴")
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
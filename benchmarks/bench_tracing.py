@@ -0,0 +1,105 @@
+"""
+阶段追踪基准：关闭 / 开启追踪时的渲染耗时，以及导出的 Chrome trace 是否完整
+
+关闭时每个 span 只是一次布尔判断，渲染耗时应与开启前无差别；开启后输出各阶段
+p50 / p95 / p99，并把 trace 写到临时目录，校验 JSON 结构和阶段名称。
+
+用法:
+    python benchmarks/bench_tracing.py [--canvas 1920x1080] [--runs 50] [--font path/to/font.ttf]
+                                       [--export trace.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+EXPECTED_SPANS = ("render", "render.layout_text", "render.base_canvas", "render.draw", "clipboard.set_image")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--canvas", default="1920x1080")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    parser.add_argument("--export", default=None, help="额外把 trace 保存到此路径")
+    args = parser.parse_args()
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp)
+        os.chdir(tmp)
+        from core import clipboard
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+        from core.tracing import get_tracer, span
+
+        make_character(assets, canvas_size=canvas, portraits=1, backgrounds=1, font_path=args.font)  # type: ignore[arg-type]
+        with contextlib.redirect_stdout(io.StringIO()):
+            prebuild_character("bench", assets, os.path.join(assets, "cache"), force=True)
+            renderer = CharacterRenderer("bench", assets)
+        clipboard.set_backend(clipboard.MemoryClipboardBackend())
+        tracer = get_tracer()
+
+        def submit_once(i: int) -> None:
+            image = renderer.render(f"第 {i} 条测试台词，看看每个阶段各花了多少时间。", "1", "1")
+            clipboard.set_image(image)
+
+        def run(enabled: bool) -> float:
+            tracer.configure(enabled)
+            tracer.clear()
+            submit_once(0)  # 预热底图缓存
+            samples = []
+            for i in range(args.runs):
+                started = time.perf_counter()
+                submit_once(i)
+                samples.append((time.perf_counter() - started) * 1000)
+            return statistics.median(samples)
+
+        off_ms = run(False)
+        on_ms = run(True)
+        spans = tracer.spans()
+
+        tracer.configure(False)
+        calls = 200_000
+        started = time.perf_counter()
+        for _ in range(calls):
+            with span("noop"):
+                pass
+        noop_ns = (time.perf_counter() - started) / calls * 1e9
+
+        print(f"🗂️ 画布 {args.canvas}，{args.runs} 次 渲染 + 写剪贴板，取中位数")
+        print(f"   追踪关闭   {off_ms:8.2f} ms   （空 span 每次 {noop_ns:.0f} ns）")
+        print(f"   追踪开启   {on_ms:8.2f} ms   （{len(spans)} 个 span）")
+        tracer.configure(True)
+        for line in tracer.format_stats():
+            print(line)
+
+        trace_path = tracer.export_chrome_trace(os.path.join(tmp, "trace.json"))
+        with open(trace_path, "r", encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        names = {event["name"] for event in events}
+        ok = all(name in names for name in EXPECTED_SPANS) and all(
+            event["ph"] == "X" and event["dur"] >= 0 for event in events
+        )
+        if args.export:
+            os.chdir(ROOT)
+            print(f"🧭 trace 已保存: {tracer.export_chrome_trace(args.export)}")
+        tracer.configure(False)
+        if not ok:
+            print(f"   ❌ trace 缺少阶段: {sorted(set(EXPECTED_SPANS) - names)}")
+        os.chdir(ROOT)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+断行性能基准：旧版逐字 textlength 断行 vs core.text_layout 增量断行
+
+用法:
+    python benchmarks/bench_wrap_text.py [--font 字体路径] [--size 字号] [--width 行宽]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from core.text_layout import clear_advance_caches, wrap_text
+
+DEFAULT_FONT = os.path.join("assets", "common", "fonts", "LXGWWenKai-Medium.ttf")
+SAMPLE_CHARS = (
+    "今天天气真好我们一起去散步吧这是一个渲染测试用于验证断行是否正常工作"
+    "abcdefghijklmnopqrstuvwxyzAVAWToTaYo，。！？「」…"
+)
+
+
+def legacy_wrap(text: str, draw: ImageDraw.ImageDraw, font, max_width: int) -> List[str]:
+    """baseline 版本的 CharacterRenderer._wrap_text，作为对照"""
+    lines = []
+    paragraphs = text.split("\n") if text else [""]
+    for para in paragraphs:
+        if not para:
+            lines.append("")
+            continue
+        current = ""
+        for ch in para:
+            if draw.textlength(current + ch, font=font) <= max_width:
+                current += ch
+            else:
+                lines.append(current)
+                current = ch
+        if current:
+            lines.append(current)
+    return lines
+
+
+def make_text(length: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    chars = [rng.choice(SAMPLE_CHARS) for _ in range(length)]
+    # 偶尔插入换行，覆盖空段落的情况
+    for idx in range(0, length, 997):
+        chars[idx] = "\n"
+    return "".join(chars)
+
+
+def load_font(path: str, size: int):
+    if path and os.path.exists(path):
+        return ImageFont.truetype(path, size)
+    print(f"⚠️ 找不到字体 {path}，使用 Pillow 内置字体")
+    return ImageFont.load_default(size)
+
+
+def bench(label: str, func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<18} {best * 1000:10.2f} ms")
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--font", default=DEFAULT_FONT)
+    parser.add_argument("--size", type=int, default=120)
+    parser.add_argument("--width", type=int, default=3400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    font = load_font(args.font, args.size)
+    draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    ok = True
+
+    for length in (500, 5000):
+        text = make_text(length)
+        print(f"\n📏 {length} 字符, 字号 {args.size}, 行宽 {args.width}")
+
+        expected = legacy_wrap(text, draw, font, args.width)
+        clear_advance_caches()
+        actual = wrap_text(text, font, args.width)
+        if actual != expected:
+            print("   ❌ 断行结果与旧实现不一致")
+            ok = False
+            continue
+
+        legacy = bench("legacy", lambda: legacy_wrap(text, draw, font, args.width), args.repeat)
+
+        def cold():
+            clear_advance_caches()
+            wrap_text(text, font, args.width)
+
+        cold_t = bench("incremental(cold)", cold, args.repeat)
+        warm_t = bench("incremental(warm)", lambda: wrap_text(text, font, args.width), args.repeat)
+        print(f"   ✅ {len(actual)} 行一致, 加速 cold x{legacy / cold_t:.1f} / warm x{legacy / warm_t:.1f}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+渲染服务压测：并发客户端持续 POST /render，统计吞吐、延迟分位与状态码
+
+默认在临时目录生成合成角色，以子进程启动 render_server.py（客户端与服务端不争抢同一个 GIL），
+压测结束后读取 /metrics 核对服务端计数。也可以用 --url 压测已经在运行的服务
+（此时需要用 --character 指定服务素材目录里存在的角色）。
+
+503（排队已满）是预期的背压信号：客户端按 Retry-After 稍等后重试，单独计数，不算失败。
+其余非 200 响应或连接错误都会让脚本返回非 0。
+
+用法:
+    python benchmarks/load_test.py [--concurrency 8] [--requests 400] [--format png]
+                                   [--canvas 1280x720] [--workers 2] [--queue 4]
+                                   [--characters 2] [--font path/to/font.ttf]
+    python benchmarks/load_test.py --url http://127.0.0.1:8765 --character yuraa
+"""
+import argparse
+import http.client
+import io
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_character, make_workspace
+
+LINES = (
+    "好的。",
+    "早上好！今天也要元气满满地去上学哦。",
+    "如果明天还下雨的话，我们就改去图书馆吧，那里安静，也有空调。",
+)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _start_server(workspace: str, workers: int, queue: int) -> Tuple[subprocess.Popen, str]:
+    cmd = [sys.executable, "-u", os.path.join(ROOT, "render_server.py"), "--port", "0", "--queue", str(queue)]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=workspace, stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    assert proc.stdout is not None
+    for line in proc.stdout:
+        if "http://" in line:
+            url = line.split("http://", 1)[1].split()[0]
+            # 之后的输出不再读取，交给后台线程排空，避免管道写满阻塞服务
+            threading.Thread(target=lambda: [None for _ in proc.stdout], daemon=True).start()  # type: ignore[union-attr]
+            return proc, f"http://{url}"
+    raise RuntimeError(f"渲染服务启动失败，退出码 {proc.wait()}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="压测已运行的服务，省略时自动启动")
+    parser.add_argument("--character", default=None, help="配合 --url 使用的角色 ID")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--format", default="png")
+    parser.add_argument("--canvas", default="1280x720")
+    parser.add_argument("--characters", type=int, default=2, help="自动启动时生成的合成角色数")
+    parser.add_argument("--workers", type=int, default=0, help="服务端渲染线程数，0 表示默认")
+    parser.add_argument("--queue", type=int, default=4, help="服务端排队上限")
+    parser.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc: Optional[subprocess.Popen] = None
+        if args.url:
+            if not args.character:
+                parser.error("--url 需要同时指定 --character")
+            url = args.url.rstrip("/")
+            characters = [args.character]
+        else:
+            canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+            assets = make_workspace(tmp)
+            characters = []
+            for i in range(max(1, args.characters)):
+                char_id = f"bench{i + 1}"
+                make_character(assets, char_id=char_id, canvas_size=canvas, portraits=2, backgrounds=1,  # type: ignore[arg-type]
+                               font_path=args.font)
+                characters.append(char_id)
+            proc, url = _start_server(tmp, args.workers, args.queue)
+        target = urlparse(url)
+
+        def request(conn: http.client.HTTPConnection, method: str, path: str, body: Optional[dict] = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else None
+            conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            return resp.status, resp.read(), resp.getheader("Retry-After")
+
+        try:
+            # 预热：每个角色一次（首次请求会加载渲染器、必要时预生成缓存）
+            conn = http.client.HTTPConnection(target.hostname, target.port, timeout=120)
+            size = None
+            for char_id in characters:
+                status, body, _ = request(conn, "POST", "/render", {"character": char_id, "text": "预热", "format": args.format})
+                if status != 200:
+                    print(f"❌ 预热失败 {status}: {body.decode('utf-8', 'replace')}")
+                    return 1
+                size = Image.open(io.BytesIO(body)).size
+
+            counter = itertools.count()
+            lock = threading.Lock()
+            latencies: List[float] = []
+            statuses: Dict[str, int] = {}
+            retried = 0
+
+            def client() -> None:
+                nonlocal retried
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=120)
+                while True:
+                    i = next(counter)
+                    if i >= args.requests:
+                        break
+                    body = {
+                        "character": characters[i % len(characters)],
+                        "text": f"{LINES[i % len(LINES)]}（{i}）",
+                        "portrait": str(i % 2 + 1) if not args.url else None,
+                        "speaker": "测试",
+                        "format": args.format,
+                    }
+                    started = time.perf_counter()
+                    while True:
+                        try:
+                            status, _, retry_after = request(conn, "POST", "/render", body)
+                        except (OSError, http.client.HTTPException) as e:
+                            status, retry_after = type(e).__name__, None
+                            conn.close()
+                            conn = http.client.HTTPConnection(target.hostname, target.port, timeout=120)
+                        if status != 503:
+                            break
+                        with lock:
+                            retried += 1
+                        # Retry-After 的单位是秒，压测里按它的 1/20 退避，避免空等太久
+                        time.sleep(float(retry_after or 1) / 20)
+                    with lock:
+                        statuses[str(status)] = statuses.get(str(status), 0) + 1
+                        if status == 200:
+                            latencies.append((time.perf_counter() - started) * 1000)
+                conn.close()
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            status, metrics, _ = request(conn, "GET", "/metrics")
+            conn.close()
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    ok_count = statuses.get("200", 0)
+    print(f"🚦 {args.requests} 个请求，{args.concurrency} 并发，{len(characters)} 个角色，格式 {args.format}，画布 {size}")
+    print(f"   吞吐       {ok_count / elapsed:8.1f} 张/s  （{elapsed:.2f} s）")
+    if latencies:
+        print(
+            f"   延迟       p50 {_percentile(latencies, 50):.1f}  p95 {_percentile(latencies, 95):.1f}  "
+            f"p99 {_percentile(latencies, 99):.1f}  平均 {statistics.mean(latencies):.1f} ms（含 503 重试）"
+        )
+    print(f"   状态码     {statuses}   503 重试 {retried} 次")
+
+    text = metrics.decode("utf-8") if status == 200 else ""
+    served = sum(
+        int(float(line.rsplit(" ", 1)[1]))
+        for line in text.splitlines()
+        if line.startswith('galgame_render_requests_total{code="200"}')
+    )
+    print("📊 服务端指标:")
+    for line in text.splitlines():
+        if line.startswith(("galgame_render_requests_total", "galgame_render_rejected_total")) or (
+            line.startswith("galgame_render_stage_seconds_count")
+        ):
+            print(f"   {line}")
+
+    ok = ok_count == args.requests and (args.url is not None or served == ok_count + len(characters))
+    if not ok:
+        print("   ❌ 存在失败的请求，或服务端计数与客户端不一致")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
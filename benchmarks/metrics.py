@@ -0,0 +1,28 @@
+"""基准脚本共用的进程指标（内存占用）"""
+import os
+import sys
+
+
+def current_rss_bytes() -> int:
+    """当前常驻内存 (RSS)，Linux 读取 /proc，其它平台退回峰值 RSS"""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """进程峰值常驻内存"""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def mb(value: float) -> str:
+    return f"{value / (1024 * 1024):.1f} MB"
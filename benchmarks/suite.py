@@ -0,0 +1,288 @@
+"""
+渲染基准套件：合成角色 × 分辨率 × 缓存格式，结果保存为 JSON 基线并可比较回归
+
+每个场景在独立子进程里运行（各自的临时工作目录、global_config 和峰值内存），测量：
+    prebuild_s            强制重新生成全部底图的耗时
+    decode_ms             从磁盘读取一张底图缓存的耗时（缓存格式的解码成本）
+    render_cold_ms        关闭内存缓存时的 render()，每次都从磁盘读取底图
+    render_warm_<长度>_ms  底图已在内存时的 render()，按短 / 中 / 长台词分别统计
+    peak_rss_mb           子进程峰值常驻内存
+耗时类指标取 --rounds 次中最快的一次（prebuild 只跑一次），所有指标都是越小越好。
+不依赖 keyboard / win32clipboard，可在无界面的 Linux 上运行。
+
+用法:
+    python benchmarks/suite.py run [--profiles 720p,1440p,4k] [--formats jpeg,png,raw]
+                                   [--rounds 10] [--font path/to/font.ttf] [-o results.json]
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 0.25]
+    python benchmarks/suite.py compare baseline.json [--retries 2]  # 现场运行一次再与基线比较，疑似回归的场景会重跑
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.metrics import peak_rss_bytes
+from benchmarks.synthetic import make_character, make_workspace
+
+RESULT_VERSION = 1
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "baseline.json")
+
+# 分辨率 → (画布, 立绘数, 背景数)
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "720p": {"canvas": [1280, 720], "portraits": 4, "backgrounds": 3},
+    "1440p": {"canvas": [2560, 1440], "portraits": 3, "backgrounds": 2},
+    "4k": {"canvas": [3840, 2160], "portraits": 2, "backgrounds": 2},
+}
+FORMATS = ("jpeg", "png", "raw")
+TEXTS = {
+    "short": "好的。",
+    "medium": "早上好！今天也要元气满满地去上学哦，别忘了带便当。",
+    "long": "“所以说，”她把书合上，认真地看着你，“如果明天还下雨的话，我们就改去图书馆吧。"
+    "那里安静，也有空调，还可以顺便把上周没看完的那本推理小说借出来——你不是一直想知道凶手是谁吗？”",
+}
+# 小于这个绝对差值的变化视为噪声，不算回归（毫秒 / 秒 / MB 各自的量级）
+MIN_ABS_DELTA = {"_ms": 1.0, "_s": 0.2, "_mb": 8.0}
+
+
+def _best_ms(fn: Callable[[], Any], rounds: int) -> float:
+    """取最快的一次：其余轮次的差异主要来自机器上的其他负载，而不是被测代码"""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return min(samples)
+
+
+# -----------------------
+# 单个场景（子进程内执行）
+# -----------------------
+def run_scenario(spec: Dict[str, Any]) -> Dict[str, float]:
+    profile = PROFILES[spec["profile"]]
+    rounds = int(spec["rounds"])
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = make_workspace(tmp, {"cache_format": spec["format"]})
+        os.chdir(tmp)
+        from core.prebuild import prebuild_character
+        from core.renderer import CharacterRenderer
+
+        make_character(
+            assets,
+            canvas_size=tuple(profile["canvas"]),  # type: ignore[arg-type]
+            portraits=profile["portraits"],
+            backgrounds=profile["backgrounds"],
+            font_path=spec.get("font"),
+        )
+        metrics: Dict[str, float] = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            prebuild_character("bench", assets, os.path.join(assets, "cache"), force=True)
+            metrics["prebuild_s"] = time.perf_counter() - started
+            renderer = CharacterRenderer("bench", assets)
+
+        cache_path = renderer._cache_file_path("1", "1")
+        if cache_path:
+            metrics["decode_ms"] = _best_ms(lambda: renderer._open_cache_file(cache_path).load(), rounds)
+
+        renderer.use_memory_cache = False
+        metrics["render_cold_ms"] = _best_ms(lambda: renderer.render(TEXTS["medium"], "1", "1"), rounds)
+
+        renderer.use_memory_cache = True
+        renderer.render(TEXTS["short"], "1", "1")
+        for label, text in TEXTS.items():
+            metrics[f"render_warm_{label}_ms"] = _best_ms(lambda: renderer.render(text, "1", "1"), rounds)
+        os.chdir(ROOT)
+    metrics["peak_rss_mb"] = peak_rss_bytes() / (1024 * 1024)
+    return metrics
+
+
+def _run_in_subprocess(spec: Dict[str, Any]) -> Dict[str, float]:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "_scenario", json.dumps(spec)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or f"exit code {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# -----------------------
+# run / compare
+# -----------------------
+def run_suite(profiles: List[str], formats: List[str], rounds: int, font: Optional[str]) -> Dict[str, Any]:
+    import PIL
+
+    results: Dict[str, Any] = {
+        "version": RESULT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {"rounds": rounds, "font": os.path.basename(font) if font else None},
+        "scenarios": {},
+    }
+    for profile in profiles:
+        for fmt in formats:
+            name = f"{profile}/{fmt}"
+            spec = {"profile": profile, "format": fmt, "rounds": rounds, "font": font}
+            started = time.perf_counter()
+            metrics = _run_in_subprocess(spec)
+            results["scenarios"][name] = metrics
+            print(
+                f"   {name:<12} prebuild {metrics['prebuild_s']:6.2f} s  "
+                f"decode {metrics.get('decode_ms', 0.0):7.2f} ms  "
+                f"cold {metrics['render_cold_ms']:7.2f} ms  "
+                f"warm {metrics['render_warm_medium_ms']:6.2f} ms  "
+                f"RSS {metrics['peak_rss_mb']:6.1f} MB  ({time.perf_counter() - started:.1f} s)"
+            )
+    return results
+
+
+def _min_abs_delta(metric: str) -> float:
+    for suffix, value in MIN_ABS_DELTA.items():
+        if metric.endswith(suffix):
+            return value
+    return 0.0
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, verbose: bool = True
+) -> List[str]:
+    """逐项比较，返回回归的指标（变慢 / 变大超过 threshold 且超过噪声下限）"""
+    regressions = []
+    for name, base_metrics in sorted(baseline.get("scenarios", {}).items()):
+        metrics = current.get("scenarios", {}).get(name)
+        if metrics is None:
+            if verbose:
+                print(f"   {name:<12} ⚠️ 本次结果中没有这个场景")
+            continue
+        for metric, base in sorted(base_metrics.items()):
+            value = metrics.get(metric)
+            if value is None or base <= 0:
+                continue
+            change = (value - base) / base
+            regressed = change > threshold and value - base > _min_abs_delta(metric)
+            mark = "❌" if regressed else ("✅" if change < -threshold else "  ")
+            if verbose:
+                print(f"   {mark} {name:<12} {metric:<24} {base:10.2f} → {value:10.2f}  ({change:+.0%})")
+            if regressed:
+                regressions.append(f"{name} {metric}")
+    return regressions
+
+
+def rerun_regressed(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, rounds: int, font: Optional[str], retries: int
+) -> None:
+    """重跑疑似回归的场景，每个指标保留各次中最好的值；真实的回归重跑后依然存在"""
+    for attempt in range(retries):
+        suspects = sorted({item.split(" ", 1)[0] for item in compare_results(baseline, current, threshold, False)})
+        if not suspects:
+            return
+        print(f"🔁 第 {attempt + 1} 次重跑疑似回归的场景: {', '.join(suspects)}")
+        for name in suspects:
+            profile, fmt = name.split("/", 1)
+            metrics = _run_in_subprocess({"profile": profile, "format": fmt, "rounds": rounds, "font": font})
+            previous = current["scenarios"][name]
+            for metric, value in metrics.items():
+                previous[metric] = min(previous.get(metric, value), value)
+
+
+def _load_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != RESULT_VERSION:
+        raise ValueError(f"{path}: 不支持的结果版本 {data.get('version')}")
+    return data
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    if len(sys.argv) == 3 and sys.argv[1] == "_scenario":
+        print(json.dumps(run_scenario(json.loads(sys.argv[2]))))
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_run_options(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--profiles", default=",".join(PROFILES), help="逗号分隔: " + ", ".join(PROFILES))
+        p.add_argument("--formats", default=",".join(FORMATS), help="逗号分隔: " + ", ".join(FORMATS))
+        p.add_argument("--rounds", type=int, default=10)
+        p.add_argument("--font", default=None, help="用于绘制文字的字体文件")
+
+    run_parser = sub.add_parser("run", help="运行基准并保存结果")
+    add_run_options(run_parser)
+    run_parser.add_argument("-o", "--output", default=DEFAULT_BASELINE, help="结果 JSON 路径（默认写为基线）")
+
+    compare_parser = sub.add_parser("compare", help="与基线比较，超过阈值的回归返回非 0")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", help="省略时现场运行一次")
+    compare_parser.add_argument("--threshold", type=float, default=0.25, help="允许的相对变慢比例")
+    compare_parser.add_argument("--retries", type=int, default=2, help="现场运行时疑似回归的场景最多重跑几次")
+    compare_parser.add_argument("-o", "--output", default=None, help="现场运行时另存本次结果")
+    add_run_options(compare_parser)
+
+    args = parser.parse_args()
+    profiles = [p for p in _split(args.profiles) if p in PROFILES]
+    formats = [f for f in _split(args.formats) if f in FORMATS]
+
+    if args.command == "run":
+        print(f"🧪 {len(profiles) * len(formats)} 个场景，每项取 {args.rounds} 次中最快一次")
+        results = run_suite(profiles, formats, args.rounds, args.font)
+        _write_json(args.output, results)
+        print(f"💾 结果已保存: {args.output}")
+        return 0
+
+    baseline = _load_json(args.baseline)
+    if args.current:
+        current = _load_json(args.current)
+    else:
+        names = list(baseline.get("scenarios", {}))
+        profiles = [p for p in profiles if any(n.startswith(f"{p}/") for n in names)]
+        formats = [f for f in formats if any(n.endswith(f"/{f}") for n in names)]
+        print(f"🧪 按基线运行 {len(profiles) * len(formats)} 个场景")
+        current = run_suite(profiles, formats, args.rounds, args.font)
+        rerun_regressed(baseline, current, args.threshold, args.rounds, args.font, args.retries)
+        if args.output:
+            _write_json(args.output, current)
+    if baseline.get("environment") != current.get("environment"):
+        print("⚠️ 基线与本次结果的运行环境不同，数值仅供参考")
+    print(f"📊 与基线比较（阈值 {args.threshold:.0%}）")
+    regressions = compare_results(baseline, current, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} 项回归: " + ", ".join(regressions))
+        return 1
+    print("✅ 没有超过阈值的回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+生成基准测试用的合成角色（立绘 / 背景 / 对话框 / config.yaml）
+
+所有素材都用 Pillow 现场绘制，不依赖仓库里的真实角色素材。
+"""
+import os
+import random
+import shutil
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+from PIL import Image, ImageDraw
+
+FONT_NAME = "LXGWWenKai-Medium.ttf"
+
+
+def _random_color(rng: random.Random, alpha: int = 255) -> Tuple[int, int, int, int]:
+    return rng.randrange(256), rng.randrange(256), rng.randrange(256), alpha
+
+
+def _make_background(size: Tuple[int, int], rng: random.Random) -> Image.Image:
+    img = Image.new("RGB", size, _random_color(rng)[:3])
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for _ in range(24):
+        x1, y1 = rng.randrange(w), rng.randrange(h)
+        x2, y2 = x1 + rng.randrange(w // 2 + 1), y1 + rng.randrange(h // 2 + 1)
+        draw.rectangle((x1, y1, x2, y2), fill=_random_color(rng)[:3])
+    return img
+
+
+def _make_portrait(size: Tuple[int, int], rng: random.Random) -> Image.Image:
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    draw.ellipse((w * 0.25, h * 0.05, w * 0.75, h * 0.4), fill=_random_color(rng))
+    draw.rounded_rectangle((w * 0.15, h * 0.35, w * 0.85, h), radius=w // 8, fill=_random_color(rng))
+    return img
+
+
+def _make_dialog_box(width: int, rng: random.Random) -> Image.Image:
+    height = max(40, width // 6)
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.rounded_rectangle((0, 0, width - 1, height - 1), radius=height // 6, fill=_random_color(rng, 200))
+    return img
+
+
+def make_character(
+    base_path: str,
+    char_id: str = "bench",
+    canvas_size: Tuple[int, int] = (2560, 1440),
+    portraits: int = 3,
+    backgrounds: int = 3,
+    font_path: Optional[str] = None,
+    seed: int = 0,
+    enable_crop: bool = False,
+) -> str:
+    """在 base_path 下生成合成角色，返回角色目录"""
+    rng = random.Random(seed)
+    canvas_w, canvas_h = canvas_size
+    char_root = os.path.join(base_path, "characters", char_id)
+    portrait_dir = os.path.join(char_root, "portrait")
+    bg_dir = os.path.join(char_root, "background")
+    os.makedirs(portrait_dir, exist_ok=True)
+    os.makedirs(bg_dir, exist_ok=True)
+
+    portrait_size = (int(canvas_w * 0.3), int(canvas_h * 0.9))
+    for idx in range(1, portraits + 1):
+        _make_portrait(portrait_size, rng).save(os.path.join(portrait_dir, f"{idx}.png"))
+    for idx in range(1, backgrounds + 1):
+        _make_background(canvas_size, rng).save(os.path.join(bg_dir, f"{idx}.png"))
+    _make_dialog_box(canvas_w, rng).save(os.path.join(char_root, "textbox_bg.png"))
+
+    if font_path and os.path.exists(font_path):
+        font_dir = os.path.join(base_path, "common", "fonts")
+        os.makedirs(font_dir, exist_ok=True)
+        target = os.path.join(font_dir, FONT_NAME)
+        if not os.path.exists(target):
+            shutil.copyfile(font_path, target)
+
+    scale = canvas_w / 2560
+    config = {
+        "meta": {"id": char_id, "name": "测试角色"},
+        "style": {
+            "mode": "basic",
+            "basic": {
+                "font_size": int(48 * scale),
+                "text_color": [255, 255, 255],
+                "name_font_size": int(40 * scale),
+                "name_color": [255, 85, 255],
+            },
+        },
+        "layout": {
+            "_canvas_size": [canvas_w, canvas_h],
+            "stand_pos": [int(canvas_w * 0.05), int(canvas_h * 0.1)],
+            "stand_scale": 1.0,
+            "stand_on_top": False,
+            "text_area": [int(canvas_w * 0.1), int(canvas_h * 0.78), int(canvas_w * 0.9), int(canvas_h * 0.97)],
+            "name_pos": [int(canvas_w * 0.1), int(canvas_h * 0.72)],
+            "enable_crop": enable_crop,
+            "crop_area": [int(canvas_w * 0.4), 0, int(canvas_w * 0.4) + int(300 * scale), int(1200 * scale)],
+        },
+        "assets": {"dialog_box": "textbox_bg.png"},
+    }
+    with open(os.path.join(char_root, "config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+    return char_root
+
+
+def make_workspace(root: str, render: Optional[Dict[str, Any]] = None) -> str:
+    """
+    在 root 下写入独立的 global_config.yaml，返回素材目录 root/assets。
+    core.utils 按当前工作目录定位全局配置，基准脚本需先 chdir 到 root 再导入 core 模块。
+    """
+    config = {
+        "current_character": "bench",
+        "trigger_hotkey": "enter",
+        "render": dict(render or {}),
+    }
+    with open(os.path.join(root, "global_config.yaml"), "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+    assets = os.path.join(root, "assets")
+    os.makedirs(assets, exist_ok=True)
+    return assets
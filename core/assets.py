@@ -0,0 +1,63 @@
+# core/assets.py
+"""
+按需解码的素材句柄
+
+构造时只记录路径、文件大小和 mtime，第一次访问 ``image`` 时才解码像素。
+渲染通常直接命中预生成缓存，大多数立绘/背景在整个会话中根本不需要解码。
+"""
+import os
+import threading
+from typing import Callable, Optional
+
+from PIL import Image
+
+Transform = Callable[[Image.Image], Image.Image]
+
+
+class AssetHandle:
+    """单个图片素材的惰性句柄"""
+
+    def __init__(self, path: str, transform: Optional[Transform] = None):
+        stat = os.stat(path)
+        self.path = path
+        self.file_size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._transform = transform
+        self._image: Optional[Image.Image] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "lazy"
+        return f"<AssetHandle {self.path!r} {state}>"
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._image is not None
+
+    @property
+    def image(self) -> Image.Image:
+        """解码后的 RGBA 图片（首次访问时解码并应用 transform）"""
+        img = self._image
+        if img is not None:
+            return img
+        with self._lock:
+            if self._image is None:
+                with Image.open(self.path) as src:
+                    decoded = src.convert("RGBA")
+                if self._transform:
+                    decoded = self._transform(decoded)
+                self._image = decoded
+            return self._image
+
+    def unload(self) -> None:
+        """释放已解码的像素，下次访问时重新解码"""
+        with self._lock:
+            self._image = None
+
+    def is_stale(self) -> bool:
+        """源文件的大小或 mtime 是否已变化（文件被删除也视为过期）"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return stat.st_size != self.file_size or stat.st_mtime_ns != self.mtime_ns
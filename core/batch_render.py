@@ -0,0 +1,307 @@
+# core/batch_render.py
+"""
+批量把对话脚本渲染成图片序列
+
+脚本每行一条台词，字段：character（角色 ID）、text、portrait（表情，也可写 expression）、
+background、speaker（显示的名字）。支持三种格式：
+    YAML   台词列表，或 {defaults: {...}, lines: [...]}，defaults 为每行的缺省字段
+    CSV    首行为表头
+    JSONL  每行一个 JSON 对象
+
+台词按顺序切片分给进程池，每个工作进程通过进程内的 RendererRegistry 为每个角色保留常驻渲染器；
+结果按脚本顺序流式写入目录（00001.png ...）或 tar 文件。
+
+断点续跑：每张图都带一个键（渲染结果缓存键 + 输出格式），目录输出记在 .batch_keys.jsonl，
+tar 输出记在成员的 PAX 头里。再次运行时键相同且文件完整的行直接跳过；
+改了台词、表情或角色样式的行会重新渲染。
+"""
+import csv
+import io
+import json
+import os
+import tarfile
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+try:
+    from .prebuild import ensure_character_cache
+    from .render_cache import result_key
+    from .render_service import OUTPUT_FORMATS, encode_image
+    from .renderer_registry import get_renderer
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from prebuild import ensure_character_cache  # type: ignore[no-redef]
+    from render_cache import result_key  # type: ignore[no-redef]
+    from render_service import OUTPUT_FORMATS, encode_image  # type: ignore[no-redef]
+    from renderer_registry import get_renderer  # type: ignore[no-redef]
+
+SCRIPT_FIELDS = ("character", "text", "portrait", "background", "speaker")
+KEYS_FILE = ".batch_keys.jsonl"
+PAX_KEY = "GALGAME.key"
+
+# (序号, 台词, 输出格式, 质量) → (序号, 键, 图片字节或 None, 错误信息)
+Task = Tuple[int, Dict[str, Any], str, int]
+TaskResult = Tuple[int, str, Optional[bytes], Optional[str]]
+
+
+# -----------------------
+# 脚本解析
+# -----------------------
+def load_script(path: str, default_character: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取脚本，返回规范化后的台词列表（字段缺失为 None）"""
+    ext = os.path.splitext(path)[1].lower()
+    defaults: Dict[str, Any] = {}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if ext in (".yaml", ".yml"):
+            data = yaml.safe_load(f) or []
+            if isinstance(data, dict):
+                defaults = data.get("defaults") or {}
+                data = data.get("lines") or []
+            rows = list(data)
+        elif ext == ".csv":
+            rows = list(csv.DictReader(f))
+        elif ext in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            raise ValueError(f"不支持的脚本格式: {ext}（支持 .yaml / .csv / .jsonl）")
+
+    lines = []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise ValueError(f"{path} 第 {number} 条不是键值对: {row!r}")
+        merged = {**defaults, **{k: v for k, v in row.items() if v not in (None, "")}}
+        if "portrait" not in merged and "expression" in merged:
+            merged["portrait"] = merged["expression"]
+        line = {field: merged.get(field) for field in SCRIPT_FIELDS}
+        line["character"] = line["character"] or default_character
+        if not line["character"]:
+            raise ValueError(f"{path} 第 {number} 条缺少 character，且没有指定默认角色")
+        line["text"] = str(line["text"] or "")
+        for field in ("character", "portrait", "background", "speaker"):
+            if line[field] is not None:
+                line[field] = str(line[field])
+        lines.append(line)
+    return lines
+
+
+# -----------------------
+# 输出：目录 / tar
+# -----------------------
+class DirectoryOutput:
+    """每张图一个文件；写入先落到临时文件再改名，目录里存在的文件一定是完整的"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._keys_path = os.path.join(path, KEYS_FILE)
+        self._keys_file = None
+
+    def done_keys(self) -> Dict[str, str]:
+        done: Dict[str, str] = {}
+        if not os.path.exists(self._keys_path):
+            return done
+        with open(self._keys_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 上次中断时写了一半的记录
+                if os.path.exists(os.path.join(self.path, record["name"])):
+                    done[record["name"]] = record["key"]
+        return done
+
+    def write(self, name: str, key: str, data: bytes) -> None:
+        target = os.path.join(self.path, name)
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+        if self._keys_file is None:
+            self._keys_file = open(self._keys_path, "a", encoding="utf-8")
+        self._keys_file.write(json.dumps({"name": name, "key": key}) + "\n")
+        self._keys_file.flush()
+
+    def close(self) -> None:
+        if self._keys_file is not None:
+            self._keys_file.close()
+            self._keys_file = None
+
+
+class TarOutput:
+    """
+    追加写入的未压缩 tar。键存放在成员的 PAX 头里；续跑时先截掉上次中断留下的不完整成员，
+    再在末尾继续追加（同名成员以最后一个为准，解包时会覆盖旧的）。
+    """
+
+    def __init__(self, path: str, fresh: bool = False):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._done: Dict[str, str] = {}
+        end = 0
+        if not fresh and os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                tar = tarfile.open(path, "r:")
+            except tarfile.TarError:
+                raise ValueError(f"{path} 不是有效的 tar 文件；删除它或使用 --force 重新生成")
+            with tar:
+                while True:
+                    try:
+                        member = tar.next()
+                    except tarfile.TarError:
+                        break
+                    if member is None:
+                        break
+                    data_end = member.offset_data + -(-member.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    if data_end > os.path.getsize(path):
+                        break
+                    self._done[member.name] = member.pax_headers.get(PAX_KEY, "")
+                    end = data_end
+            with open(path, "r+b") as f:
+                f.truncate(end)
+                if end:
+                    # 补上归档结束标记，追加模式靠它定位写入位置
+                    f.seek(end)
+                    f.write(b"\0" * tarfile.BLOCKSIZE * 2)
+        self._tar = tarfile.open(path, "a:" if end else "w:", format=tarfile.PAX_FORMAT)
+
+    def done_keys(self) -> Dict[str, str]:
+        return dict(self._done)
+
+    def write(self, name: str, key: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.pax_headers = {PAX_KEY: key}
+        self._tar.addfile(info, io.BytesIO(data))
+        self._tar.fileobj.flush()  # type: ignore[union-attr]
+
+    def close(self) -> None:
+        self._tar.close()
+
+
+def open_output(path: str, fresh: bool = False):
+    """以 .tar 结尾时写 tar，否则写目录；fresh 时 tar 从头重写"""
+    if path.lower().endswith(".tar"):
+        return TarOutput(path, fresh)
+    return DirectoryOutput(path)
+
+
+# -----------------------
+# 渲染（工作进程）
+# -----------------------
+_worker_base_path = "assets"
+
+
+def _init_worker(base_path: str) -> None:
+    global _worker_base_path
+    _worker_base_path = base_path
+
+
+def _render_task(task: Task) -> TaskResult:
+    index, line, fmt, quality = task
+    key = line["_key"]
+    try:
+        renderer = get_renderer(line["character"], _worker_base_path)
+        image = renderer.render(line["text"], line["portrait"], line["background"], speaker_name=line["speaker"])
+        return index, key, encode_image(image, fmt, quality), None
+    except Exception as e:
+        return index, key, None, str(e)
+
+
+def _line_keys(lines: List[Dict[str, Any]], base_path: str, fmt: str, quality: int) -> List[Optional[str]]:
+    """在主进程里为每行计算输出键；素材不存在的行返回 None"""
+    keys: List[Optional[str]] = []
+    renderers: Dict[str, Any] = {}
+    for line in lines:
+        char_id = line["character"]
+        if char_id not in renderers:
+            renderers[char_id] = get_renderer(char_id, base_path)
+        renderer = renderers[char_id]
+        render_key = renderer.result_key(line["text"], line["portrait"], line["background"], line["speaker"])
+        keys.append(result_key(render_key, fmt, quality) if render_key else None)
+    return keys
+
+
+def render_script(
+    script_path: str,
+    output_path: str,
+    base_path: str = "assets",
+    jobs: Optional[int] = None,
+    fmt: str = "png",
+    quality: int = 90,
+    default_character: Optional[str] = None,
+    force: bool = False,
+    chunksize: int = 4,
+) -> Dict[str, Any]:
+    """渲染整个脚本，返回统计（rendered / skipped / failed / seconds / lines_per_s）"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    lines = load_script(script_path, default_character)
+    characters = sorted({line["character"] for line in lines})
+    for char_id in characters:
+        if not os.path.isdir(os.path.join(base_path, "characters", char_id)):
+            raise ValueError(f"找不到角色: {char_id}")
+        # 预生成缓存只在主进程做一次，避免多个工作进程同时写同一份缓存
+        ensure_character_cache(char_id, base_path, os.path.join(base_path, "cache"))
+
+    ext = "jpg" if OUTPUT_FORMATS[fmt][0] == "JPEG" else fmt
+    width = max(5, len(str(len(lines))))
+    names = [f"{i + 1:0{width}d}.{ext}" for i in range(len(lines))]
+    keys = _line_keys(lines, base_path, fmt, quality)
+
+    output = open_output(output_path, fresh=force)
+    done = {} if force else output.done_keys()
+    tasks: List[Task] = []
+    failed: List[str] = []
+    for i, (line, key) in enumerate(zip(lines, keys)):
+        if key is None:
+            failed.append(
+                f"{names[i]}: 角色 {line['character']} 找不到立绘 {line['portrait'] or '（默认）'}"
+                f" 或背景 {line['background'] or '（默认）'}"
+            )
+        elif done.get(names[i]) != key:
+            tasks.append((i, {**line, "_key": key}, fmt, quality))
+    skipped = len(lines) - len(tasks) - len(failed)
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    print(f"🎬 {len(lines)} 条台词，{len(characters)} 个角色；跳过已完成 {skipped} 条，待渲染 {len(tasks)} 条（{jobs} 进程）")
+    started = time.perf_counter()
+    rendered = 0
+    try:
+        for index, key, data, error in _iter_results(tasks, jobs, base_path, chunksize):
+            if data is None:
+                failed.append(f"{names[index]}: {error}")
+                continue
+            output.write(names[index], key, data)
+            rendered += 1
+            if rendered % 50 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"   … {rendered}/{len(tasks)}  {rendered / elapsed:.1f} 条/s")
+    finally:
+        output.close()
+    seconds = time.perf_counter() - started
+    return {
+        "total": len(lines),
+        "rendered": rendered,
+        "skipped": skipped,
+        "failed": failed,
+        "jobs": jobs,
+        "seconds": seconds,
+        "lines_per_s": rendered / seconds if seconds > 0 else 0.0,
+    }
+
+
+def _iter_results(tasks: List[Task], jobs: int, base_path: str, chunksize: int) -> Iterator[TaskResult]:
+    """按脚本顺序产出渲染结果；单进程时直接在当前进程渲染"""
+    if jobs <= 1:
+        _init_worker(base_path)
+        for task in tasks:
+            yield _render_task(task)
+        return
+    with Pool(jobs, initializer=_init_worker, initargs=(base_path,)) as pool:
+        # imap 按提交顺序返回，连续的切片落在同一个进程里，表情 / 背景底图更容易命中缓存
+        yield from pool.imap(_render_task, tasks, chunksize=max(1, chunksize))
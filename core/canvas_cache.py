@@ -0,0 +1,149 @@
+# core/canvas_cache.py
+"""
+按字节计量的底图 LRU 缓存
+
+每张底图是整幅 RGBA 画布（2560x1440 约 14.7 MB，4K 约 33 MB），无上限的 dict 会随着
+切换表情/背景无限增长。这里按图片实际占用的字节数淘汰最久未使用的条目，
+被钉住（pin）的条目（当前表情的底图）不会被淘汰。
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image
+
+PinFilter = Callable[[Hashable], bool]
+ReleaseHook = Callable[[Image.Image], None]
+
+
+def image_nbytes(img: Image.Image) -> int:
+    """估算图片像素数据占用的字节数"""
+    width, height = img.size
+    return width * height * len(img.getbands())
+
+
+class CanvasCache:
+    """
+    字节预算内的 LRU；budget_bytes <= 0 表示不限容量。
+    on_release: 条目被淘汰、丢弃或清空时（在锁外）对图片调用，用于立即释放 mmap 等资源。
+    """
+
+    def __init__(self, budget_bytes: int = 0, on_release: Optional[ReleaseHook] = None):
+        self.budget_bytes = int(budget_bytes)
+        self._on_release = on_release
+        self._entries: "OrderedDict[Hashable, Tuple[Image.Image, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pin_filter: Optional[PinFilter] = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, img: Image.Image) -> None:
+        nbytes = image_nbytes(img)
+        released: List[Image.Image] = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+                if old[0] is not img:
+                    released.append(old[0])
+            self._entries[key] = (img, nbytes)
+            self.current_bytes += nbytes
+            released.extend(self._evict_locked(keep=key))
+        self._release(released)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+        if entry is not None:
+            self._release([entry[0]])
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """丢弃所有满足 predicate 的条目（包括被钉住的），返回丢弃数量"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            released = []
+            for key in keys:
+                img, nbytes = self._entries.pop(key)
+                self.current_bytes -= nbytes
+                released.append(img)
+        self._release(released)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            released = [img for img, _ in self._entries.values()]
+            self._entries.clear()
+            self.current_bytes = 0
+        self._release(released)
+
+    def set_pin_filter(self, pin_filter: Optional[PinFilter]) -> None:
+        """设置钉住规则：返回 True 的 key 永不淘汰（包括之后才放入的条目）"""
+        with self._lock:
+            self._pin_filter = pin_filter
+            released = self._evict_locked()
+        self._release(released)
+
+    def set_budget(self, budget_bytes: int) -> None:
+        with self._lock:
+            self.budget_bytes = int(budget_bytes)
+            released = self._evict_locked()
+        self._release(released)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pinned = sum(1 for key in self._entries if self._is_pinned(key))
+            return {
+                "entries": len(self._entries),
+                "pinned": pinned,
+                "bytes": self.current_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _is_pinned(self, key: Hashable) -> bool:
+        return bool(self._pin_filter and self._pin_filter(key))
+
+    def _evict_locked(self, keep: Optional[Hashable] = None) -> List[Image.Image]:
+        """按 LRU 淘汰直到不超预算，返回被淘汰的图片（由调用方在锁外释放）"""
+        evicted: List[Image.Image] = []
+        if self.budget_bytes <= 0 or self.current_bytes <= self.budget_bytes:
+            return evicted
+        for key in list(self._entries.keys()):
+            if self.current_bytes <= self.budget_bytes:
+                break
+            if key == keep or self._is_pinned(key):
+                continue
+            img, nbytes = self._entries.pop(key)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+            evicted.append(img)
+        return evicted
+
+    def _release(self, images: List[Image.Image]) -> None:
+        if self._on_release is None:
+            return
+        for img in images:
+            self._on_release(img)
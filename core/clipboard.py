@@ -1,21 +1,32 @@
+import threading
 import time
-from io import BytesIO
+from abc import ABC, abstractmethod
+from typing import Any, Optional
 
 import pyperclip
-import win32clipboard
 from PIL import Image
 
+try:
+    from .dib import encode_dib
+    from .tracing import span, traced
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from dib import encode_dib  # type: ignore[no-redef]
+    from tracing import span, traced  # type: ignore[no-redef]
 
-def get_text() -> str:
-    """Read text content from the clipboard."""
+try:
+    import win32clipboard
+except ImportError:  # pragma: no cover - non-Windows platforms
+    win32clipboard = None  # type: ignore[assignment]
+
+
+def _paste_text() -> str:
     try:
         return pyperclip.paste() or ""
     except Exception:
         return ""
 
 
-def set_text(text: str) -> bool:
-    """Write text into the clipboard."""
+def _copy_text(text: str) -> bool:
     try:
         pyperclip.copy(text or "")
         return True
@@ -23,25 +34,182 @@ def set_text(text: str) -> bool:
         return False
 
 
-def set_image(image: Image.Image, retries: int = 3, interval: float = 0.05) -> bool:
-    """Write a PIL image into the Windows clipboard with retry to avoid contention."""
-    for attempt in range(retries):
+class ClipboardBackend(ABC):
+    """
+    发送流水线使用的剪贴板访问接口。
+
+    每次写入剪贴板都会让 ``sequence_number()`` 变化；调用方在触发复制 / 剪切前记下序号，
+    然后用 ``wait_for_change`` 等待变化，而不是固定 sleep 一段时间。
+    缺少任一抽象方法的后端在构造时就会报错，不会拖到粘贴中途才失败。
+    """
+
+    poll_interval: float = 0.002
+
+    @abstractmethod
+    def get_text(self) -> str:
+        """读取剪贴板文本，读取失败时返回空字符串"""
+
+    @abstractmethod
+    def set_text(self, text: str) -> bool:
+        """用 text 替换剪贴板内容"""
+
+    def encode_image(self, image: Image.Image) -> Any:
+        """把图片转换为本后端的剪贴板数据（结果可缓存复用）"""
+        return image.copy()
+
+    @abstractmethod
+    def set_payload(self, payload: Any, retries: int = 3, interval: float = 0.05) -> bool:
+        """写入 encode_image 生成的数据"""
+
+    def set_image(self, image: Image.Image, retries: int = 3, interval: float = 0.05) -> bool:
         try:
-            buffer = BytesIO()
-            image.convert("RGB").save(buffer, "BMP")
-            data = buffer.getvalue()[14:]  # remove BMP header, keep DIB data
-            buffer.close()
-
-            win32clipboard.OpenClipboard()
-            win32clipboard.EmptyClipboard()
-            win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
-            win32clipboard.CloseClipboard()
-            return True
+            with span("clipboard.encode"):
+                payload = self.encode_image(image)
         except Exception:
+            return False
+        with span("clipboard.set_payload"):
+            return self.set_payload(payload, retries, interval)
+
+    @abstractmethod
+    def sequence_number(self) -> int:
+        """每次写入剪贴板都会变化的序号"""
+
+    def wait_for_change(self, since: int, timeout: float) -> bool:
+        """阻塞直到序号不再等于 since；超时返回 False"""
+        deadline = time.perf_counter() + timeout
+        while self.sequence_number() == since:
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+
+class Win32ClipboardBackend(ClipboardBackend):
+    """Windows 剪贴板；通过 GetClipboardSequenceNumber 检测变化"""
+
+    def get_text(self) -> str:
+        return _paste_text()
+
+    def set_text(self, text: str) -> bool:
+        return _copy_text(text)
+
+    def encode_image(self, image: Image.Image) -> Any:
+        return encode_dib(image)
+
+    def set_payload(self, payload: Any, retries: int = 3, interval: float = 0.05) -> bool:
+        """把 CF_DIB 数据写入 Windows 剪贴板，失败时重试以避开占用冲突"""
+        for attempt in range(retries):
             try:
+                win32clipboard.OpenClipboard()
+                win32clipboard.EmptyClipboard()
+                win32clipboard.SetClipboardData(win32clipboard.CF_DIB, payload)
                 win32clipboard.CloseClipboard()
+                return True
             except Exception:
-                pass
-            if attempt < retries - 1:
-                time.sleep(interval)
-    return False
+                try:
+                    win32clipboard.CloseClipboard()
+                except Exception:
+                    pass
+                if attempt < retries - 1:
+                    time.sleep(interval)
+        return False
+
+    def sequence_number(self) -> int:
+        return int(win32clipboard.GetClipboardSequenceNumber())
+
+
+class PyperclipBackend(ClipboardBackend):
+    """没有 win32clipboard 的平台上的纯文本后备实现（无法写入图片）"""
+
+    def __init__(self):
+        self._seq = 0
+        self._last: Optional[str] = None
+
+    def get_text(self) -> str:
+        return _paste_text()
+
+    def set_text(self, text: str) -> bool:
+        return _copy_text(text)
+
+    def set_payload(self, payload: Any, retries: int = 3, interval: float = 0.05) -> bool:
+        return False
+
+    def sequence_number(self) -> int:
+        # 没有系统提供的序号：改为统计观察到的文本变化次数
+        text = self.get_text()
+        if text != self._last:
+            self._last = text
+            self._seq += 1
+        return self._seq
+
+
+class MemoryClipboardBackend(ClipboardBackend):
+    """进程内的确定性剪贴板，供测试与基准使用"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self.text = ""
+        self.image: Optional[Image.Image] = None
+
+    def get_text(self) -> str:
+        with self._cond:
+            return self.text
+
+    def set_text(self, text: str) -> bool:
+        with self._cond:
+            self.text = text or ""
+            self.image = None
+            self._bump()
+        return True
+
+    def set_payload(self, payload: Any, retries: int = 3, interval: float = 0.05) -> bool:
+        with self._cond:
+            self.text = ""
+            self.image = payload
+            self._bump()
+        return True
+
+    def sequence_number(self) -> int:
+        with self._cond:
+            return self._seq
+
+    def wait_for_change(self, since: int, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq != since, timeout)
+
+    def _bump(self) -> None:
+        self._seq += 1
+        self._cond.notify_all()
+
+
+_backend: Optional[ClipboardBackend] = None
+
+
+def get_backend() -> ClipboardBackend:
+    global _backend
+    if _backend is None:
+        _backend = Win32ClipboardBackend() if win32clipboard is not None else PyperclipBackend()
+    return _backend
+
+
+def set_backend(backend: Optional[ClipboardBackend]) -> None:
+    """Replace the process-wide backend (None restores the platform default)."""
+    global _backend
+    _backend = backend
+
+
+def get_text() -> str:
+    """Read text content from the clipboard."""
+    return get_backend().get_text()
+
+
+def set_text(text: str) -> bool:
+    """Write text into the clipboard."""
+    return get_backend().set_text(text)
+
+
+@traced("clipboard.set_image")
+def set_image(image: Image.Image, retries: int = 3, interval: float = 0.05) -> bool:
+    """Write a PIL image into the clipboard with retry to avoid contention."""
+    return get_backend().set_image(image, retries, interval)
@@ -1,20 +1,33 @@
+import os
 import time
+from typing import List, Optional, Tuple, Union
 
 import keyboard
+from PIL import Image
 
-from .clipboard import get_text, set_image, set_text
+from .glyph_atlas import save_frequency_list, warmup_limit
 from .listener import InputListener
+from .pagination import PagedRender
 from .prebuild import ensure_character_cache
-from .renderer import CharacterRenderer
+from .render_cache import RenderResultCache
+from .render_sidecar import RenderSidecar, SidecarError
+from .render_spec import RenderSpec
+from .renderer import TextOp
+from .renderer_registry import get_renderer
+from .submit_pipeline import SubmitPipeline
+from .tracing import configure_tracing, report_tracing, span
+from .utils import load_global_config
 
 
 class GalGameEngine:
     def __init__(self, char_id: str = "yuraa"):
         self.char_id = char_id
-        
+        if configure_tracing():
+            print("🧭 已开启阶段耗时追踪，退出时输出统计并导出 Chrome trace")
+
         try:
             ensure_character_cache(char_id)
-            self.renderer = CharacterRenderer(char_id)
+            self.renderer = get_renderer(char_id)
         except Exception as e:
             print(f"❌ 引擎启动失败: 渲染器初始化错误 - {e}")
             raise
@@ -23,12 +36,68 @@ class GalGameEngine:
         portrait_keys = sorted(list(self.renderer.assets["portraits"].keys()))
         if portrait_keys:
             self.current_expression = portrait_keys[0]
+            self.renderer.pin_expression(self.current_expression)
             print(f"ℹ️ 默认加载立绘: {self.current_expression}")
         else:
             self.current_expression = "default"
             print("⚠️ 警告: 未找到任何立绘，使用默认占位符")
 
         self.listener = InputListener()
+        self.paginate = bool(load_global_config().get("render", {}).get("paginate", False))
+        # (文本, 排版规格, 分页排版结果)：一次发送里查缓存键、判断页数和分页渲染共用同一次排版
+        self._page_check: Optional[Tuple[str, RenderSpec, List[List[TextOp]]]] = None
+        self.result_cache = self._create_result_cache()
+        self.sidecar = self._start_sidecar()
+        if self.sidecar is None:
+            self._warm_glyph_atlas()
+        self.pipeline = SubmitPipeline(
+            render=self._render_text,
+            send_keys=keyboard.send,
+            page_interval=self._page_interval(),
+            result_cache=self.result_cache,
+            cache_key=self._result_key,
+        )
+
+    @staticmethod
+    def _page_interval() -> float:
+        """render.page_interval_ms：分页发送时两页之间的等待（秒），默认不等待"""
+        try:
+            return max(0.0, float(load_global_config().get("render", {}).get("page_interval_ms", 0)) / 1000)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _create_result_cache(self) -> RenderResultCache:
+        render_cfg = load_global_config().get("render", {})
+        try:
+            memory_mb = int(render_cfg.get("result_cache_mb", 64))
+            spill_mb = int(render_cfg.get("result_cache_spill_mb", 0))
+        except (TypeError, ValueError):
+            memory_mb, spill_mb = 64, 0
+        spill_dir = os.path.join("assets", "cache", self.char_id, "renders")
+        return RenderResultCache(
+            memory_mb * 1024 * 1024,
+            spill_dir=spill_dir,
+            spill_budget_bytes=spill_mb * 1024 * 1024,
+        )
+
+    def _start_sidecar(self) -> Optional[RenderSidecar]:
+        """render.sidecar 开启时在常驻子进程里渲染，钩子线程不再与 Pillow 争抢 GIL"""
+        if not load_global_config().get("render", {}).get("sidecar", False):
+            return None
+        try:
+            sidecar = RenderSidecar(self.char_id, self.renderer.canvas_size)
+        except Exception as e:
+            print(f"⚠️ 渲染子进程启动失败，改为在主进程渲染: {e}")
+            return None
+        print("🧩 渲染子进程已启动")
+        return sidecar
+
+    def _warm_glyph_atlas(self) -> None:
+        """按上次运行记录的字符频率预先光栅化常用字形（渲染子进程会自己预热）"""
+        started = time.perf_counter()
+        added = self.renderer.warm_glyph_atlas(warmup_limit())
+        if added:
+            print(f"🔤 已预热 {added} 个常用字形（{(time.perf_counter() - started) * 1000:.0f} ms）")
 
     def start(self):
         self.run()
@@ -39,6 +108,22 @@ class GalGameEngine:
             submit_callback=self._on_submit,
             switch_callback=self._on_switch_expression,
         )
+        stats = self.result_cache.stats()
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        if lookups:
+            print(
+                f"📊 结果缓存命中率 {stats['hit_rate']:.0%}（内存 {stats['hits']}，磁盘 {stats['disk_hits']}，"
+                f"未命中 {stats['misses']}），占用 {stats['bytes'] / 1024 / 1024:.1f} MB"
+            )
+        report_tracing()
+        if self.sidecar is not None:
+            self.sidecar.close()
+            self.sidecar = None
+        # 子进程退出前已合并过它的记录，这里再合并主进程里的
+        try:
+            save_frequency_list()
+        except OSError as e:
+            print(f"⚠️ 保存字符频率表失败: {e}")
 
     def _on_switch_expression(self, key: str):
         """回调：切换表情 (按数字索引)"""
@@ -53,49 +138,79 @@ class GalGameEngine:
         if 0 <= index < len(portrait_keys):
             target_key = portrait_keys[index]
             self.current_expression = target_key
+            self.renderer.pin_expression(target_key)
             print(f"😉 已切换到第 [{key}] 号立绘: {target_key}")
         else:
             print(f"🤔 序号 {key} 超出范围 (当前只有 {len(portrait_keys)} 张立绘)")
 
-    def _on_submit(self):
-        # 1. 模拟 Ctrl+A 全选, Ctrl+X 剪切
-        keyboard.send("ctrl+a")
-        time.sleep(0.05)
-        keyboard.send("ctrl+x")
-        time.sleep(0.1)
-
-        # 2. 获取剪贴板文本
-        text = get_text().strip()
-
-        if not text:
-            print("🔕 剪贴板为空或非文本，尝试还原...")
-            keyboard.send("ctrl+v")
-            return
+    def _refresh_renderer(self) -> None:
+        """从注册表取渲染器：配置或素材有变化时只做最小重载；换了实例则重新钉住当前表情"""
+        renderer = get_renderer(self.char_id)
+        if renderer is not self.renderer:
+            self.renderer = renderer
+            self.renderer.pin_expression(self.current_expression)
 
-        print(f"📝 捕获文本: {text}")
-
-        # 3. 渲染图片
+    def _on_submit(self):
         try:
-            image = self.renderer.render(text, self.current_expression)
+            self._refresh_renderer()
+        except Exception as e:
+            print(f"⚠️ 重新加载角色配置失败，继续使用当前配置: {e}")
+        with span("submit"):
+            try:
+                result = self.pipeline.run()
+            finally:
+                self._page_check = None
+        if result.cut_timed_out:
+            print("⚠️ 等待剪切结果超时，使用了剪贴板中已有的内容")
+        print(f"⏱️ {result.summary()}")
+
+    def _result_key(self, text: str) -> Optional[str]:
+        # 多页结果逐页发送，不进结果缓存；单页时两种模式的输出相同，照常缓存
+        if self._is_multi_page(text):
+            return None
+        return self.renderer.result_key(text, self.current_expression)
+
+    def _page_layout(self, text: str) -> Optional[List[List[TextOp]]]:
+        """开启分页时这段文字的分页排版；同一次发送内只排版一次，重载配置后重新计算"""
+        if not self.paginate:
+            return None
+        spec = self.renderer.spec
+        check = self._page_check
+        if check is None or check[0] != text or check[1] is not spec:
+            check = self._page_check = (text, spec, self.renderer.layout_pages(text))
+        return check[2]
+
+    def _is_multi_page(self, text: str) -> bool:
+        """开启分页且这段文字超过一页"""
+        pages = self._page_layout(text)
+        return pages is not None and len(pages) > 1
+
+    def _render_once(self, text: str) -> Union[Image.Image, PagedRender]:
+        """优先交给渲染子进程；子进程不可用时关闭它，之后都在主进程渲染。需要分页时总在主进程并行绘制各页"""
+        pages = self._page_layout(text)
+        if pages is not None and len(pages) > 1:
+            return self.renderer.render_pages(text, self.current_expression, pages=pages)
+        if self.sidecar is not None:
+            try:
+                return self.sidecar.render(text, self.current_expression)
+            except SidecarError as e:
+                print(f"⚠️ 渲染子进程不可用，改为在主进程渲染: {e}")
+                self.sidecar.close()
+                self.sidecar = None
+        return self.renderer.render(text, self.current_expression)
+
+    def _render_text(self, text: str) -> Optional[Union[Image.Image, PagedRender]]:
+        """渲染当前表情；失败时尝试重建缓存，仍失败返回 None（由流水线粘贴原文）"""
+        try:
+            return self._render_once(text)
         except Exception as e:
             print(f"⚠️ 渲染失败，尝试自动生成缓存: {e}")
             try:
                 ensure_character_cache(self.char_id)
-                self.renderer = CharacterRenderer(self.char_id)
-                image = self.renderer.render(text, self.current_expression)
+                self._refresh_renderer()
+                image = self._render_once(text)
                 print("✅ 缓存已重建，继续发送")
+                return image
             except Exception as inner:
                 print(f"❌ 渲染失败: {inner}")
-                if set_text(text):
-                    keyboard.send("ctrl+v")
-                return
-
-        # 4. 将图片写入剪贴板并粘贴
-        if set_image(image):
-            time.sleep(0.1)
-            keyboard.send("ctrl+v")
-            print("✅ 已执行粘贴发送指令")
-        else:
-            print("❌ 图片写入剪贴板失败")
-            if set_text(text):
-                keyboard.send("ctrl+v")
+                return None
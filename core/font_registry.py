@@ -0,0 +1,183 @@
+# core/font_registry.py
+"""
+进程级字体注册表
+
+同一 (字体文件, 字号) 的 FreeTypeFont 在整个进程内只创建一次，被所有渲染器实例共享；
+GUI 每次预览都会新建渲染器，新建渲染器或切回用过的字号因此只是一次字典查找。
+
+字体文件本身交给 FreeType 按路径读取（只读打开，内容由操作系统页缓存共享），
+没有在 Python 里 mmap：Pillow 的 core.getfont 只接受 bytes（mmap / memoryview 会被拒绝），
+而且会把传入的字节为每个字号各拷贝一份，对 20 MB 的中文字体反而更慢更占内存。
+只有 FreeType 打不开路径时（Windows 上的非 ASCII 路径，Pillow 自己会每个字号重读一遍整个文件），
+才退回到读入一次、在各字号间共享的 bytes。
+文件按 (真实路径, mtime, 大小) 识别，字体被替换后会重新加载。
+
+共享的字体对象会被多个线程同时使用（分页线程池、渲染服务、预生成线程池），
+而每个 FreeTypeFont 背后的 FT_Face 不能被多个线程同时用来测量或光栅化：
+所有调用 FreeType 的地方（字形图集光栅化、draw.text 回退、步进宽度测量、字体度量）
+都先取得 font_lock(font)。图集命中时只贴缓存的遮罩，不需要这把锁。
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import ImageFont
+
+FileKey = Tuple[str, int, int]
+FaceKey = Tuple[FileKey, float, int, Any]
+
+
+class _SharedFontBytes:
+    """交给 FreeTypeFont 的只读“文件”：read() 返回共享的字节，不再重读磁盘"""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class FontRegistry:
+    """
+    max_faces: 缓存的 (文件, 字号) 字体对象数量上限。
+    max_file_bytes: 退回读入字节时，缓存的字体文件字节总量上限；<= 0 表示不限。
+    被淘汰的条目只是不再被注册表引用，仍在使用它们的渲染器不受影响。
+    """
+
+    def __init__(self, max_faces: int = 64, max_file_bytes: int = 256 * 1024 * 1024):
+        self.max_faces = max_faces
+        self.max_file_bytes = max_file_bytes
+        self._files: "OrderedDict[FileKey, bytes]" = OrderedDict()
+        self._faces: "OrderedDict[FaceKey, ImageFont.FreeTypeFont]" = OrderedDict()
+        self._paths: Dict[str, FileKey] = {}
+        self._lock = threading.Lock()
+        self.file_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.file_loads = 0
+        self.evictions = 0
+
+    def get_font(
+        self,
+        path: str,
+        size: float,
+        index: int = 0,
+        layout_engine: Optional[Any] = None,
+    ) -> ImageFont.FreeTypeFont:
+        """等价于 ImageFont.truetype(path, size)，失败时同样抛出 OSError"""
+        file_key = self._file_key(path)
+        face_key: FaceKey = (file_key, size, index, layout_engine)
+        with self._lock:
+            font = self._faces.get(face_key)
+            if font is not None:
+                self._faces.move_to_end(face_key)
+                self.hits += 1
+                return font
+            self.misses += 1
+
+        try:
+            font = ImageFont.FreeTypeFont(file_key[0], size, index, layout_engine=layout_engine)
+        except OSError:
+            data = self._get_file_bytes(file_key)
+            font = ImageFont.FreeTypeFont(
+                _SharedFontBytes(data), size, index, layout_engine=layout_engine  # type: ignore[arg-type]
+            )
+            # 记录真实路径：步进表按路径在实例间共享，font_variant() 也依赖它
+            font.path = file_key[0]
+
+        with self._lock:
+            self._faces[face_key] = font
+            while len(self._faces) > self.max_faces > 0:
+                self._faces.popitem(last=False)
+                self.evictions += 1
+        return font
+
+    def clear(self) -> None:
+        with self._lock:
+            self._faces.clear()
+            self._files.clear()
+            self._paths.clear()
+            self.file_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "faces": len(self._faces),
+                "files": len(self._files),
+                "file_bytes": self.file_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "file_loads": self.file_loads,
+                "evictions": self.evictions,
+            }
+
+    def _file_key(self, path: str) -> FileKey:
+        """一次 stat 校验文件是否变化；realpath 只在首次见到该路径或文件变化时计算"""
+        stat = os.stat(path)
+        known = self._paths.get(path)
+        if known is not None and known[1:] == (stat.st_mtime_ns, stat.st_size):
+            return known
+        file_key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+        self._paths[path] = file_key
+        return file_key
+
+    def _get_file_bytes(self, file_key: FileKey) -> bytes:
+        with self._lock:
+            data = self._files.get(file_key)
+            if data is not None:
+                self._files.move_to_end(file_key)
+                return data
+
+        with open(file_key[0], "rb") as f:
+            data = f.read()
+
+        with self._lock:
+            existing = self._files.get(file_key)
+            if existing is not None:
+                return existing
+            self._files[file_key] = data
+            self.file_bytes += len(data)
+            self.file_loads += 1
+            while (
+                self.max_file_bytes > 0
+                and self.file_bytes > self.max_file_bytes
+                and len(self._files) > 1
+            ):
+                _, old = self._files.popitem(last=False)
+                self.file_bytes -= len(old)
+        return data
+
+
+_registry = FontRegistry()
+# 每个字体对象（即每个 FT_Face）一把锁；字体对象被回收时锁随之释放
+_font_locks: "weakref.WeakKeyDictionary[Any, threading.RLock]" = weakref.WeakKeyDictionary()
+_font_locks_guard = threading.Lock()
+
+
+def get_font_registry() -> FontRegistry:
+    return _registry
+
+
+def load_font(path: str, size: float, index: int = 0) -> ImageFont.FreeTypeFont:
+    """从进程级注册表取字体（首次使用时加载）"""
+    return _registry.get_font(path, size, index)
+
+
+def font_lock(font: Any) -> threading.RLock:
+    """串行化同一字体对象上的 FreeType 调用（测量、光栅化、draw.text）"""
+    with _font_locks_guard:
+        lock = _font_locks.get(font)
+        if lock is None:
+            lock = threading.RLock()
+            _font_locks[font] = lock
+        return lock
+
+
+def clear_font_registry() -> None:
+    _registry.clear()
+
+
+def font_registry_stats() -> Dict[str, int]:
+    return _registry.stats()
@@ -0,0 +1,286 @@
+# core/glyph_atlas.py
+"""
+字形图集：缓存每个 (字体, 字号, 字符) 的覆盖率遮罩
+
+draw.text 每次都把整行文字交给 FreeType 重新光栅化，而对话里反复出现的常用字就那么几百个。
+这里把每个字形的遮罩（L 模式覆盖率）和偏移缓存下来，绘制一行时按步进表算出每个字形的位置直接贴图，
+只有没见过的字形才调用 FreeType。遮罩与颜色无关，同一字体字号的名字和正文共用一份。
+
+结果与 draw.text 逐像素一致：
+    - 字形位置与 Pillow basic 布局相同：26.6 定点的步进宽度 + 字偶距累加，起点小数部分按 Pillow 的方式取整；
+    - 字形包围盒互不重叠时逐个贴图；有重叠时先按 Pillow 渲染整行的方式（后一个字形叠在前一个之上）
+      用 paste 合成整行遮罩再贴一次。
+raqm 布局（连字、字形替换）、非 FreeType 字体、多行文本、负的非整数坐标等情况直接回退到 draw.text。
+
+图集按字节预算 LRU 淘汰；同时统计每个字符的使用次数，退出时写入频率表，
+下次启动按频率表预先光栅化最常用的字形。
+"""
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    from .font_registry import font_lock
+    from .text_layout import font_key, get_advance_cache
+    from .utils import load_global_config
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from font_registry import font_lock  # type: ignore[no-redef]
+    from text_layout import font_key, get_advance_cache  # type: ignore[no-redef]
+
+    def load_global_config() -> Dict[str, Any]:  # type: ignore[misc]
+        return {}
+
+FontType = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+# (遮罩, 相对笔位置的偏移)；空白字符的遮罩为 None
+Glyph = Tuple[Optional[Image.Image], Tuple[int, int]]
+
+DEFAULT_BUDGET_BYTES = 32 * 1024 * 1024
+DEFAULT_FREQUENCY_FILE = os.path.join("assets", "cache", "glyph_frequency.txt")
+DEFAULT_WARMUP = 512
+# 频率表最多保留的字符数
+MAX_FREQUENCY_ENTRIES = 8192
+
+
+class GlyphAtlas:
+    """budget_bytes <= 0 时不缓存，draw_text 直接使用 draw.text"""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = int(budget_bytes)
+        self._glyphs: "OrderedDict[Tuple[Hashable, str], Tuple[Glyph, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.char_counts: Counter = Counter()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def set_budget(self, budget_bytes: int) -> None:
+        with self._lock:
+            self.budget_bytes = int(budget_bytes)
+            if self.budget_bytes <= 0:
+                self._glyphs.clear()
+                self.current_bytes = 0
+            else:
+                self._evict_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._glyphs.clear()
+            self.current_bytes = 0
+
+    def char_usage(self) -> Counter:
+        """本次运行中各字符被绘制的次数"""
+        with self._lock:
+            return Counter(self.char_counts)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "glyphs": len(self._glyphs),
+                "bytes": self.current_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "fallbacks": self.fallbacks,
+            }
+
+    # -----------------------
+    # 字形
+    # -----------------------
+    def glyph(self, font: ImageFont.FreeTypeFont, key: Hashable, ch: str) -> Glyph:
+        with self._lock:
+            entry = self._glyphs.get((key, ch))
+            if entry is not None:
+                self._glyphs.move_to_end((key, ch))
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        with font_lock(font):
+            mask, offset = font.getmask2(ch, "L")
+        width, height = mask.size
+        pixels = Image.frombuffer("L", (width, height), bytes(mask), "raw", "L", 0, 1) if width and height else None
+        glyph: Glyph = (pixels, offset)
+        nbytes = width * height + 64
+        with self._lock:
+            old = self._glyphs.pop((key, ch), None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._glyphs[(key, ch)] = (glyph, nbytes)
+            self.current_bytes += nbytes
+            self._evict_locked()
+        return glyph
+
+    def warm_up(self, font: FontType, chars: Iterable[str]) -> int:
+        """预先光栅化 chars 中的字形，返回新加入图集的数量"""
+        key = self._atlas_key(font)
+        if key is None or not self.enabled:
+            return 0
+        added = 0
+        for ch in chars:
+            with self._lock:
+                cached = (key, ch) in self._glyphs
+            if not cached:
+                self.glyph(font, key, ch)  # type: ignore[arg-type]
+                added += 1
+        return added
+
+    def _atlas_key(self, font: FontType) -> Optional[Hashable]:
+        """可以逐字形绘制的字体返回图集键，否则返回 None"""
+        if not isinstance(font, ImageFont.FreeTypeFont) or font.layout_engine != ImageFont.Layout.BASIC:
+            return None
+        return font_key(font)
+
+    def _evict_locked(self) -> None:
+        while self.current_bytes > self.budget_bytes > 0 and len(self._glyphs) > 1:
+            _, (_, nbytes) = self._glyphs.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    # -----------------------
+    # 绘制
+    # -----------------------
+    def draw_text(
+        self,
+        draw: ImageDraw.ImageDraw,
+        xy: Tuple[float, float],
+        text: str,
+        font: FontType,
+        fill: Tuple[int, ...],
+    ) -> None:
+        """等价于 draw.text(xy, text, font=font, fill=fill)"""
+        key = self._atlas_key(font) if self.enabled and text and draw.fontmode == "L" and "\n" not in text else None
+        # 负的非整数坐标下 Pillow 会按亚像素偏移重新光栅化，缓存的遮罩对不上
+        if key is None or any(v < 0 and v != int(v) for v in xy):
+            if text:
+                with self._lock:
+                    self.fallbacks += 1
+            with font_lock(font):
+                draw.text(xy, text, font=font, fill=fill)
+            return
+
+        # 与 ImageDraw.text 相同：整数部分作为原点，小数部分以 26.6 定点传给 FreeType
+        origin_x, origin_y = int(xy[0]), int(xy[1])
+        start_x = int((xy[0] - origin_x) * 64)
+        start_y = int((xy[1] - origin_y) * 64)
+        shift_y = -((32 - start_y) >> 6)
+
+        advances = get_advance_cache(font)
+        placed: List[Tuple[Image.Image, int, int]] = []
+        pen = 0
+        prev = ""
+        overlap = False
+        right_edge: Optional[int] = None
+        for ch in text:
+            if prev:
+                pen += round(advances.kern(prev, ch) * 64)
+            mask, (dx, dy) = self.glyph(font, key, ch)  # type: ignore[arg-type]
+            if mask is not None:
+                x = ((pen + start_x + 32) >> 6) + dx
+                if right_edge is not None and x < right_edge:
+                    overlap = True
+                right_edge = x + mask.width if right_edge is None else max(right_edge, x + mask.width)
+                placed.append((mask, x, dy + shift_y))
+            pen += round(advances.advance(ch) * 64)
+            prev = ch
+        # 图集由分页线程池、渲染服务等多个线程共用，计数与统计一样在锁内更新
+        with self._lock:
+            self.char_counts.update(text)
+        if not placed:
+            return
+
+        if not overlap:
+            for mask, x, y in placed:
+                draw.bitmap((origin_x + x, origin_y + y), mask, fill=fill)
+            return
+
+        # 相邻字形的包围盒重叠（斜体、紧排的字偶对）：先合成整行遮罩，避免重叠处被叠两次。
+        # 以遮罩向整行填充 255 即 src + dst * (255 - src) / 255，与 Pillow 整行光栅化的合成和取整方式相同
+        left = min(x for _, x, _ in placed)
+        top = min(y for _, _, y in placed)
+        right = max(x + mask.width for mask, x, _ in placed)
+        bottom = max(y + mask.height for mask, _, y in placed)
+        line = Image.new("L", (right - left, bottom - top), 0)
+        for mask, x, y in placed:
+            line.paste(255, (x - left, y - top, x - left + mask.width, y - top + mask.height), mask)
+        draw.bitmap((origin_x + left, origin_y + top), line, fill=fill)
+
+
+_atlas = GlyphAtlas()
+
+
+def get_glyph_atlas() -> GlyphAtlas:
+    return _atlas
+
+
+def draw_text(
+    draw: ImageDraw.ImageDraw,
+    xy: Tuple[float, float],
+    text: str,
+    font: FontType,
+    fill: Tuple[int, ...],
+) -> None:
+    """通过进程级图集绘制一行文字，像素与 draw.text 一致"""
+    _atlas.draw_text(draw, xy, text, font, fill)
+
+
+# -----------------------
+# 频率表
+# -----------------------
+def load_frequency_list(path: str = DEFAULT_FREQUENCY_FILE) -> List[Tuple[str, int]]:
+    """读取频率表（每行 "字符<TAB>次数"，按次数降序）；文件不存在时为空"""
+    entries: List[Tuple[str, int]] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                ch, _, count = line.rstrip("\n").partition("\t")
+                if len(ch) == 1 and count.isdigit():
+                    entries.append((ch, int(count)))
+    except OSError:
+        return []
+    return entries
+
+
+def save_frequency_list(path: str = DEFAULT_FREQUENCY_FILE) -> int:
+    """把本次运行的字符使用次数合并进频率表，返回写入的字符数；没有新记录时不写文件"""
+    session = _atlas.char_usage()
+    if not session:
+        return 0
+    merged = Counter(dict(load_frequency_list(path)))
+    merged.update(session)
+    ordered = [(ch, n) for ch, n in merged.most_common(MAX_FREQUENCY_ENTRIES) if ch.isprintable()]
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(f"{ch}\t{n}\n" for ch, n in ordered)
+    os.replace(tmp_path, path)
+    return len(ordered)
+
+
+def warmup_limit() -> int:
+    """render.glyph_warmup：启动时预热的常用字符数"""
+    try:
+        return int(load_global_config().get("render", {}).get("glyph_warmup", DEFAULT_WARMUP))
+    except (TypeError, ValueError):
+        return DEFAULT_WARMUP
+
+
+def warm_up(fonts: Iterable[FontType], limit: int, path: str = DEFAULT_FREQUENCY_FILE) -> int:
+    """按频率表为每个字体预先光栅化最常用的 limit 个字形，返回新加入图集的数量"""
+    if limit <= 0:
+        return 0
+    chars = [ch for ch, _ in load_frequency_list(path)[:limit]]
+    if not chars:
+        return 0
+    return sum(_atlas.warm_up(font, chars) for font in fonts)
@@ -1,9 +1,9 @@
 # core/listener.py
 
 import keyboard
-import threading
 from typing import Any, Callable, Optional
 
+from .submit_worker import SubmitWorker
 from .utils import load_global_config
 
 
@@ -23,12 +23,15 @@ class InputListener:
         
         self.on_submit: Optional[Callable[[], None]] = None
         self.on_switch_expression: Optional[Callable[[str], None]] = None
+        # 唯一的发送工作线程：钩子线程只入队，连按合并为一次发送
+        self._submit_worker = SubmitWorker(self._run_submit)
 
     def start(self, submit_callback: Callable[[], Any], switch_callback: Callable[[str], None]):
         """启动监听"""
         self.on_submit = submit_callback
         self.on_switch_expression = switch_callback
         self.running = True
+        self._submit_worker.start()
 
         print("🎧 键盘监听已启动..")
         print(f"   触发快捷键: {self.trigger_hotkey}")
@@ -48,6 +51,7 @@ class InputListener:
         self._register_trigger_hotkey()
 
         keyboard.wait("esc")
+        self.stop()
 
     def _register_trigger_hotkey(self):
         """注册触发快捷键"""
@@ -111,7 +115,8 @@ class InputListener:
             return
 
         if self.on_submit:
-            threading.Thread(target=self._run_submit_async).start()
+            # 只入队，不在钩子线程里等待渲染
+            self._submit_worker.submit()
 
     def _passthrough_key(self):
         """透传单键"""
@@ -121,8 +126,8 @@ class InputListener:
         finally:
             self._register_trigger_hotkey()
 
-    def _run_submit_async(self):
-        """在子线程中执行发送逻辑"""
+    def _run_submit(self):
+        """在发送工作线程中执行发送逻辑（异常由 SubmitWorker 记录）"""
         # 如果是单键，先取消监听避免冲突
         if self._is_single_key:
             self._unregister_trigger_hotkey()
@@ -130,8 +135,6 @@ class InputListener:
         try:
             if callable(self.on_submit):
                 self.on_submit()
-        except Exception as e:
-            print(f"❌ 发送回调出错: {e}")
         finally:
             # 恢复监听
             if self._is_single_key:
@@ -140,7 +143,19 @@ class InputListener:
                 except Exception:
                     pass
 
+    def submit_stats(self) -> dict:
+        """发送队列的触发 / 合并 / 丢弃次数与等待耗时"""
+        return self._submit_worker.stats()
+
     def stop(self):
         self.running = False
         keyboard.unhook_all()
+        self._submit_worker.stop()
+        stats = self._submit_worker.stats()
+        if stats["triggers"]:
+            print(
+                f"📊 发送 {stats['runs']} 次（触发 {stats['triggers']}，合并 {stats['coalesced']}，"
+                f"丢弃 {stats['dropped']}），排队等待 p50 {stats['wait_ms_p50']:.1f} ms / "
+                f"p95 {stats['wait_ms_p95']:.1f} ms，最大队列深度 {stats['max_queue_depth']}"
+            )
         print("🛑 监听已停止")
@@ -0,0 +1,72 @@
+# core/pagination.py
+"""
+分页渲染（render.paginate: true）
+
+text_area 放不下的台词原先会被直接截断。分页时整段文字只排版一次，按 text_area 能容纳的行数切成若干页，
+每页都画在同一张底图的副本上（名字每页都画）。各页在线程池里并行绘制（Pillow 的复制与贴图会释放 GIL），
+调用方按页序迭代：第一页画完即可取出写入剪贴板，后面的页同时在继续绘制。
+各页共用同一组字体对象，FreeType 的测量与光栅化按字体串行（font_registry.font_lock），只有贴图并行。
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+from PIL import Image
+
+Page = TypeVar("Page")
+
+
+def resolve_page_workers(workers: int, pages: int) -> int:
+    """workers <= 0 表示使用全部 CPU 核心；不超过页数"""
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, pages))
+
+
+class PagedRender(Generic[Page]):
+    """
+    分页渲染结果：len() 为页数，按页序迭代得到每页图片。
+    只用一个线程时在迭代到某页时才绘制它；多线程时构造后立即提交全部页。
+    不再需要剩余页时调用 close()，尚未开始的页会被取消。
+    """
+
+    def __init__(self, render_page: Callable[[Page], Image.Image], pages: List[Page], workers: int = 1):
+        self._render_page = render_page
+        self._pages = pages
+        self._next = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+        workers = resolve_page_workers(workers, len(pages))
+        if workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render-page")
+            self._futures = [self._pool.submit(render_page, page) for page in pages]
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __iter__(self) -> "PagedRender[Page]":
+        return self
+
+    def __next__(self) -> Image.Image:
+        index = self._next
+        if index >= len(self._pages):
+            self.close()
+            raise StopIteration
+        self._next += 1
+        if self._futures:
+            return self._futures[index].result()
+        return self._render_page(self._pages[index])
+
+    def close(self) -> None:
+        self._next = len(self._pages)
+        if self._pool is not None:
+            for future in self._futures:
+                future.cancel()
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def __enter__(self) -> "PagedRender[Page]":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,51 +1,88 @@
 import hashlib
 import json
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import Callable, Dict, List, Tuple, Any, Optional
 
 import yaml
-from PIL import Image
+from PIL import Image, ImageDraw
 
 try:
-    from .utils import load_global_config, normalize_layout
+    from .utils import (
+        load_global_config,
+        normalize_layout,
+        CACHE_FORMAT_EXTENSIONS,
+        CACHE_LAYOUTS,
+        COMPOSITE_LAYOUT_KEYS,
+    )
+    from .raw_canvas import raw_layout, versioned_name, write_raw_canvas
+    from .renderer_registry import get_renderer
+    from .glyph_atlas import draw_text
 except Exception:  # pragma: no cover - fallback for standalone runs
+    from raw_canvas import raw_layout, versioned_name, write_raw_canvas  # type: ignore[no-redef]
+    from renderer_registry import get_renderer  # type: ignore[no-redef]
+    from glyph_atlas import draw_text  # type: ignore[no-redef]
+
     def load_global_config() -> Dict[str, object]:
         return {}
 
     def normalize_layout(layout, canvas_size):
         return layout or {}
 
+    CACHE_FORMAT_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "raw": ".rgba"}
+    CACHE_LAYOUTS = ("matrix", "layered")
+    COMPOSITE_LAYOUT_KEYS = ("_canvas_size", "stand_pos", "stand_scale", "stand_on_top", "box_pos")
+
 DEFAULT_CANVAS_SIZE: Tuple[int, int] = (2560, 1440)
 
-def _load_render_preferences() -> Tuple[str, str, int]:
+def _load_render_preferences() -> Tuple[str, str, str, int, int, bool]:
     cfg: dict = load_global_config() or {}
     render = cfg.get("render", {})
     cache_format = str(render.get("cache_format", "jpeg")).lower()
-    if cache_format not in {"jpeg", "png"}:
+    if cache_format not in CACHE_FORMAT_EXTENSIONS:
         cache_format = "jpeg"
-    cache_ext = ".jpg" if cache_format == "jpeg" else ".png"
+    cache_ext = CACHE_FORMAT_EXTENSIONS[cache_format]
+    cache_layout = str(render.get("cache_layout", "matrix")).lower()
+    if cache_layout not in CACHE_LAYOUTS:
+        cache_layout = "matrix"
     jpeg_quality = int(render.get("jpeg_quality", 90))
-    return cache_format, cache_ext, jpeg_quality
+    try:
+        workers = int(render.get("prebuild_workers", 0))
+    except (TypeError, ValueError):
+        workers = 0
+    bake_speaker_name = bool(render.get("bake_speaker_name", True))
+    return cache_format, cache_ext, cache_layout, jpeg_quality, workers, bake_speaker_name
 
+# 导入时不读取 global_config；prebuild_character / ensure_character_cache 在入口处刷新
 CANVAS_SIZE: Tuple[int, int] = DEFAULT_CANVAS_SIZE
 CACHE_FORMAT: str = "jpeg"
 CACHE_EXT: str = ".jpg"
+CACHE_LAYOUT: str = "matrix"
 JPEG_QUALITY: int = 90
+PREBUILD_WORKERS: int = 0
+BAKE_SPEAKER_NAME: bool = True
 SCALED_TAG: str = "@2560x1440"
 
 
 def _refresh_render_preferences() -> None:
-    global CACHE_FORMAT, CACHE_EXT, JPEG_QUALITY
-    CACHE_FORMAT, CACHE_EXT, JPEG_QUALITY = _load_render_preferences()
+    global CACHE_FORMAT, CACHE_EXT, CACHE_LAYOUT, JPEG_QUALITY, PREBUILD_WORKERS, BAKE_SPEAKER_NAME
+    (
+        CACHE_FORMAT,
+        CACHE_EXT,
+        CACHE_LAYOUT,
+        JPEG_QUALITY,
+        PREBUILD_WORKERS,
+        BAKE_SPEAKER_NAME,
+    ) = _load_render_preferences()
 
 
-_refresh_render_preferences()
-
 BASE_PATH = "assets"
 CACHE_PATH = os.path.join(BASE_PATH, "cache")
 SCALED_TAG = f"@{CANVAS_SIZE[0]}x{CANVAS_SIZE[1]}"
 
 ProgressCallback = Callable[[str, int, int, str], None]
+CancelCallback = Callable[[], bool]
 
 
 def _apply_canvas_size(canvas: Tuple[int, int]) -> None:
@@ -159,46 +196,190 @@ def _collect_background_entries(char_id: str, base_path: str) -> List[Tuple[str,
     return entries
 
 
-def _expected_cache_count(portraits: List[str], backgrounds: List[str]) -> int:
-    return len(portraits) * len(backgrounds)
+META_VERSION = 2
+
+
+LAYER_DIR = "layers"
+# 烘焙名字要求底图无损：JPEG 会在文字边缘引入压缩噪点，与实时绘制的结果不再一致
+LOSSLESS_FORMATS = ("png", "raw")
+
+
+class _BuildPlan:
+    """一次预处理要产出的全部缓存文件及其依赖"""
+
+    def __init__(
+        self,
+        portraits: List[str],
+        bg_entries: List[Tuple[str, str]],
+        box_path: str,
+        files: Dict[str, Dict[str, int]],
+        outputs: Dict[str, Dict[str, Any]],
+        name_bake: Optional[Tuple[str, str, List[Any]]] = None,
+    ):
+        self.portraits = portraits
+        self.bg_entries = bg_entries
+        self.box_path = box_path
+        self.files = files
+        self.outputs = outputs
+        # (默认说话人, 名字签名, 文字操作)：matrix 底图里烘焙的名字，None 表示不烘焙
+        self.name_bake = name_bake
+
+
+def _output_name(p_file: str, b_name: str) -> str:
+    return f"p_{os.path.splitext(p_file)[0]}__b_{os.path.splitext(b_name)[0]}{CACHE_EXT}"
+
+
+def _layer_ext() -> str:
+    """立绘 / 对话框图层需要透明通道：raw 保持 raw，其余格式一律用 PNG"""
+    return CACHE_FORMAT_EXTENSIONS["raw"] if CACHE_FORMAT == "raw" else ".png"
 
 
 def _cache_meta_path(char_id: str, cache_path: str = CACHE_PATH) -> str:
     return os.path.join(cache_path, char_id, "_meta.json")
 
 
-def _update_hash_with_file(h: "hashlib._Hash", path: str) -> None:
+def _file_key(path: str, base_path: str) -> str:
+    return os.path.relpath(path, base_path).replace("\\", "/")
+
+
+def _file_signature(path: str) -> Optional[Dict[str, int]]:
     try:
         stat = os.stat(path)
-    except FileNotFoundError:
-        return
-    normalized = path.replace("\\", "/")
-    h.update(normalized.encode("utf-8"))
-    h.update(str(stat.st_mtime_ns).encode("utf-8"))
-    h.update(str(stat.st_size).encode("utf-8"))
+    except OSError:
+        return None
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
 
 
-def _compute_source_signature(char_id: str, base_path: str) -> str:
-    h = hashlib.sha1()
-    h.update(repr(CANVAS_SIZE).encode("utf-8"))
-    h.update(CACHE_FORMAT.encode("utf-8"))
+def _composite_layout(layout: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: layout.get(key) for key in COMPOSITE_LAYOUT_KEYS}
 
-    char_root = os.path.join(base_path, "characters", char_id)
-    config_path = _character_config_path(char_root)
-    if config_path:
-        _update_hash_with_file(h, config_path)
 
-    portrait_dir = os.path.join(char_root, "portrait")
-    for file in _list_images(portrait_dir):
-        _update_hash_with_file(h, os.path.join(portrait_dir, file))
+def _params_signature(params: Dict[str, Any]) -> str:
+    """输出文件除源文件以外的生成参数（画布尺寸、格式、layout 键等）"""
+    encoded = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
 
-    bg_entries = _collect_background_entries(char_id, base_path)
-    for _, bg_path in bg_entries:
-        _update_hash_with_file(h, bg_path)
 
+def _encoding_params() -> Dict[str, Any]:
+    params: Dict[str, Any] = {"canvas_size": list(CANVAS_SIZE), "cache_format": CACHE_FORMAT}
+    if CACHE_FORMAT == "jpeg":
+        params["jpeg_quality"] = JPEG_QUALITY
+    return params
+
+
+def _output_signature(
+    params_signature: str,
+    deps: List[str],
+    files: Dict[str, Dict[str, int]],
+) -> str:
+    h = hashlib.sha1(params_signature.encode("utf-8"))
+    for key in deps:
+        sig = files.get(key) or {}
+        h.update(key.encode("utf-8"))
+        h.update(str(sig.get("mtime_ns")).encode("utf-8"))
+        h.update(str(sig.get("size")).encode("utf-8"))
     return h.hexdigest()
 
 
+def _speaker_name_bake(char_id: str, base_path: str) -> Optional[Tuple[str, str, List[Any]]]:
+    """
+    要烘焙进 matrix 底图的默认名字，不烘焙时返回 None。
+    名字的排版直接取自进程内共享的渲染器，保证与实时绘制逐像素一致。
+    """
+    if not BAKE_SPEAKER_NAME or CACHE_LAYOUT != "matrix" or CACHE_FORMAT not in LOSSLESS_FORMATS:
+        return None
+    try:
+        renderer = get_renderer(char_id, base_path)
+    except Exception as e:
+        print(f"⚠️ 无法排版 {char_id} 的名字，底图不烘焙名字: {e}")
+        return None
+    if tuple(renderer.canvas_size) != tuple(CANVAS_SIZE):
+        return None
+    return renderer.default_name_bake()
+
+
+def _draw_name(canvas: Image.Image, ops: List[Any]) -> None:
+    draw = ImageDraw.Draw(canvas)
+    for xy, value, font, fill in ops:
+        draw_text(draw, xy, value, font, fill)
+
+
+def _build_plan(
+    char_id: str,
+    base_path: str,
+    config: Dict[str, Any],
+) -> _BuildPlan:
+    char_root = os.path.join(base_path, "characters", char_id)
+    layout = normalize_layout(config.get("layout", {}), CANVAS_SIZE)
+    portrait_dir = os.path.join(char_root, "portrait")
+    portraits = _list_images(portrait_dir)
+    bg_entries = _collect_background_entries(char_id, base_path)
+    box_name = config.get("assets", {}).get("dialog_box", "textbox_bg.png")
+    box_path = os.path.join(char_root, box_name)
+
+    files: Dict[str, Dict[str, int]] = {}
+
+    def track(path: str) -> str:
+        key = _file_key(path, base_path)
+        sig = _file_signature(path)
+        if sig is not None:
+            files[key] = sig
+        return key
+
+    box_key = track(box_path)
+    portrait_keys = {p: track(os.path.join(portrait_dir, p)) for p in portraits}
+    bg_keys = {name: track(path) for name, path in bg_entries}
+
+    outputs: Dict[str, Dict[str, Any]] = {}
+    name_bake: Optional[Tuple[str, str, List[Any]]] = None
+
+    def add(name: str, output: Dict[str, Any], params: Dict[str, Any]) -> None:
+        output["signature"] = _output_signature(_params_signature(params), output["deps"], files)
+        outputs[name] = output
+
+    if CACHE_LAYOUT == "layered":
+        # N + M 个图层：站位 / 对话框位置 / 前后顺序在渲染时应用，不影响图层本身
+        layer_ext = _layer_ext()
+        for b_name, _ in bg_entries:
+            key = os.path.splitext(b_name)[0]
+            add(
+                f"{LAYER_DIR}/bg_{key}{CACHE_EXT}",
+                {"kind": "background", "key": key, "background": b_name, "deps": [bg_keys[b_name]]},
+                {"layer": "background", **_encoding_params()},
+            )
+        for p_file in portraits:
+            key = os.path.splitext(p_file)[0]
+            add(
+                f"{LAYER_DIR}/portrait_{key}{layer_ext}",
+                {"kind": "portrait", "key": key, "portrait": p_file, "deps": [portrait_keys[p_file]]},
+                {"layer": "portrait", "ext": layer_ext, "stand_scale": layout.get("stand_scale", 1.0)},
+            )
+        add(
+            f"{LAYER_DIR}/box{layer_ext}",
+            {"kind": "box", "deps": [box_key]},
+            {"layer": "box", "ext": layer_ext, "canvas_size": list(CANVAS_SIZE)},
+        )
+    else:
+        name_bake = _speaker_name_bake(char_id, base_path)
+        params = {"layout": _composite_layout(layout), **_encoding_params()}
+        if name_bake is not None:
+            # 名字样式或字体变化时签名改变，底图随之重建；不烘焙时参数与以前相同，已有缓存继续有效
+            params["speaker_name"] = name_bake[1]
+        for p_file in portraits:
+            for b_name, _ in bg_entries:
+                add(
+                    _output_name(p_file, b_name),
+                    {
+                        "kind": "canvas",
+                        "portrait": p_file,
+                        "background": b_name,
+                        "deps": [portrait_keys[p_file], bg_keys[b_name], box_key],
+                    },
+                    params,
+                )
+    return _BuildPlan(portraits, bg_entries, box_path, files, outputs, name_bake)
+
+
 def _load_cache_meta(char_id: str, cache_path: str = CACHE_PATH) -> Dict[str, object]:
     meta_path = _cache_meta_path(char_id, cache_path)
     if not os.path.exists(meta_path):
@@ -210,61 +391,71 @@ def _load_cache_meta(char_id: str, cache_path: str = CACHE_PATH) -> Dict[str, ob
         return {}
 
 
+def _recorded_outputs(char_id: str, cache_path: str) -> Dict[str, Any]:
+    meta = _load_cache_meta(char_id, cache_path)
+    recorded = meta.get("outputs") if meta.get("version") == META_VERSION else None
+    return recorded if isinstance(recorded, dict) else {}
+
+
 def _write_cache_meta(
     char_id: str,
-    portraits: List[str],
-    backgrounds: List[str],
-    base_path: str,
+    plan: _BuildPlan,
+    layout: Dict[str, Any],
+    built: Dict[str, Dict[str, Any]],
     cache_path: str,
 ) -> None:
+    """
+    只记录确实已落盘且与当前输入一致的输出，其余条目下次会被视为过期。
+    built: 输出文件名 → 额外字段（如立绘图层裁边后的 offset）。
+    """
     cache_dir = os.path.join(cache_path, char_id)
     ensure_dir(cache_dir)
-    meta = {
-        "source_signature": _compute_source_signature(char_id, base_path),
+    outputs: Dict[str, Any] = {}
+    for name, extras in built.items():
+        output = plan.outputs[name]
+        entry: Dict[str, Any] = {"kind": output["kind"]}
+        if "key" in output:
+            entry["key"] = output["key"]
+        entry.update(extras)
+        entry["deps"] = output["deps"]
+        entry["signature"] = output["signature"]
+        outputs[name] = entry
+
+    meta: Dict[str, Any] = {
+        "version": META_VERSION,
         "canvas_size": list(CANVAS_SIZE),
         "cache_format": CACHE_FORMAT,
-        "portrait_count": len(portraits),
-        "background_count": len(backgrounds),
+        "cache_layout": CACHE_LAYOUT,
+        "composite_layout": _composite_layout(layout),
+        "files": plan.files,
+        "outputs": outputs,
     }
+    if CACHE_FORMAT == "raw":
+        meta["raw_layout"] = raw_layout(*CANVAS_SIZE)
+    if plan.name_bake is not None:
+        # 渲染器据此跳过默认说话人的名字绘制；签名与当前样式不一致时改用不含名字的底图
+        meta["baked_name"] = {"speaker": plan.name_bake[0], "signature": plan.name_bake[1]}
     meta_path = _cache_meta_path(char_id, cache_path)
-    with open(meta_path, "w", encoding="utf-8") as f:
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
 
 
-def _cache_is_complete(
-    char_id: str,
-    portraits: List[str],
-    backgrounds: List[str],
-    base_path: str,
-    cache_path: str,
-) -> bool:
-    if not portraits or not backgrounds:
-        return False
-
+def _stale_outputs(char_id: str, plan: _BuildPlan, cache_path: str) -> List[str]:
+    """返回需要重新生成的缓存文件名（缺失、旧版 meta 或依赖签名不一致）"""
+    recorded = _recorded_outputs(char_id, cache_path)
     cache_dir = os.path.join(cache_path, char_id)
-    if not os.path.isdir(cache_dir):
-        return False
-
-    expected = _expected_cache_count(portraits, backgrounds)
-    existing = len([f for f in os.listdir(cache_dir) if f.lower().endswith(CACHE_EXT)])
-    if existing < expected:
-        return False
-
-    meta = _load_cache_meta(char_id, cache_path)
-    if not meta:
-        return False
-    if int(meta.get("portrait_count", -1)) != len(portraits): # type: ignore
-        return False
-    if int(meta.get("background_count", -1)) != len(backgrounds): # type: ignore
-        return False
-    if tuple(meta.get("canvas_size", [])) != CANVAS_SIZE: # type: ignore
-        return False
-    if meta.get("cache_format") != CACHE_FORMAT:
-        return False
-    if meta.get("source_signature") != _compute_source_signature(char_id, base_path):
-        return False
-
-    return True
+    stale: List[str] = []
+    for name, info in plan.outputs.items():
+        entry = recorded.get(name)
+        if (
+            not isinstance(entry, dict)
+            or entry.get("signature") != info["signature"]
+            or not os.path.exists(os.path.join(cache_dir, entry.get("file", name)))
+        ):
+            stale.append(name)
+    return stale
 
 def _fit_dialog_box_to_canvas(box_img: Image.Image) -> Tuple[Image.Image, Tuple[int, int]]:
     """Resize dialog box to canvas width and bottom align."""
@@ -280,9 +471,13 @@ def _prepare_background_images(
     char_id: str,
     base_path: str,
     progress: Optional[ProgressCallback],
+    names: Optional[List[str]] = None,
 ) -> Dict[str, Image.Image]:
     """Load/scale backgrounds and persist them into assets/pre_scaled."""
     entries = _collect_background_entries(char_id, base_path)
+    if names is not None:
+        wanted = set(names)
+        entries = [entry for entry in entries if entry[0] in wanted]
     if not entries:
         return {}
 
@@ -298,10 +493,11 @@ def _prepare_background_images(
         pre_scaled_path = os.path.join(pre_scaled_dir, scaled_name)
         legacy_path = os.path.join(pre_scaled_dir, name)
 
-        if os.path.exists(pre_scaled_path):
+        # 源图比预缩放文件新时说明背景被替换过，需要重新缩放
+        if _is_up_to_date(pre_scaled_path, src_path):
             img = Image.open(pre_scaled_path).convert("RGBA")
         else:
-            if os.path.exists(legacy_path):
+            if _is_up_to_date(legacy_path, src_path):
                 img = Image.open(legacy_path).convert("RGBA")
             else:
                 img = Image.open(src_path).convert("RGBA")
@@ -327,13 +523,28 @@ def _prepare_background_images(
     return result
 
 
+def _is_up_to_date(derived_path: str, src_path: str) -> bool:
+    try:
+        return os.stat(derived_path).st_mtime_ns >= os.stat(src_path).st_mtime_ns
+    except OSError:
+        return False
+
+
 def prebuild_character(
     char_id: str,
     base_path: str = BASE_PATH,
     cache_path: str = CACHE_PATH,
     force: bool = False,
     progress: Optional[ProgressCallback] = None,
+    workers: Optional[int] = None,
+    cancel: Optional[CancelCallback] = None,
 ) -> None:
+    """
+    生成角色的底图缓存：matrix 为每个 立绘 × 背景 组合一张整图，layered 为 背景 / 立绘 / 对话框 图层。
+    只重新生成依赖（立绘 / 背景 / 对话框文件、合成相关的 layout 键）发生变化的组合，force=True 时全部重建。
+    workers: 并行线程数，None 读取 render.prebuild_workers，<=0 表示使用全部 CPU 核心。
+    cancel: 返回 True 时尽快停止（已开始的底图会写完），并发出 "cancelled" 进度事件。
+    """
     _refresh_render_preferences()
     print(f"🚧 开始预处理角色: {char_id}")
     _notify_progress(progress, "start", 0, 0, f"开始预处理角色 {char_id}")
@@ -361,92 +572,247 @@ def prebuild_character(
     stand_on_top = bool(layout.get("stand_on_top", False))
 
     portrait_dir = os.path.join(char_root, "portrait")
-    portraits = _list_images(portrait_dir)
-
-    bg_images = _prepare_background_images(char_id, base_path, progress)
-    backgrounds = list(bg_images.keys())
+    plan = _build_plan(char_id, base_path, config)
 
-    if not portraits:
+    if not plan.portraits:
         msg = "⚠️ 没有立绘，跳过预处理"
         print(msg)
         _notify_progress(progress, "error", 0, 0, msg)
         return
-    if not backgrounds:
+    if not plan.bg_entries:
         msg = "⚠️ 没有背景，跳过预处理"
         print(msg)
         _notify_progress(progress, "error", 0, 0, msg)
         return
 
-    if not force and _cache_is_complete(char_id, portraits, backgrounds, base_path, cache_path):
-        print("✅ 缓存已存在，跳过预处理")
+    stale = list(plan.outputs) if force else _stale_outputs(char_id, plan, cache_path)
+    stale_set = set(stale)
+    reused = [name for name in plan.outputs if name not in stale_set]
+    if not stale:
+        print(f"✅ 缓存已是最新，复用 {len(reused)} 张底图，跳过预处理")
         _notify_progress(progress, "skip", 0, 0, "缓存已存在，无需重新生成")
         return
 
-    box_name = config.get("assets", {}).get("dialog_box", "textbox_bg.png")
-    box_path = os.path.join(char_root, box_name)
+    box_path = plan.box_path
     if not os.path.exists(box_path):
         msg = f"❗ 找不到对话框图片 {box_path}"
         print(msg)
         _notify_progress(progress, "error", 0, 0, msg)
         return
 
+    # 只解码过期输出实际用到的背景和立绘
+    bg_images = _prepare_background_images(
+        char_id,
+        base_path,
+        progress,
+        names=sorted({plan.outputs[name]["background"] for name in stale if "background" in plan.outputs[name]}),
+    )
+    portraits = sorted({plan.outputs[name]["portrait"] for name in stale if "portrait" in plan.outputs[name]})
+
     raw_box_img = Image.open(box_path).convert("RGBA")
     box_img = _scale_box_to_canvas(raw_box_img)
     box_pos = _resolve_box_position(layout, box_img)
 
     char_cache_dir = os.path.join(cache_path, char_id)
     ensure_dir(char_cache_dir)
+    if CACHE_LAYOUT == "layered":
+        ensure_dir(os.path.join(char_cache_dir, LAYER_DIR))
 
-    total = _expected_cache_count(portraits, backgrounds)
+    total = len(stale)
     count = 0
+    recorded = _recorded_outputs(char_id, cache_path)
+    built: Dict[str, Dict[str, Any]] = {
+        name: _layer_extras(recorded.get(name)) for name in reused
+    }
+    if reused:
+        print(f"♻️ 复用 {len(reused)} 张底图，重新生成 {total} 张")
+    if plan.name_bake is not None:
+        print(f"🏷️ 默认名字「{plan.name_bake[0]}」烘焙进底图")
     _notify_progress(progress, "composite", 0, total, "开始生成底图")
 
-    for p_file in portraits:
+    def load_portrait(p_file: str) -> Image.Image:
         portrait_img = Image.open(os.path.join(portrait_dir, p_file)).convert("RGBA")
         if stand_scale != 1.0:
             new_w = int(portrait_img.width * stand_scale)
             new_h = int(portrait_img.height * stand_scale)
             portrait_img = portrait_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+        return portrait_img
 
-        p_key = os.path.splitext(p_file)[0]
+    # raw 缓存可能正被渲染器映射着（Windows 上无法覆盖），每次预生成写入带版本号的新文件
+    raw_version = f"{time.time_ns():x}"
 
-        for b_name in backgrounds:
-            canvas = Image.new("RGBA", CANVAS_SIZE)
-            canvas.paste(bg_images[b_name], (0, 0))
+    def build_output(name: str, portrait_img: Optional[Image.Image]) -> Optional[Dict[str, Any]]:
+        """生成单个缓存文件；被取消时返回 None，否则返回要写入 meta 的额外字段"""
+        if _cancel_requested(cancel):
+            return None
+        if name.endswith(CACHE_FORMAT_EXTENSIONS["raw"]):
+            file_name = versioned_name(name, raw_version)
+            extras = write_output(name, os.path.join(char_cache_dir, file_name), portrait_img)
+            extras["file"] = file_name
+            return extras
+        return write_output(name, os.path.join(char_cache_dir, name), portrait_img)
+
+    def write_output(name: str, save_path: str, portrait_img: Optional[Image.Image]) -> Dict[str, Any]:
+        output = plan.outputs[name]
+        kind = output["kind"]
+
+        if kind == "background":
+            _save_canvas(bg_images[output["background"]], save_path)
+            return {}
+        if kind == "portrait" and portrait_img is not None:
+            # 裁掉全透明边缘，渲染时按 stand_pos + offset 贴回，结果与整张贴图一致
+            bbox = portrait_img.getchannel("A").getbbox() or (0, 0, 1, 1)
+            _save_layer(portrait_img.crop(bbox), save_path)
+            return {"offset": [bbox[0], bbox[1]]}
+        if kind == "box":
+            _save_layer(box_img, save_path)
+            return {}
+
+        canvas = Image.new("RGBA", CANVAS_SIZE)
+        canvas.paste(bg_images[output["background"]], (0, 0))
+
+        if stand_on_top:
+            canvas.paste(box_img, box_pos, box_img)
+            canvas.paste(portrait_img, stand_pos, portrait_img)
+        else:
+            canvas.paste(portrait_img, stand_pos, portrait_img)
+            canvas.paste(box_img, box_pos, box_img)
 
-            if stand_on_top:
-                canvas.paste(box_img, box_pos, box_img)
-                canvas.paste(portrait_img, stand_pos, portrait_img)
-            else:
-                canvas.paste(portrait_img, stand_pos, portrait_img)
-                canvas.paste(box_img, box_pos, box_img)
-
-            save_name = f"p_{p_key}__b_{os.path.splitext(b_name)[0]}{CACHE_EXT}"
-            save_path = os.path.join(char_cache_dir, save_name)
-
-            if CACHE_FORMAT == "jpeg":
-                canvas_rgb = canvas.convert("RGB")
-                canvas_rgb.save(
-                    save_path,
-                    "JPEG",
-                    quality=JPEG_QUALITY,
-                    optimize=True,
+        if plan.name_bake is not None:
+            # 名字字体由多个线程共用，draw_text 内部按字体串行化 FreeType 调用（见 font_registry.font_lock）
+            _draw_name(canvas, plan.name_bake[2])
+        _save_canvas(canvas, save_path)
+        return {}
+
+    # Pillow 的缩放 / 粘贴 / 编码都会释放 GIL，线程池即可利用多核
+    workers = _resolve_worker_count(workers, total)
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prebuild") as pool:
+        portrait_images = dict(zip(portraits, pool.map(load_portrait, portraits)))
+
+        futures: Dict[Future, str] = {}
+        for save_name in stale:
+            p_file = plan.outputs[save_name].get("portrait")
+            future = pool.submit(build_output, save_name, portrait_images.get(p_file))
+            futures[future] = save_name
+
+        # 进度事件只在调用线程里按完成顺序发出，count 单调递增
+        try:
+            for future in as_completed(futures):
+                if not cancelled and _cancel_requested(cancel):
+                    cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+                if future.cancelled():
+                    continue
+                extras = future.result()
+                if extras is not None:
+                    built[futures[future]] = extras
+                if cancelled:
+                    continue
+                count += 1
+                save_name = futures[future]
+                _notify_progress(
+                    progress,
+                    "composite",
+                    count,
+                    total,
+                    f"[{count}/{total}] 已生成 {save_name}",
                 )
-            else:
-                canvas.save(save_path, "PNG", optimize=True)
-
-            count += 1
-            _notify_progress(
-                progress,
-                "composite",
-                count,
-                total,
-                f"[{count}/{total}] 已生成 {save_name}",
-            )
+        except BaseException:
+            # 出错时不再继续排队中的底图，直接向上抛出
+            for pending in futures:
+                pending.cancel()
+            raise
+
+    # 取消时也记录已写完的底图，下次只补齐剩下的组合
+    _write_cache_meta(char_id, plan, layout, built, cache_path)
+    _remove_superseded_raw(char_cache_dir, built)
+
+    if cancelled:
+        msg = f"⏹️ {char_id} 预处理已取消（已完成 {count}/{total}）"
+        print(msg)
+        _notify_progress(progress, "cancelled", count, total, msg)
+        return
+
+    print(
+        f"✅ {char_id} 预处理完成，重新生成 {count} 张、复用 {len(reused)} 张底图（{workers} 线程）。\n"
+    )
+    _notify_progress(
+        progress,
+        "done",
+        count,
+        total,
+        f"{char_id} 预处理完成（重新生成 {count}，复用 {len(reused)}）",
+    )
 
-    _write_cache_meta(char_id, portraits, backgrounds, base_path, cache_path)
-    print(f"✅ {char_id} 预处理完成，共生成 {count} 张底图。\n")
-    _notify_progress(progress, "done", count, total, f"{char_id} 预处理完成")
+
+def _cancel_requested(cancel: Optional[CancelCallback]) -> bool:
+    if not cancel:
+        return False
+    try:
+        return bool(cancel())
+    except Exception:
+        return False
+
+
+def _resolve_worker_count(workers: Optional[int], total: int) -> int:
+    if workers is None:
+        workers = PREBUILD_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, max(total, 1)))
+
+
+def _save_canvas(canvas: Image.Image, save_path: str) -> None:
+    if CACHE_FORMAT == "jpeg":
+        canvas_rgb = canvas.convert("RGB")
+        canvas_rgb.save(
+            save_path,
+            "JPEG",
+            quality=JPEG_QUALITY,
+            optimize=True,
+        )
+    elif CACHE_FORMAT == "raw":
+        write_raw_canvas(save_path, canvas)
+    else:
+        canvas.save(save_path, "PNG", optimize=True)
+
+
+def _save_layer(layer: Image.Image, save_path: str) -> None:
+    """保存带透明通道的图层（立绘 / 对话框）"""
+    if CACHE_FORMAT == "raw":
+        write_raw_canvas(save_path, layer)
+    else:
+        layer.save(save_path, "PNG", optimize=True)
+
+
+def _layer_extras(entry: Any) -> Dict[str, Any]:
+    """复用的输出沿用上次记录的额外字段（图层 offset、raw 缓存的实际文件名）"""
+    if not isinstance(entry, dict):
+        return {}
+    return {key: entry[key] for key in ("offset", "file") if key in entry}
+
+
+def _remove_superseded_raw(cache_dir: str, built: Dict[str, Dict[str, Any]]) -> None:
+    """
+    删除 _meta.json 不再引用的 raw 文件（旧版本、已移除的组合）。
+    仍被其它进程映射的文件在 Windows 上删不掉，留到下次预生成再清理。
+    """
+    keep = {os.path.normpath(extras.get("file", name)) for name, extras in built.items()}
+    raw_ext = CACHE_FORMAT_EXTENSIONS["raw"]
+    for folder in ("", LAYER_DIR):
+        directory = os.path.join(cache_dir, folder)
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.listdir(directory):
+            rel = os.path.normpath(os.path.join(folder, entry))
+            if not entry.endswith(raw_ext) or rel in keep:
+                continue
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
 
 
 def _scale_box_to_canvas(box_img: Image.Image) -> Image.Image:
@@ -479,19 +845,16 @@ def ensure_character_cache(
     cache_path: str = CACHE_PATH,
 ) -> None:
     _refresh_render_preferences()
-    _configure_canvas_for_character(char_id, base_path)
-    portrait_dir = os.path.join(base_path, "characters", char_id, "portrait")
-    portraits = _list_images(portrait_dir)
-    backgrounds = [name for name, _ in _collect_background_entries(char_id, base_path)]
+    config = _configure_canvas_for_character(char_id, base_path)
+    plan = _build_plan(char_id, base_path, config)
 
-    if _cache_is_complete(char_id, portraits, backgrounds, base_path, cache_path):
+    if plan.outputs and not _stale_outputs(char_id, plan, cache_path):
         return
 
     prebuild_character(
         char_id,
         base_path=base_path,
         cache_path=cache_path,
-        force=True,
     )
 
 
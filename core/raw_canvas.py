@@ -0,0 +1,105 @@
+# core/raw_canvas.py
+"""
+未压缩 RGBA 底图缓存（cache_format: raw）
+
+文件结构：32 字节小端头 + 自上而下的 RGBA 像素行（无行填充）。
+读取时用 mmap 映射整个文件，再用 ``Image.frombuffer`` 零拷贝包装，
+命中缓存只需要缺页换入，不再做 JPEG/PNG 解码和 RGBA 转换。
+
+Windows 上仍被映射的文件不能被替换或删除，所以预生成每次都写入带版本号的新文件名
+（由 _meta.json 的 "file" 字段指向），渲染器从缓存中丢弃底图时用 close_raw_canvas 立即解除映射。
+"""
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+RAW_MAGIC = b"GGRGBA01"
+RAW_MODE = "RGBA"
+RAW_HEADER_SIZE = 32
+# magic, width, height, stride, header_size, mode
+_HEADER = struct.Struct("<8sIIII4s")
+
+
+def raw_layout(width: int, height: int) -> Dict[str, Any]:
+    """写入 _meta.json 的像素布局描述"""
+    return {
+        "magic": RAW_MAGIC.decode("ascii"),
+        "header_size": RAW_HEADER_SIZE,
+        "mode": RAW_MODE,
+        "byte_order": "little",
+        "row_order": "top_down",
+        "stride": width * len(RAW_MODE),
+        "width": width,
+        "height": height,
+    }
+
+
+def write_raw_canvas(path: str, img: Image.Image) -> None:
+    """把画布写成 raw 缓存；先写临时文件再替换，避免读者映射到写了一半的文件"""
+    if img.mode != RAW_MODE:
+        img = img.convert(RAW_MODE)
+    width, height = img.size
+    header = _HEADER.pack(
+        RAW_MAGIC,
+        width,
+        height,
+        width * len(RAW_MODE),
+        RAW_HEADER_SIZE,
+        RAW_MODE.encode("ascii"),
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(RAW_HEADER_SIZE, b"\0"))
+        f.write(img.tobytes())
+    os.replace(tmp_path, path)
+
+
+def versioned_name(name: str, version: str) -> str:
+    """p_1__b_1.rgba → p_1__b_1.<version>.rgba"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{version}{ext}"
+
+
+def open_raw_canvas(path: str) -> Image.Image:
+    """映射 raw 缓存并零拷贝包装为只读 RGBA 图片（映射随图片一起释放，或用 close_raw_canvas 立即释放）"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, width, height, stride, header_size, mode = _HEADER.unpack_from(mapped, 0)
+        if magic != RAW_MAGIC or mode != RAW_MODE.encode("ascii"):
+            raise ValueError(f"不是有效的 raw 底图缓存: {path}")
+        if stride != width * len(RAW_MODE) or len(mapped) < header_size + stride * height:
+            raise ValueError(f"raw 底图缓存已损坏: {path}")
+    except (struct.error, ValueError):
+        mapped.close()
+        raise
+
+    pixels = memoryview(mapped)[header_size:header_size + stride * height]
+    img = Image.frombuffer(RAW_MODE, (width, height), pixels, "raw", RAW_MODE, stride, 1)
+    img._raw_mapping = mapped  # type: ignore[attr-defined]
+    return img
+
+
+def is_raw_canvas(img: Image.Image) -> bool:
+    """图片是否直接映射着 raw 缓存文件"""
+    return getattr(img, "_raw_mapping", None) is not None
+
+
+def close_raw_canvas(img: Image.Image) -> bool:
+    """
+    关闭 open_raw_canvas 返回的图片并解除映射，之后这张图片不能再使用（已 copy() 的副本不受影响）。
+    不是 raw 映射的图片不做处理，返回 False。
+    """
+    mapped: Optional[mmap.mmap] = getattr(img, "_raw_mapping", None)
+    if mapped is None:
+        return False
+    img.close()
+    try:
+        mapped.close()
+    except BufferError:
+        # 仍有别的零拷贝视图引用着映射：留给垃圾回收释放
+        return False
+    return True
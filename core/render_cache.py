@@ -0,0 +1,195 @@
+# core/render_cache.py
+"""
+最近渲染结果缓存
+
+常用短句（问候、"好的"、表情台词）会被反复发送。这里按
+（规范化文本, 表情, 背景, 样式/布局签名）缓存最终的剪贴板数据（已编码的 CF_DIB），
+重复发送只需一次字典查找，跳过渲染和编码。
+
+内存层按字节预算 LRU 淘汰；可选的磁盘层（assets/cache/<角色>/renders/）接住被淘汰的条目，
+同样有字节上限，超出后删除最久未访问的文件。
+"""
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+SPILL_EXT = ".dib"
+
+
+def normalize_text(text: str) -> str:
+    """缓存键使用的文本形式：去掉首尾空白并统一为 NFC"""
+    return unicodedata.normalize("NFC", (text or "").strip())
+
+
+def result_key(*parts: Any) -> str:
+    """把任意可 repr 的片段拼成稳定的十六进制键（也用作磁盘文件名）"""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def payload_nbytes(payload: Any) -> int:
+    if isinstance(payload, Image.Image):
+        width, height = payload.size
+        return width * height * len(payload.getbands())
+    try:
+        return len(payload)
+    except TypeError:
+        return 0
+
+
+class RenderResultCache:
+    """
+    budget_bytes: 内存层上限，<= 0 表示不缓存。
+    spill_dir / spill_budget_bytes: 磁盘层目录与上限；spill_dir 为 None 或上限 <= 0 时不落盘。
+    只有 bytes 类数据会落盘，测试用的图片对象只留在内存里。
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        spill_dir: Optional[str] = None,
+        spill_budget_bytes: int = 0,
+    ):
+        self.budget_bytes = int(budget_bytes)
+        self.spill_dir = spill_dir if spill_dir and spill_budget_bytes > 0 else None
+        self.spill_budget_bytes = int(spill_budget_bytes)
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        payload = self._read_spill(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self.put(key, payload, spill=False)
+        return payload
+
+    def put(self, key: str, payload: Any, spill: bool = True) -> None:
+        nbytes = payload_nbytes(payload)
+        if self.budget_bytes <= 0 or nbytes > self.budget_bytes:
+            if spill:
+                self._write_spill(key, payload)
+            return
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (payload, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.budget_bytes and len(self._entries) > 1:
+                old_key, (old_payload, old_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= old_bytes
+                self.evictions += 1
+                evicted.append((old_key, old_payload))
+        for old_key, old_payload in evicted:
+            self._write_spill(old_key, old_payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "spills": self.spills,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    # -----------------------
+    # 磁盘层
+    # -----------------------
+    def _spill_path(self, key: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        return os.path.join(self.spill_dir, f"{key}{SPILL_EXT}")
+
+    def _read_spill(self, key: str) -> Optional[bytes]:
+        path = self._spill_path(key)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # 记录访问时间，淘汰按 mtime 进行
+            return data
+        except OSError:
+            return None
+
+    def _write_spill(self, key: str, payload: Any) -> None:
+        path = self._spill_path(key)
+        if not path or not isinstance(payload, (bytes, bytearray, memoryview)):
+            return
+        if len(payload) > self.spill_budget_bytes:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)  # type: ignore[arg-type]
+            if not os.path.exists(path):
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self.spills += 1
+            self._prune_spill()
+        except OSError:
+            pass
+
+    def _prune_spill(self) -> None:
+        files = []
+        total = 0
+        for name in os.listdir(self.spill_dir):  # type: ignore[arg-type]
+            if not name.endswith(SPILL_EXT):
+                continue
+            path = os.path.join(self.spill_dir, name)  # type: ignore[arg-type]
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.spill_budget_bytes:
+            return
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.spill_budget_bytes:
+                break
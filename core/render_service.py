@@ -0,0 +1,346 @@
+# core/render_service.py
+"""
+本地 HTTP 渲染服务（无界面，供聊天机器人 / 脚本调用）
+
+    POST /render    JSON 请求体，返回编码后的图片
+    GET  /metrics   Prometheus 文本格式的请求数、拒绝数与各阶段延迟直方图
+    GET  /healthz   存活检查
+
+请求体字段：character（必填）、text（必填）、portrait、background、speaker、
+format（png / jpeg / webp / bmp，默认 png）、quality（jpeg / webp，默认 90）。
+
+渲染在固定大小的线程池里执行。排队中 + 执行中的请求超过 workers + queue_size 时
+立即返回 503 和 Retry-After，不让请求无限堆积。每个角色只构造一个渲染器（RendererRegistry，
+按文件变化做最小重载），同一角色的请求在角色锁内串行渲染，不同角色之间并行；
+图片编码在锁外进行。不同角色共用字体注册表里的字体对象和进程级字形图集，
+FreeType 的测量与光栅化按字体串行（font_registry.font_lock），其余合成与贴图照常并行。
+"""
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+try:
+    from .prebuild import ensure_character_cache
+    from .renderer import CharacterRenderer
+    from .renderer_registry import RendererRegistry
+    from .tracing import span
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from prebuild import ensure_character_cache  # type: ignore[no-redef]
+    from renderer import CharacterRenderer  # type: ignore[no-redef]
+    from renderer_registry import RendererRegistry  # type: ignore[no-redef]
+    from tracing import span  # type: ignore[no-redef]
+
+# 输出格式 → (Pillow 格式名, Content-Type)
+OUTPUT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "bmp": ("BMP", "image/bmp"),
+}
+MAX_BODY_BYTES = 64 * 1024
+JSON_TYPE = "application/json; charset=utf-8"
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STAGES = ("queue", "render", "encode", "total")
+
+
+class ServiceError(Exception):
+    """带 HTTP 状态码的请求错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyHistogram:
+    """Prometheus 风格的累积直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        prefix = f"{labels}," if labels else ""
+        out = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        out.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.total:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class RenderService:
+    """
+    base_path: 素材根目录（其下的 characters/ 与 cache/）
+    workers: 渲染线程数，默认 CPU 核数
+    queue_size: 线程都在忙时最多再排队的请求数，超出后拒绝
+    """
+
+    def __init__(self, base_path: str = "assets", workers: Optional[int] = None, queue_size: int = 16):
+        self.base_path = base_path
+        self.cache_path = os.path.join(base_path, "cache")
+        self.workers = max(1, workers or os.cpu_count() or 2)
+        self.capacity = self.workers + max(0, queue_size)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render-service")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._registry = RendererRegistry(factory=self._create_renderer)
+        self._char_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.rejected = 0
+        self.responses: Dict[int, int] = {}
+        self._histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+
+    # -----------------------
+    # 渲染
+    # -----------------------
+    def _create_renderer(self, char_id: str, base_path: str) -> CharacterRenderer:
+        ensure_character_cache(char_id, base_path, self.cache_path)
+        return CharacterRenderer(char_id, base_path)
+
+    def _char_lock(self, char_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._char_locks.get(char_id)
+            if lock is None:
+                lock = self._char_locks[char_id] = threading.Lock()
+            return lock
+
+    def _validate(self, request: Any) -> Dict[str, Any]:
+        if not isinstance(request, dict):
+            raise ServiceError(400, "请求体必须是 JSON 对象")
+        char_id = request.get("character")
+        text = request.get("text")
+        if not isinstance(char_id, str) or not char_id:
+            raise ServiceError(400, "缺少 character")
+        if not isinstance(text, str):
+            raise ServiceError(400, "缺少 text")
+        if os.path.basename(char_id) != char_id or char_id in (".", ".."):
+            raise ServiceError(400, f"非法的角色名: {char_id}")
+        if not os.path.isdir(os.path.join(self.base_path, "characters", char_id)):
+            raise ServiceError(404, f"找不到角色: {char_id}")
+        fmt = str(request.get("format") or "png").lower()
+        if fmt not in OUTPUT_FORMATS:
+            raise ServiceError(400, f"不支持的输出格式: {fmt}")
+        try:
+            quality = int(request.get("quality", 90))
+        except (TypeError, ValueError):
+            raise ServiceError(400, "quality 必须是整数")
+        return {
+            "character": char_id,
+            "text": text,
+            "portrait": request.get("portrait"),
+            "background": request.get("background"),
+            "speaker": request.get("speaker"),
+            "format": fmt,
+            "quality": max(1, min(100, quality)),
+        }
+
+    def render(self, request: Dict[str, Any]) -> Tuple[bytes, str]:
+        """同步渲染一个请求，返回 (图片字节, Content-Type)；出错时抛出 ServiceError"""
+        req = self._validate(request)
+        char_id = req["character"]
+        started = time.perf_counter()
+        with self._char_lock(char_id):
+            try:
+                renderer = self._registry.get(char_id, self.base_path)
+            except Exception as e:
+                raise ServiceError(500, f"渲染器初始化失败: {e}")
+            for field, kind in (("portrait", "portraits"), ("background", "backgrounds")):
+                key = req[field]
+                if key is not None and str(key) not in renderer.assets[kind]:
+                    raise ServiceError(400, f"角色 {char_id} 没有 {field}: {key}")
+            try:
+                image = renderer.render(
+                    req["text"],
+                    str(req["portrait"]) if req["portrait"] is not None else None,
+                    str(req["background"]) if req["background"] is not None else None,
+                    speaker_name=req["speaker"],
+                )
+            except Exception as e:
+                raise ServiceError(500, f"渲染失败: {e}")
+            # dirty_region 模式返回的是复用的输出缓冲区，离开角色锁前拷贝一份
+            if renderer.compositing_mode == "dirty_region":
+                image = image.copy()
+        rendered = time.perf_counter()
+        with span("service.encode"):
+            payload = encode_image(image, req["format"], req["quality"])
+        self._observe("render", rendered - started)
+        self._observe("encode", time.perf_counter() - rendered)
+        return payload, OUTPUT_FORMATS[req["format"]][1]
+
+    # -----------------------
+    # 线程池与背压
+    # -----------------------
+    def submit(self, request: Dict[str, Any]) -> "Future[Tuple[bytes, str]]":
+        """把请求交给渲染线程池；排队已满时抛出 ServiceError(503)"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceError(503, "渲染队列已满，请稍后重试")
+        with self._lock:
+            self.in_flight += 1
+        queued = time.perf_counter()
+
+        def run() -> Tuple[bytes, str]:
+            self._observe("queue", time.perf_counter() - queued)
+            return self.render(request)
+
+        def release(_: Future) -> None:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+        future = self._pool.submit(run)
+        future.add_done_callback(release)
+        return future
+
+    def handle(self, request: Any) -> Tuple[int, bytes, str]:
+        """处理一个请求直到完成，返回 (状态码, 响应体, Content-Type) 并记录指标"""
+        started = time.perf_counter()
+        try:
+            payload, content_type = self.submit(request).result()
+            status = 200
+        except ServiceError as e:
+            status, payload, content_type = e.status, _error_body(str(e)), JSON_TYPE
+        except Exception as e:
+            status, payload, content_type = 500, _error_body(f"内部错误: {e}"), JSON_TYPE
+        with self._lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+        if status == 200:
+            self._observe("total", time.perf_counter() - started)
+        return status, payload, content_type
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    # -----------------------
+    # 指标
+    # -----------------------
+    def _observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._histograms[stage].observe(seconds)
+
+    def metrics_text(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP galgame_render_requests_total 按状态码统计的渲染请求数",
+                "# TYPE galgame_render_requests_total counter",
+            ]
+            for status in sorted(self.responses):
+                lines.append(f'galgame_render_requests_total{{code="{status}"}} {self.responses[status]}')
+            lines += [
+                "# HELP galgame_render_rejected_total 因排队已满被拒绝的请求数",
+                "# TYPE galgame_render_rejected_total counter",
+                f"galgame_render_rejected_total {self.rejected}",
+                "# HELP galgame_render_in_flight 排队中与执行中的请求数",
+                "# TYPE galgame_render_in_flight gauge",
+                f"galgame_render_in_flight {self.in_flight}",
+                "# HELP galgame_render_capacity 同时接受的请求上限（workers + queue_size）",
+                "# TYPE galgame_render_capacity gauge",
+                f"galgame_render_capacity {self.capacity}",
+                "# HELP galgame_render_stage_seconds 各阶段耗时：queue 排队、render 渲染、encode 编码、total 整个请求",
+                "# TYPE galgame_render_stage_seconds histogram",
+            ]
+            for stage in STAGES:
+                lines += self._histograms[stage].lines("galgame_render_stage_seconds", f'stage="{stage}"')
+        stats = self._registry.stats()
+        lines += [
+            "# HELP galgame_render_renderers 已加载的角色渲染器数",
+            "# TYPE galgame_render_renderers gauge",
+            f"galgame_render_renderers {stats['renderers']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def encode_image(image: Image.Image, fmt: str, quality: int = 90) -> bytes:
+    pil_format = OUTPUT_FORMATS[fmt][0]
+    if pil_format in ("JPEG", "BMP") and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buf = io.BytesIO()
+    if pil_format in ("JPEG", "WEBP"):
+        image.save(buf, pil_format, quality=quality)
+    elif pil_format == "PNG":
+        # 默认压缩级别对大画布太慢；1 的体积只大一点，编码快数倍
+        image.save(buf, pil_format, compress_level=1)
+    else:
+        image.save(buf, pil_format)
+    return buf.getvalue()
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+# -----------------------
+# HTTP
+# -----------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive，每个响应都带 Content-Length
+    service: RenderService
+
+    def do_GET(self) -> None:
+        if self.path == "/metrics":
+            self._send(200, self.service.metrics_text().encode("utf-8"), "text/plain; version=0.0.4")
+        elif self.path == "/healthz":
+            self._send(200, b"ok\n", "text/plain")
+        else:
+            self._send(404, _error_body(f"未知路径: {self.path}"), JSON_TYPE)
+
+    def do_POST(self) -> None:
+        if self.path != "/render":
+            self._send(404, _error_body(f"未知路径: {self.path}"), JSON_TYPE)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(413, _error_body("请求体过大或缺少 Content-Length"), JSON_TYPE)
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self._send(400, _error_body(f"请求体不是合法的 JSON: {e}"), JSON_TYPE)
+            return
+        status, body, content_type = self.service.handle(request)
+        self._send(status, body, content_type)
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 逐请求的访问日志会淹没控制台；需要时看 /metrics
+        return None
+
+
+def create_server(service: RenderService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """创建绑定到 service 的 HTTP 服务器（port=0 时由系统分配端口）"""
+    handler = type("RenderHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
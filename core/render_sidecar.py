@@ -0,0 +1,204 @@
+# core/render_sidecar.py
+"""
+渲染子进程（render.sidecar: true）
+
+keyboard 的钩子回调和 Pillow 的解码、合成、编码原本共用一个解释器，渲染时抢占 GIL，
+钩子线程处理按键会被推迟（表现为聊天窗口里吞键或输入卡顿）。
+开启后，渲染在常驻子进程里进行，主进程只通过管道发送请求：
+
+    主进程 ──(文本, 表情, 背景, 名字)──▶ 子进程：get_renderer() → render()
+    主进程 ◀──(尺寸, 槽位偏移)──────── 子进程：像素按 RGBA 写入共享内存槽位
+
+共享内存分为两个槽位交替使用，上一张图在下一次请求完成前一直有效；
+主进程用 Image.frombuffer 直接引用槽位内存，不做拷贝。结果超过槽位大小（例如改大了画布）时，
+这一次改为通过管道传回像素。
+"""
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Optional, Tuple
+
+from PIL import Image
+
+try:
+    from .glyph_atlas import save_frequency_list, warmup_limit
+    from .renderer_registry import get_renderer
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from glyph_atlas import save_frequency_list, warmup_limit  # type: ignore[no-redef]
+    from renderer_registry import get_renderer  # type: ignore[no-redef]
+
+SLOTS = 2
+BYTES_PER_PIXEL = 4
+# 首次加载角色可能较慢（解析配置、索引素材），之后每次渲染只需几十毫秒
+START_TIMEOUT = 60.0
+RENDER_TIMEOUT = 10.0
+# 写入共享内存时每次编码的行带大小
+PACK_BAND_BYTES = 256 * 1024
+
+
+class SidecarError(RuntimeError):
+    """子进程不可用（启动失败、超时或已退出）"""
+
+
+def _pack_into(image: Image.Image, rawmode: str, buf: memoryview, offset: int) -> None:
+    """按 rawmode 把像素逐个行带编码进 buf[offset:]，避免整图 tobytes() 先拼出一份完整副本"""
+    width, height = image.size
+    row_bytes = width * BYTES_PER_PIXEL
+    rows = max(1, PACK_BAND_BYTES // max(1, row_bytes))
+    pos = offset
+    for top in range(0, height, rows):
+        bottom = min(height, top + rows)
+        data = image.crop((0, top, width, bottom)).tobytes("raw", rawmode)
+        if len(data) != row_bytes * (bottom - top):
+            raise RuntimeError(f"像素写入共享内存失败：第 {top}-{bottom} 行得到 {len(data)} 字节")
+        buf[pos:pos + len(data)] = data
+        pos += len(data)
+
+
+def _sidecar_main(conn: Any, char_id: str, base_path: str, shm_name: str, slot_bytes: int) -> None:
+    """子进程入口：常驻渲染器，逐个处理管道里的请求"""
+    # 共享内存由主进程创建和释放；子进程与主进程共用同一个 resource_tracker，附加时无需额外处理
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        renderer = get_renderer(char_id, base_path)
+        renderer.warm_glyph_atlas(warmup_limit())
+    except Exception as e:
+        conn.send(("error", 0, f"渲染器初始化失败: {e}"))
+        shm.close()
+        return
+    conn.send(("ready", 0, renderer.canvas_size))
+
+    pinned: Optional[str] = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == "stop":
+            break
+        _, request_id, text, portrait_key, bg_key, speaker_name = message
+        try:
+            # 每次请求前检查配置 / 素材变化，只做最小重载（都在子进程里完成）
+            renderer = get_renderer(char_id, base_path)
+            if portrait_key != pinned:
+                renderer.pin_expression(portrait_key)
+                pinned = portrait_key
+            image = renderer.render(text, portrait_key, bg_key, speaker_name=speaker_name)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            # RGB 按 RGBX 打包，主进程统一以 RGBA 零拷贝读取（alpha 恒为 255）
+            rawmode = "RGBA" if image.mode == "RGBA" else "RGBX"
+            width, height = image.size
+            nbytes = width * height * BYTES_PER_PIXEL
+            if nbytes <= slot_bytes:
+                offset = (request_id % SLOTS) * slot_bytes
+                _pack_into(image, rawmode, shm.buf, offset)
+                conn.send(("shm", request_id, (width, height), offset))
+            else:
+                conn.send(("bytes", request_id, (width, height), image.tobytes("raw", rawmode)))
+        except Exception as e:
+            conn.send(("error", request_id, str(e)))
+    shm.close()
+    try:
+        save_frequency_list()
+    except OSError:
+        pass
+
+
+class RenderSidecar:
+    """
+    常驻渲染子进程的主进程端。
+    render() 同一时间只允许一个调用（由发送工作线程串行调用）；返回的图片引用共享内存，
+    在下一次 render() 返回前有效，需要长期持有时请自行 copy()。
+    """
+
+    def __init__(self, char_id: str, canvas_size: Tuple[int, int], base_path: str = "assets"):
+        self.char_id = char_id
+        width, height = canvas_size
+        self.slot_bytes = width * height * BYTES_PER_PIXEL
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * SLOTS)
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_sidecar_main,
+            args=(child_conn, char_id, base_path, self._shm.name, self.slot_bytes),
+            name=f"render-sidecar-{char_id}",
+            daemon=True,
+        )
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.requests = 0
+        self.fallbacks = 0
+        try:
+            self._process.start()
+            child_conn.close()
+            reply = self._receive(START_TIMEOUT)
+            if reply[0] != "ready":
+                raise SidecarError(reply[2])
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def alive(self) -> bool:
+        return self._process.is_alive()
+
+    def _receive(self, timeout: float) -> Tuple[Any, ...]:
+        try:
+            if not self._conn.poll(timeout):
+                raise SidecarError(f"渲染子进程 {timeout:.0f} 秒内没有响应")
+            return self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise SidecarError(f"渲染子进程已退出: {e}")
+
+    def render(
+        self,
+        text: str,
+        portrait_key: Optional[str] = None,
+        bg_key: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+    ) -> Image.Image:
+        """在子进程里渲染；子进程内的渲染错误抛出 RuntimeError，子进程不可用时抛出 SidecarError"""
+        with self._lock:
+            if not self.alive:
+                raise SidecarError("渲染子进程已退出")
+            self._next_id += 1
+            request_id = self._next_id
+            try:
+                self._conn.send(("render", request_id, text, portrait_key, bg_key, speaker_name))
+            except (OSError, ValueError) as e:
+                raise SidecarError(f"无法发送渲染请求: {e}")
+            kind, reply_id, *payload = self._receive(RENDER_TIMEOUT)
+            if reply_id != request_id:
+                raise SidecarError(f"渲染子进程回复错位 ({reply_id} != {request_id})")
+            self.requests += 1
+            if kind == "error":
+                raise RuntimeError(payload[0])
+            size = payload[0]
+            if kind == "bytes":
+                self.fallbacks += 1
+                return Image.frombuffer("RGBA", size, payload[1], "raw", "RGBA", 0, 1)
+            offset = payload[1]
+            view = self._shm.buf[offset:offset + size[0] * size[1] * BYTES_PER_PIXEL]
+            return Image.frombuffer("RGBA", size, view, "raw", "RGBA", 0, 1)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """通知子进程退出并释放共享内存"""
+        try:
+            self._conn.send(("stop",))
+        except Exception:
+            pass
+        if self._process.is_alive() or self._process.pid is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout)
+        self._conn.close()
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # 还有图片引用着槽位；unlink 后内存在这些引用释放时回收
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
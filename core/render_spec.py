@@ -0,0 +1,144 @@
+# core/render_spec.py
+"""
+预编译的渲染规格
+
+规范化后的 layout / style 是嵌套 dict，原先每次渲染都要重新查表：解析字体路径（逐个 os.path.exists）、
+转换颜色、逐项解析 name_layers 及其坐标、用 getbbox 计算行高。这些只在配置变化时才会改变，
+渲染器在构造和重载配置时把它们编译成只读的 RenderSpec，渲染路径只读取现成的字段。
+
+重载时整体替换渲染器上的 spec 对象而不是修改它，渲染中途发生重载也不会读到新旧混合的配置。
+"""
+from typing import Any, Dict, Optional, Tuple, Union
+
+from PIL import ImageFont
+
+FontType = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+Color = Tuple[int, int, int]
+
+
+# 由其它字段推导、不在构造参数里的字段
+_DERIVED_FIELDS = ("max_width", "lines_per_page")
+
+
+def _lines_per_page(text_area: Tuple[Any, Any, Any, Any], line_height: Union[int, float]) -> int:
+    """text_area 能容纳的行数：第 i 行的顶边不超过 y2 - 行高（与截断时的判断相同）"""
+    _, y1, _, y2 = text_area
+    count = 0
+    while y1 + count * line_height <= y2 - line_height:
+        count += 1
+    return count
+
+
+class _Frozen:
+    """构造完成后禁止修改字段"""
+
+    __slots__ = ()
+
+    def _init(self, **fields: Any) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} 是只读的")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} 是只读的")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class NameLayer(_Frozen):
+    """advanced 模式的一个名字图层：文本模板（{name} 换成说话人）、绝对坐标、字体、颜色"""
+
+    __slots__ = ("template", "position", "font", "color")
+    template: str
+    position: Tuple[float, float]
+    font: FontType
+    color: Color
+
+    def __init__(self, template: str, position: Tuple[float, float], font: FontType, color: Color):
+        self._init(template=template, position=position, font=font, color=color)
+
+
+class RenderSpec(_Frozen):
+    """
+    一个角色当前配置下的全部排版参数。
+    name_layers 为 None 表示不使用 advanced 名字图层；其中某个说话人的值为 None 表示配置不是列表
+    （与旧实现一样不画图层，回退到 basic 名字）。
+    """
+
+    __slots__ = (
+        "text_font",
+        "text_color",
+        "line_height",
+        "text_area",
+        "max_width",
+        "lines_per_page",
+        "wrapper",
+        "default_speaker",
+        "name_pos",
+        "name_font",
+        "name_color",
+        "name_layers",
+        "crop_area",
+    )
+    text_font: FontType
+    text_color: Color
+    line_height: Union[int, float]
+    text_area: Tuple[Any, Any, Any, Any]
+    max_width: Any
+    lines_per_page: int
+    wrapper: Tuple[str, str]
+    default_speaker: Optional[str]
+    name_pos: Tuple[Any, Any]
+    name_font: FontType
+    name_color: Color
+    name_layers: Optional[Dict[str, Optional[Tuple[NameLayer, ...]]]]
+    crop_area: Optional[Tuple[int, int, int, int]]
+
+    def __init__(
+        self,
+        *,
+        text_font: FontType,
+        text_color: Color,
+        line_height: Union[int, float],
+        text_area: Tuple[Any, Any, Any, Any],
+        wrapper: Tuple[str, str],
+        default_speaker: Optional[str],
+        name_pos: Tuple[Any, Any],
+        name_font: FontType,
+        name_color: Color,
+        name_layers: Optional[Dict[str, Optional[Tuple[NameLayer, ...]]]],
+        crop_area: Optional[Tuple[int, int, int, int]],
+    ):
+        self._init(
+            text_font=text_font,
+            text_color=text_color,
+            line_height=line_height,
+            text_area=text_area,
+            max_width=max(10, text_area[2] - text_area[0]),
+            lines_per_page=_lines_per_page(text_area, line_height),
+            wrapper=wrapper,
+            default_speaker=default_speaker,
+            name_pos=name_pos,
+            name_font=name_font,
+            name_color=name_color,
+            name_layers=name_layers,
+            crop_area=crop_area,
+        )
+
+    def replace(self, **changes: Any) -> "RenderSpec":
+        """返回替换了部分字段的新 spec（原对象不变）"""
+        fields = {name: getattr(self, name) for name in self.__slots__ if name not in _DERIVED_FIELDS}
+        fields.update(changes)
+        return RenderSpec(**fields)
+
+    def fonts(self) -> Tuple[FontType, ...]:
+        """正文、名字以及所有名字图层用到的字体（去重）"""
+        fonts: Dict[int, FontType] = {id(self.text_font): self.text_font, id(self.name_font): self.name_font}
+        for layers in (self.name_layers or {}).values():
+            for layer in layers or ():
+                fonts.setdefault(id(layer.font), layer.font)
+        return tuple(fonts.values())
@@ -1,20 +1,48 @@
 import os
 import json
-from typing import Dict, Optional, Tuple, Any, List, Union
+import math
+from typing import Dict, Optional, Set, Tuple, Any, List, Union
 
 import yaml
 from PIL import Image, ImageDraw, ImageFont
+from PIL import __version__ as PILLOW_VERSION
 
 FontType = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+# 一次文字绘制: (坐标, 文本, 字体, 颜色)
+TextOp = Tuple[Tuple[float, float], str, FontType, Tuple[int, int, int]]
 
 try:
     from .utils import (
         load_global_config,
         normalize_layout,
         normalize_style,
-        DEFAULT_CANVAS_SIZE
+        DEFAULT_CANVAS_SIZE,
+        CACHE_FORMAT_EXTENSIONS,
+        CACHE_LAYOUTS,
+        COMPOSITE_LAYOUT_KEYS,
     )
+    from .text_layout import get_advance_cache, wrap_text
+    from .font_registry import font_lock, load_font
+    from .glyph_atlas import draw_text, get_glyph_atlas, warm_up
+    from .canvas_cache import CanvasCache
+    from .assets import AssetHandle
+    from .raw_canvas import close_raw_canvas, is_raw_canvas, open_raw_canvas
+    from .render_cache import normalize_text, result_key
+    from .render_spec import NameLayer, RenderSpec
+    from .pagination import PagedRender
+    from .tracing import span, traced
 except Exception:  # pragma: no cover - fallback for standalone runs
+    from text_layout import get_advance_cache, wrap_text  # type: ignore[no-redef]
+    from font_registry import font_lock, load_font  # type: ignore[no-redef]
+    from glyph_atlas import draw_text, get_glyph_atlas, warm_up  # type: ignore[no-redef]
+    from canvas_cache import CanvasCache  # type: ignore[no-redef]
+    from assets import AssetHandle  # type: ignore[no-redef]
+    from raw_canvas import close_raw_canvas, is_raw_canvas, open_raw_canvas  # type: ignore[no-redef]
+    from render_cache import normalize_text, result_key  # type: ignore[no-redef]
+    from render_spec import NameLayer, RenderSpec  # type: ignore[no-redef]
+    from pagination import PagedRender  # type: ignore[no-redef]
+    from tracing import span, traced  # type: ignore[no-redef]
+
     def load_global_config() -> Dict[str, object]:
         return {}
 
@@ -25,19 +53,106 @@ except Exception:  # pragma: no cover - fallback for standalone runs
         return style or {}
 
     DEFAULT_CANVAS_SIZE = (2560, 1440)
+    CACHE_FORMAT_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "raw": ".rgba"}
+    CACHE_LAYOUTS = ("matrix", "layered")
+    COMPOSITE_LAYOUT_KEYS = ("_canvas_size", "stand_pos", "stand_scale", "stand_on_top", "box_pos")
+
+COMPOSITING_MODES = {"full", "dirty_region"}
+# 底图变体：预生成缓存烘焙了默认名字时，其他说话人的台词改用不含名字的底图
+PLAIN_CANVAS = "plain"
+
 
-def _load_render_config() -> Tuple[Tuple[int, int], str, str, bool]:
+def _load_render_config() -> Tuple[Tuple[int, int], str, str, str, bool, str, int, int, int, int]:
     cfg:dict = load_global_config() or {}
     render = cfg.get("render", {})
     canvas_size = DEFAULT_CANVAS_SIZE
     cache_format = str(render.get("cache_format", "jpeg")).lower()
-    if cache_format not in {"jpeg", "png"}:
+    if cache_format not in CACHE_FORMAT_EXTENSIONS:
         cache_format = "jpeg"
-    cache_ext = ".jpg" if cache_format == "jpeg" else ".png"
+    cache_ext = CACHE_FORMAT_EXTENSIONS[cache_format]
+    cache_layout = str(render.get("cache_layout", "matrix")).lower()
+    if cache_layout not in CACHE_LAYOUTS:
+        cache_layout = "matrix"
     use_memory = bool(render.get("use_memory_canvas_cache", True))
-    return canvas_size, cache_format, cache_ext, use_memory
+    compositing = str(render.get("compositing", "full")).lower()
+    if compositing not in COMPOSITING_MODES:
+        compositing = "full"
+    try:
+        memory_cache_mb = int(render.get("memory_cache_mb", 512))
+    except (TypeError, ValueError):
+        memory_cache_mb = 512
+    try:
+        glyph_atlas_mb = int(render.get("glyph_atlas_mb", 32))
+    except (TypeError, ValueError):
+        glyph_atlas_mb = 32
+    try:
+        page_workers = int(render.get("page_workers", 0))
+    except (TypeError, ValueError):
+        page_workers = 0
+    try:
+        jpeg_quality = int(render.get("jpeg_quality", 90))
+    except (TypeError, ValueError):
+        jpeg_quality = 90
+    return (
+        canvas_size, cache_format, cache_ext, cache_layout, use_memory, compositing,
+        memory_cache_mb, glyph_atlas_mb, page_workers, jpeg_quality,
+    )
+
+
+# 截短 PNG 解码依赖 Pillow 的 tile / _size 内部结构，只在确认过布局的版本上启用
+_TRUNCATED_DECODE = (9, 0) <= tuple(int(p) for p in PILLOW_VERSION.split(".")[:2]) < (12, 0)
+
+
+def _decode_rows(img: Image.Image, rows: int) -> Image.Image:
+    """
+    只解码图片的前 rows 行（返回图像高度为 rows，坐标与原图一致）。
+    非隔行 PNG 是逐行顺序解码的，截短 tile 后解码器会提前结束；
+    JPEG 等格式无法中途停止（libjpeg 会报数据流不完整），
+    其他 Pillow 版本也不改动内部结构，都退回完整解码后再裁掉多余的行。
+    """
+    rows = min(rows, img.height)
+    if (
+        _TRUNCATED_DECODE
+        and img.format == "PNG"
+        and 0 < rows < img.height
+        and len(img.tile) == 1
+        and len(img.tile[0]) == 4
+        and img.tile[0][0] == "zip"
+        and not img.info.get("interlace")
+        and hasattr(img, "_size")
+    ):
+        decoder, _, offset, args = img.tile[0]
+        img.tile = [(decoder, (0, 0, img.width, rows), offset, args)]
+        img._size = (img.width, rows)
+        return img.convert("RGBA")
+    full = img.convert("RGBA")
+    return full if rows >= full.height or rows <= 0 else full.crop((0, 0, full.width, rows))
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _dir_signature(path: str) -> Optional[Tuple[Tuple[str, int, int], ...]]:
+    try:
+        with os.scandir(path) as it:
+            entries = [(e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in it if e.is_file()]
+    except OSError:
+        return None
+    return tuple(sorted(entries))
+
 
-CANVAS_SIZE, CACHE_FORMAT, CACHE_EXT, USE_MEMORY_CACHE = _load_render_config()
+def _reuse_handle(
+    handle: Optional[AssetHandle], path: str, transform: Optional[Any] = None
+) -> AssetHandle:
+    """路径相同且文件未变化时复用旧句柄（保留已解码的像素），否则新建"""
+    if handle is not None and handle.path == path and not handle.is_stale():
+        return handle
+    return AssetHandle(path, transform)
 
 
 class CharacterRenderer:
@@ -51,50 +166,186 @@ class CharacterRenderer:
             self.base_path, "common", "fonts", self.default_font_name
         )
 
-        self.canvas_size = CANVAS_SIZE
-        self.cache_ext = CACHE_EXT
-        self.use_memory_cache = USE_MEMORY_CACHE
-        self._canvas_cache: Dict[Tuple[str, str], Image.Image] = {}
-        self._scaled_suffix = f"{self.canvas_size[0]}x{self.canvas_size[1]}"
+        # layered: 底图由 背景 / 立绘 / 对话框 图层在首次使用时合成
+        self._layer_manifest: Optional[Dict[str, Any]] = None
+        # 输出名 → 实际文件名（raw 缓存按版本号落盘，见 _meta.json 的 "file" 字段）
+        self._cache_files: Optional[Dict[str, str]] = None
+        # 底图 LRU，按字节预算淘汰；预算由 render.memory_cache_mb 设置，<= 0 表示不限容量
+        self._canvas_cache = CanvasCache(on_release=self._retire_canvas)
+        self._retired: List[Image.Image] = []
+        # 渲染配置在构造时读取，refresh() 时比较（load_global_config 按文件 mtime 缓存，不会重复解析）
+        self._render_config = _load_render_config()
+        self._apply_render_config(self._render_config)
+        # 脏区合成模式下复用的输出缓冲区
+        self._output_buffer: Optional[Image.Image] = None
+        self._output_key: Optional[Tuple[str, str, Optional[str]]] = None
+        self._dirty_boxes: List[Tuple[int, int, int, int]] = []
+        self._render_signature: Optional[str] = None
+        # (预生成底图是否烘焙了名字, 烘焙仍然有效时的默认说话人)，按需读取 _meta.json
+        self._baked_name: Optional[Tuple[bool, Optional[str]]] = None
 
         print(f"--- 开始加载角色 {char_id} ---")
 
+        self._load_config()
+        self.assets: Dict[str, Any] = {
+            "dialog_box": None,
+            "portraits": {},
+            "backgrounds": {},
+            "font": None,
+        }
+
+        self._load_resources()
+        self._asset_signature = self._scan_asset_signature()
+        print("--- 资源加载完成 ---\n")
+
+    def _apply_render_config(self, render_config: Tuple[Any, ...]) -> None:
+        (
+            self._default_canvas_size,
+            _,
+            self.cache_ext,
+            self.cache_layout,
+            self.use_memory_cache,
+            self.compositing_mode,
+            memory_cache_mb,
+            glyph_atlas_mb,
+            self.page_workers,
+            self.jpeg_quality,
+        ) = render_config
+        self._render_config = render_config
+        self._canvas_cache.set_budget(memory_cache_mb * 1024 * 1024)
+        # 字形图集是进程级的，所有渲染器共用；<= 0 时回退到 draw.text
+        get_glyph_atlas().set_budget(glyph_atlas_mb * 1024 * 1024)
+
+    def _find_config_path(self) -> str:
         yaml_path = os.path.join(self.char_root, "config.yaml")
         legacy_path = os.path.join(self.char_root, "config.json")
         config_path = yaml_path if os.path.exists(yaml_path) else legacy_path
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"未找到角色配置 {config_path}")
+        return config_path
 
+    def _load_config(self) -> None:
+        """读取角色配置并规范化 layout / style，同时记录配置文件签名供 refresh() 比较"""
+        config_path = self._find_config_path()
+        self._config_path = config_path
+        self._config_signature = _stat_signature(config_path)
         with open(config_path, "r", encoding="utf-8") as f:
             if config_path.endswith((".yaml", ".yml")):
                 self.config = yaml.safe_load(f) or {}
             else:
                 self.config = json.load(f)
+        self.canvas_size = self._default_canvas_size
         layout_raw = self.config.setdefault("layout", {})
         stored_size = self._extract_canvas_size(layout_raw.get("_canvas_size"))
         if stored_size:
             self.canvas_size = stored_size
-            self._scaled_suffix = f"{self.canvas_size[0]}x{self.canvas_size[1]}"
+        self._scaled_suffix = f"{self.canvas_size[0]}x{self.canvas_size[1]}"
         self.layout = normalize_layout(layout_raw, self.canvas_size)
         self.layout["_canvas_size"] = [self.canvas_size[0], self.canvas_size[1]]
         self.config["layout"] = self.layout
         style_raw = self.config.get("style", {})
         self.config["style"] = normalize_style(style_raw)
         self.style = self.config["style"]
-        self.assets: Dict[str, Any] = {
-            "dialog_box": None,
-            "portraits": {},
-            "backgrounds": {},
-            "font": None,
-        }
+        # 渲染路径只读 spec；配置重载时整体替换
+        self.spec = self._compile_spec()
 
-        self._load_resources()
-        print("--- 资源加载完成 ---\n")
+    # -----------------------
+    # 渲染规格
+    # -----------------------
+    def rebuild_spec(self) -> None:
+        """直接修改 self.layout / self.style 之后调用，使修改对后续渲染生效"""
+        self.spec = self._compile_spec()
+        self._render_signature = None
+        self._baked_name = None
+
+    def _compile_spec(self) -> RenderSpec:
+        """把规范化后的 layout / style 编译成 RenderSpec：字体路径、颜色、坐标和名字图层都在这里解析一次"""
+        style = self.style
+        layout = self.layout
+        basic = style.get("basic", {})
+        text_size = max(1, int(basic.get("font_size", 40)))
+        text_font = self._get_font(text_size, self._resolve_font_path(style.get("font_file")))
+        name_size = max(1, int(basic.get("name_font_size", text_size)))
+        name_pos = layout.get("name_pos", [100, 100])
+
+        wrapper = style.get("text_wrapper", {})
+        tokens = ("", "")
+        if isinstance(wrapper, dict) and wrapper.get("type", "none") != "none":
+            tokens = self._resolve_wrapper_tokens(wrapper)
+
+        crop_area = layout.get("crop_area")
+        if not (
+            layout.get("enable_crop", False)
+            and crop_area
+            and isinstance(crop_area, (list, tuple))
+            and len(crop_area) == 4
+        ):
+            crop_area = None
+
+        return RenderSpec(
+            text_font=text_font,
+            text_color=self._color_tuple(basic.get("text_color"), (255, 255, 255)),
+            line_height=self._line_height(text_font),
+            text_area=tuple(layout.get("text_area", [100, 800, 1800, 1000])),
+            wrapper=tokens,
+            default_speaker=self.config.get("meta", {}).get("name", self.char_id),
+            name_pos=(name_pos[0], name_pos[1]),
+            name_font=self._get_font(name_size, self._resolve_font_path(style.get("name_font_file"))),
+            name_color=self._color_tuple(basic.get("name_color"), (253, 145, 175)),
+            name_layers=self._compile_name_layers(name_pos) if style.get("mode") == "advanced" else None,
+            crop_area=tuple(crop_area) if crop_area is not None else None,
+        )
+
+    def _compile_name_layers(
+        self, name_pos: Tuple[float, float]
+    ) -> Optional[Dict[str, Optional[Tuple[NameLayer, ...]]]]:
+        """advanced.name_layers → {说话人: 名字图层}；配置不是列表的说话人记为 None"""
+        layers_map = self.style.get("advanced", {}).get("name_layers")
+        if not isinstance(layers_map, dict):
+            return None
+
+        base_x, base_y = float(name_pos[0]), float(name_pos[1])
+        basic = self.style.get("basic", {})
+        fallback_color = self._color_tuple(basic.get("name_color"), (255, 255, 255))
+        fallback_size = max(1, int(basic.get("name_font_size", 32)))
+        compiled: Dict[str, Optional[Tuple[NameLayer, ...]]] = {}
+        for speaker, entries in layers_map.items():
+            if not isinstance(entries, list):
+                compiled[speaker] = None
+                continue
+            layers = []
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                position = entry.get("position", [0, 0])
+                if not isinstance(position, (list, tuple)) or len(position) != 2:
+                    offset_x, offset_y = 0.0, 0.0
+                else:
+                    offset_x, offset_y = float(position[0]), float(position[1])
+
+                font_size = entry.get("font_size", fallback_size)
+                font_size = max(1, int(font_size)) if isinstance(font_size, (int, float)) else fallback_size
+                layers.append(
+                    NameLayer(
+                        str(entry.get("text", "")),
+                        (base_x + offset_x, base_y + offset_y),
+                        self._get_font(font_size, self._resolve_font_path(entry.get("font_file"))),
+                        self._color_tuple(entry.get("font_color"), fallback_color),
+                    )
+                )
+            compiled[speaker] = tuple(layers)
+        return compiled
 
     # -----------------------
     # 资源加载
     # -----------------------
-    def _load_resources(self):
+    def _load_resources(self, previous: Optional[Dict[str, Any]] = None):
+        # 立绘 / 背景 / 对话框都只登记句柄（路径、大小、mtime），像素在首次使用时才解码
+        # previous: refresh() 时传入旧的 assets，文件未变化的句柄（连同已解码的像素）原样复用
+        previous = previous or {}
+        old_portraits = previous.get("portraits") or {}
+        old_backgrounds = previous.get("backgrounds") or {}
+        self.assets["portraits"] = {}
         # 立绘
         portrait_dir = os.path.join(self.char_root, "portrait")
         if os.path.exists(portrait_dir):
@@ -103,27 +354,15 @@ class CharacterRenderer:
                 if file.lower().endswith((".png", ".jpg", ".jpeg")):
                     key = os.path.splitext(file)[0]
                     full_path = os.path.join(portrait_dir, file)
-                    portraits = self.assets.setdefault("portraits", {})
-                    portraits[key] = Image.open(full_path).convert("RGBA")  # type: ignore[index]
+                    portraits = self.assets["portraits"]
+                    portraits[key] = _reuse_handle(old_portraits.get(key), full_path)
                     count += 1
-            print(f"✅ 已加载 {count} 张立绘")
+            print(f"✅ 已索引 {count} 张立绘")
         else:
             print(f"⚠️ 警告: 找不到立绘文件夹 {portrait_dir}")
 
         # 背景（优先使用预缩放目录，再回退到角色目录 / 公共目录）
-        pre_scaled_bg_dir = os.path.join(
-            self.base_path, "pre_scaled", "characters", self.char_id, "background"
-        )
-        char_bg_dir = os.path.join(self.char_root, "background")
-        common_bg_dir = os.path.join(self.base_path, "common", "background")
-
-        bg_dirs_to_try: List[str] = []
-        if os.path.isdir(pre_scaled_bg_dir):
-            bg_dirs_to_try.append(pre_scaled_bg_dir)
-        if os.path.isdir(char_bg_dir):
-            bg_dirs_to_try.append(char_bg_dir)
-        if os.path.isdir(common_bg_dir):
-            bg_dirs_to_try.append(common_bg_dir)
+        bg_dirs_to_try = [d for d in self._background_dirs() if os.path.isdir(d)]
 
         count = 0
         self.assets["backgrounds"] = {}
@@ -144,35 +383,141 @@ class CharacterRenderer:
                 if key in self.assets["backgrounds"]:  # type: ignore[index]
                     continue
                 full_path = os.path.join(bg_dir, file)
-                img = Image.open(full_path).convert("RGBA")
-                self.assets["backgrounds"][key] = self._resize_to_canvas(img)  # type: ignore[index]
+                self.assets["backgrounds"][key] = _reuse_handle(  # type: ignore[index]
+                    old_backgrounds.get(key), full_path, self._resize_to_canvas
+                )
                 count += 1
 
         if count:
-            print(f"✅ 已加载 {count} 张背景")
+            print(f"✅ 已索引 {count} 张背景")
         else:
             print("⚠️ 警告: 找不到任何背景文件夹")
 
         # 对话框
         box_filename = self.config.get("assets", {}).get("dialog_box", "textbox_bg.png")
         box_path = os.path.join(self.char_root, box_filename)
+        self.assets["dialog_box"] = None
         if os.path.exists(box_path):
-            box_img = Image.open(box_path).convert("RGBA")
-            self.assets["dialog_box"] = self._fit_dialog_box_to_canvas(box_img)
-            print(f"✅ 对话框已加载: {box_filename}")
+            self.assets["dialog_box"] = _reuse_handle(previous.get("dialog_box"), box_path)
+            print(f"✅ 对话框已索引: {box_filename}")
         else:
             print(f"⚠️ 警告: 找不到对话框图片 {box_path}")
 
         # 字体
-        style_basic = self.style.get("basic", {})
-        font_size = int(style_basic.get("font_size", 40))
-        font_size = font_size if font_size > 0 else 40
-        text_font_file = self.style.get("font_file")
-        self.assets["font"] = self._get_font(font_size, self._resolve_font_path(text_font_file))
+        self.assets["font"] = self.spec.text_font
+
+    def _background_dirs(self) -> List[str]:
+        return [
+            os.path.join(self.base_path, "pre_scaled", "characters", self.char_id, "background"),
+            os.path.join(self.char_root, "background"),
+            os.path.join(self.base_path, "common", "background"),
+        ]
+
+    def _scan_asset_signature(self) -> Dict[str, Any]:
+        """素材目录与预生成缓存的签名：目录内每个文件的 (名称, 大小, mtime)"""
+        box_filename = self.config.get("assets", {}).get("dialog_box", "textbox_bg.png")
+        return {
+            "portraits": _dir_signature(os.path.join(self.char_root, "portrait")),
+            "backgrounds": tuple(_dir_signature(d) for d in self._background_dirs()),
+            "dialog_box": _stat_signature(os.path.join(self.char_root, box_filename)),
+            "cache": _stat_signature(os.path.join(self.base_path, "cache", self.char_id, "_meta.json")),
+        }
+
+    # -----------------------
+    # 热重载
+    # -----------------------
+    def refresh(self) -> List[str]:
+        """
+        检查全局 render 配置、角色配置、素材目录和预生成缓存是否有变化，只重载变化的部分。
+        未变化的素材句柄（连同已解码的像素）、字体和仍然有效的底图都会保留。
+        返回本次重载的部分（render / config / assets / cache），没有变化时为空列表。
+        """
+        reloaded: List[str] = []
+        old_canvas_size = self.canvas_size
+        old_composite = self._composite_layout()
+        old_render = self._render_config
+        render_config = _load_render_config()
+        if render_config != old_render:
+            self._apply_render_config(render_config)
+            reloaded.append("render")
+        if _stat_signature(self._find_config_path()) != self._config_signature:
+            self._load_config()
+            reloaded.append("config")
+
+        old_signature = self._asset_signature
+        signature = self._scan_asset_signature()
+        if not reloaded and signature == old_signature:
+            return reloaded
+        self._asset_signature = signature
+
+        # 画布尺寸变化时背景要按新尺寸缩放，句柄全部重建
+        old_assets = dict(self.assets) if self.canvas_size == old_canvas_size else {}
+        self._load_resources(previous=old_assets)
+        changed = {
+            (kind, key)
+            for kind in ("portraits", "backgrounds")
+            for key in set(old_assets.get(kind, {})) | set(self.assets[kind])
+            if old_assets.get(kind, {}).get(key) is not self.assets[kind].get(key)
+        }
+        if changed:
+            reloaded.append("assets")
+
+        if (
+            not old_assets
+            or render_config[:5] != old_render[:5]
+            or signature["cache"] != old_signature["cache"]
+            or self._composite_layout() != old_composite
+            or self.assets["dialog_box"] is not old_assets["dialog_box"]
+        ):
+            # 缓存格式 / 组织方式变化、预生成缓存被重建、合成布局或对话框变化：底图全部重新读取
+            self._reset_canvases()
+            reloaded.append("cache")
+        elif changed:
+            self._discard_canvases(changed)
+        self._render_signature = None
+        self._baked_name = None
+        self._output_buffer = None
+        self._output_key = None
+        self._close_retired()
+        return reloaded
+
+    def _composite_layout(self) -> Dict[str, Any]:
+        return {key: self.layout.get(key) for key in COMPOSITE_LAYOUT_KEYS}
+
+    def _reset_canvases(self) -> None:
+        self._canvas_cache.clear()
+        self._layer_manifest = None
+        self._cache_files = None
+
+    def _retire_canvas(self, img: Image.Image) -> None:
+        """底图离开内存缓存：raw 映射等本次渲染结束再关闭（同一次合成里可能还在使用）"""
+        if is_raw_canvas(img):
+            self._retired.append(img)
+
+    def _close_retired(self) -> None:
+        # Windows 上映射中的缓存文件无法删除，预生成清理旧版本前需要尽快解除映射
+        while self._retired:
+            close_raw_canvas(self._retired.pop())
+
+    def _discard_canvases(self, changed: Set[Tuple[str, str]]) -> None:
+        """丢弃用到已变化立绘 / 背景的底图与图层"""
+        portraits = {key for kind, key in changed if kind == "portraits"}
+        backgrounds = {key for kind, key in changed if kind == "backgrounds"}
+
+        def uses_changed(key: Any) -> bool:
+            if key[0] is None:
+                _, kind, name = key
+                return (kind == "portrait" and name in portraits) or (
+                    kind == "background" and name in backgrounds
+                )
+            return key[0] in portraits or key[1] in backgrounds
+
+        self._canvas_cache.discard_where(uses_changed)
 
     # -----------------------
     # 渲染主流程
     # -----------------------
+    @traced("render")
     def render(
         self,
         text: str,
@@ -180,52 +525,358 @@ class CharacterRenderer:
         bg_key: Optional[str] = None,
         speaker_name: Optional[str] = None,
     ) -> Image.Image:
+        """
+        渲染一张对话图。
+        compositing=dirty_region 时返回的是复用的输出缓冲区，下次 render() 会覆盖其内容，
+        需要长期持有结果时请自行 copy()。
+        """
+        portrait_key, bg_key = self._resolve_keys(portrait_key, bg_key)
+        with_name, variant = self._name_mode(speaker_name)
+        ops = self._layout_text(text, speaker_name, with_name=with_name)
+        try:
+            if self.spec.crop_area is not None:
+                cropped = self._render_cropped(portrait_key, bg_key, ops, variant)
+                if cropped is not None:
+                    return cropped
+
+            if self.compositing_mode == "dirty_region":
+                canvas = self._render_dirty_region(portrait_key, bg_key, ops, variant)
+            else:
+                base = self._get_base_canvas(portrait_key, bg_key, variant)
+                with span("render.copy"):
+                    canvas = base.copy()
+                with span("render.draw"):
+                    self._draw_ops(ImageDraw.Draw(canvas), ops)
+            return canvas
+        finally:
+            self._close_retired()
+
+    def render_pages(
+        self,
+        text: str,
+        portrait_key: Optional[str] = None,
+        bg_key: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+        workers: Optional[int] = None,
+        pages: Optional[List[List[TextOp]]] = None,
+    ) -> PagedRender:
+        """
+        分页渲染：整段文字排版一次，按 text_area 能容纳的行数切页，每页都是一张完整的对话图。
+        返回按页序迭代的 PagedRender，第一页画完即可取出；各页共用同一张底图，互不覆盖。
+        workers 为 None 时读取 render.page_workers。
+        pages 为同一段文字、同一说话人的 layout_pages() 结果时直接使用，不再重新排版。
+        """
+        portrait_key, bg_key = self._resolve_keys(portrait_key, bg_key)
+        with_name, variant = self._name_mode(speaker_name)
+        if pages is None:
+            pages = self._layout_pages(text, speaker_name, with_name=with_name)
+        base = self._get_base_canvas(portrait_key, bg_key, variant)
+        if is_raw_canvas(base):
+            # 各页在 render_pages 返回后才绘制，期间映射可能随缓存淘汰被关闭，先复制一份
+            base = base.copy()
+        self._close_retired()
+        box = self._crop_window(base.size)
+
+        def render_page(ops: List[TextOp]) -> Image.Image:
+            if box is not None:
+                return self._compose_region(base, box, ops)
+            canvas = base.copy()
+            self._draw_ops(ImageDraw.Draw(canvas), ops)
+            return canvas
+
+        return PagedRender(render_page, pages, self.page_workers if workers is None else workers)
+
+    def layout_pages(self, text: str, speaker_name: Optional[str] = None) -> List[List[TextOp]]:
+        """
+        分页排版：每页一组绘制操作，len() 即页数。
+        先判断页数再分页渲染时，把结果传给 render_pages(pages=...)，整段文字只排版一次。
+        """
+        with_name, _ = self._name_mode(speaker_name)
+        return self._layout_pages(text, speaker_name, with_name=with_name)
+
+    def page_count(self, text: str, speaker_name: Optional[str] = None) -> int:
+        """分页渲染时这段文字会占几页"""
+        return len(self._layout_pages(text, speaker_name, with_name=False))
+
+    def _resolve_keys(self, portrait_key: Optional[str], bg_key: Optional[str]) -> Tuple[str, str]:
         portrait_key = portrait_key or self._first_key(self.assets["portraits"])
         bg_key = bg_key or self._first_key(self.assets["backgrounds"])
         if not portrait_key or not bg_key:
             raise ValueError("无法渲染: 未提供立绘或背景")
-        canvas = self._get_base_canvas(portrait_key, bg_key).copy()
-        draw = ImageDraw.Draw(canvas)
-        self._draw_text(draw, text, speaker_name)
+        return portrait_key, bg_key
+
+    def _name_mode(self, speaker_name: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """(是否需要绘制名字, 底图变体)"""
+        # 底图已烘焙默认名字时只画正文；换了说话人则用不含名字的底图，名字照常绘制
+        baked, baked_speaker = self._baked_name_state()
+        with_name = not baked or baked_speaker is None or self._speaker(speaker_name) != baked_speaker
+        return with_name, PLAIN_CANVAS if baked and with_name else None
+
+    @traced("render.base_canvas")
+    def _get_base_canvas(self, portrait_key: str, bg_key: str, variant: Optional[str] = None) -> Image.Image:
+        cache_key: Tuple[Any, ...] = (portrait_key, bg_key) if variant is None else (portrait_key, bg_key, variant)
+        if self.use_memory_cache:
+            cached = self._canvas_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
-        # 应用裁剪（如果启用）
-        canvas = self._apply_crop(canvas)
-        return canvas
+        if variant == PLAIN_CANVAS:
+            # 预生成底图里带着默认名字，不含名字的底图只能实时合成
+            img = self._realtime_render(portrait_key, bg_key)
+        else:
+            img = self._compose_layers(portrait_key, bg_key) if self.cache_layout == "layered" else None
+        if img is None:
+            cache_path = self._cache_file_path(portrait_key, bg_key)
+            if cache_path:
+                img = self._open_cache_file(cache_path)
+            else:
+                img = self._realtime_render(portrait_key, bg_key)
+                if self._baked_name_state()[1] is not None:
+                    # 缺失的底图实时补上时也带上名字，与其它预生成底图保持一致
+                    self._draw_ops(ImageDraw.Draw(img), self._layout_name(None))
+        if self.use_memory_cache:
+            self._canvas_cache.put(cache_key, img)
+        return img
+
+    def pin_expression(self, portrait_key: Optional[str]) -> None:
+        """钉住当前表情的所有底图，使其不被 LRU 淘汰；传 None 取消钉住"""
+        if portrait_key is None:
+            self._canvas_cache.set_pin_filter(None)
+        else:
+            portrait_layer = (None, "portrait", portrait_key)
+            self._canvas_cache.set_pin_filter(
+                lambda key: key[0] == portrait_key or key == portrait_layer
+            )
+
+    def result_key(
+        self,
+        text: str,
+        portrait_key: Optional[str] = None,
+        bg_key: Optional[str] = None,
+        speaker_name: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        渲染结果缓存键：规范化文本 + 表情 + 背景 + 样式/布局/底图缓存签名 + 立绘/背景源文件签名。
+        找不到对应素材时返回 None（不缓存）。
+        """
+        portrait_key = portrait_key or self._first_key(self.assets["portraits"])
+        bg_key = bg_key or self._first_key(self.assets["backgrounds"])
+        portrait = self.assets["portraits"].get(portrait_key)
+        background = self.assets["backgrounds"].get(bg_key)
+        if portrait is None or background is None:
+            return None
+        return result_key(
+            normalize_text(text),
+            speaker_name,
+            portrait_key,
+            bg_key,
+            self._get_render_signature(),
+            (portrait.path, portrait.file_size, portrait.mtime_ns),
+            (background.path, background.file_size, background.mtime_ns),
+        )
 
-    def _get_base_canvas(self, portrait_key: str, bg_key: str) -> Image.Image:
-        cache_key = (portrait_key, bg_key)
-        if self.use_memory_cache and cache_key in self._canvas_cache:
-            return self._canvas_cache[cache_key]
+    def _get_render_signature(self) -> str:
+        """
+        影响输出像素的配置与文件：样式、布局、画布、对话框和字体，
+        以及底图缓存的编码（jpeg 的压缩噪点会进入输出）和预生成缓存的 _meta.json（重新预生成后键随之改变）
+        """
+        if self._render_signature is None:
+            files = []
+            box = self.assets.get("dialog_box")
+            if box is not None:
+                files.append((box.path, box.file_size, box.mtime_ns))
+            for font_path in sorted({path for _, path in self.font_cache if path}):
+                try:
+                    stat = os.stat(font_path)
+                    files.append((font_path, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    files.append((font_path, None, None))
+            self._render_signature = result_key(
+                json.dumps(self.style, sort_keys=True, default=str),
+                json.dumps(self.layout, sort_keys=True, default=str),
+                self.canvas_size,
+                self.cache_layout,
+                self.cache_ext,
+                self.jpeg_quality if self.cache_ext == CACHE_FORMAT_EXTENSIONS["jpeg"] else None,
+                self._asset_signature["cache"],
+                files,
+            )
+        return self._render_signature
+
+    def warm_glyph_atlas(self, limit: int) -> int:
+        """按字符频率表为正文和名字字体预先光栅化最常用的 limit 个字形，返回新加入图集的数量"""
+        return warm_up(self.spec.fonts(), limit)
+
+    def canvas_cache_stats(self) -> Dict[str, int]:
+        """底图缓存的命中 / 未命中 / 淘汰计数与占用字节数"""
+        return self._canvas_cache.stats()
 
+    @staticmethod
+    @traced("render.decode_cache")
+    def _open_cache_file(cache_path: str) -> Image.Image:
+        if cache_path.endswith(CACHE_FORMAT_EXTENSIONS["raw"]):
+            # raw 缓存直接 mmap + 零拷贝包装，命中只需缺页换入
+            return open_raw_canvas(cache_path)
+        return Image.open(cache_path).convert("RGBA")
+
+    def _cache_file_path(self, portrait_key: str, bg_key: str) -> Optional[str]:
+        if self.cache_layout == "layered":
+            return None
         filename = f"p_{portrait_key}__b_{bg_key}{self.cache_ext}"
+        filename = self._load_cache_files().get(filename, filename)
         cache_path = os.path.join(self.base_path, "cache", self.char_id, filename)
-
         if os.path.exists(cache_path):
-            img = Image.open(cache_path).convert("RGBA")
-            if self.use_memory_cache:
-                self._canvas_cache[cache_key] = img
-            return img
+            return cache_path
 
         # 兼容旧缓存扩展名
         legacy_path = cache_path[:-len(self.cache_ext)] + ".png"
-        if not os.path.exists(cache_path) and os.path.exists(legacy_path):
-            img = Image.open(legacy_path).convert("RGBA")
+        if os.path.exists(legacy_path):
+            return legacy_path
+        return None
+
+    def _load_cache_files(self) -> Dict[str, str]:
+        if self._cache_files is None:
+            outputs = self._read_cache_meta().get("outputs") or {}
+            self._cache_files = {
+                name: entry["file"]
+                for name, entry in outputs.items()
+                if isinstance(entry, dict) and isinstance(entry.get("file"), str)
+            }
+        return self._cache_files
+
+    def _read_cache_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.base_path, "cache", self.char_id, "_meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return meta if isinstance(meta, dict) else {}
+
+    def _load_layer_manifest(self) -> Dict[str, Any]:
+        """读取 layered 缓存的图层清单：{kind: {key: (路径, 偏移)}}，缓存不可用时为空"""
+        if self._layer_manifest is not None:
+            return self._layer_manifest
+
+        manifest: Dict[str, Any] = {"background": {}, "portrait": {}, "box": {}}
+        cache_dir = os.path.join(self.base_path, "cache", self.char_id)
+        meta = self._read_cache_meta()
+        if (
+            meta.get("cache_layout") == "layered"
+            and tuple(meta.get("canvas_size", ())) == tuple(self.canvas_size)
+        ):
+            for name, entry in (meta.get("outputs") or {}).items():
+                kind = entry.get("kind")
+                if kind in manifest:
+                    offset = tuple(entry.get("offset", (0, 0)))
+                    path = os.path.join(cache_dir, entry.get("file", name))
+                    manifest[kind][entry.get("key", "")] = (path, offset)
+        self._layer_manifest = manifest
+        return manifest
+
+    def _get_layer(self, kind: str, key: str) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        entry = self._load_layer_manifest()[kind].get(key)
+        if entry is None:
+            return None
+        path, offset = entry
+        cache_key = (None, kind, key)
+        img = self._canvas_cache.get(cache_key) if self.use_memory_cache else None
+        if img is None:
+            if not os.path.exists(path):
+                return None
+            img = self._open_cache_file(path)
             if self.use_memory_cache:
-                self._canvas_cache[cache_key] = img
-            return img
+                self._canvas_cache.put(cache_key, img)
+        return img, offset
+
+    @traced("render.compose_layers")
+    def _compose_layers(self, portrait_key: str, bg_key: str) -> Optional[Image.Image]:
+        """
+        用 layered 缓存合成底图；任一图层缺失时返回 None（回退到实时渲染）。
+        粘贴顺序与预生成整图完全相同，png / raw 格式下与 matrix 缓存逐像素一致。
+        """
+        bg = self._get_layer("background", bg_key)
+        portrait = self._get_layer("portrait", portrait_key)
+        box = self._get_layer("box", "")
+        if bg is None or portrait is None or box is None:
+            return None
+
+        canvas = bg[0].copy()
+        sprite, (dx, dy) = portrait
+        stand_x, stand_y = self.layout.get("stand_pos", (0, 0))
+        sprite_pos = (int(stand_x) + dx, int(stand_y) + dy)
+        box_img = box[0]
+        box_pos = self._resolve_box_position(box_img)
+
+        if self.layout.get("stand_on_top", False):
+            canvas.paste(box_img, box_pos, box_img)
+            canvas.paste(sprite, sprite_pos, sprite)
+        else:
+            canvas.paste(sprite, sprite_pos, sprite)
+            canvas.paste(box_img, box_pos, box_img)
+        return canvas
 
-        img = self._realtime_render(portrait_key, bg_key)
-        if self.use_memory_cache:
-            self._canvas_cache[cache_key] = img
-        return img
+    def _resolve_box_position(self, box_img: Image.Image) -> Tuple[int, int]:
+        canvas_w, canvas_h = self.canvas_size
+        pos = self.layout.get("box_pos")
+        if (
+            isinstance(pos, (list, tuple))
+            and len(pos) == 2
+        ):
+            x = max(-box_img.width, min(int(pos[0]), canvas_w))
+            y = max(-box_img.height, min(int(pos[1]), canvas_h))
+            return x, y
+        return (0, canvas_h - box_img.height)
 
+    @traced("render.crop")
+    def _render_cropped(
+        self,
+        portrait_key: str,
+        bg_key: str,
+        ops: List[TextOp],
+        variant: Optional[str] = None,
+    ) -> Optional[Image.Image]:
+        """
+        先裁剪后绘制：只取裁剪窗口内的底图像素，文字坐标平移到裁剪空间。
+        结果与整图绘制后再 _apply_crop 逐像素一致；未启用裁剪时返回 None。
+        """
+        lazy: Optional[Image.Image] = None
+        mapped: Optional[Image.Image] = None
+        cache_path = None if self.use_memory_cache or variant else self._cache_file_path(portrait_key, bg_key)
+        if cache_path and cache_path.endswith(CACHE_FORMAT_EXTENSIONS["raw"]):
+            # raw 缓存按需换入，裁剪只会触及窗口所在的页
+            mapped = open_raw_canvas(cache_path)
+            source = mapped
+        elif cache_path:
+            lazy = Image.open(cache_path)
+            source = lazy
+        else:
+            source = self._get_base_canvas(portrait_key, bg_key, variant)
+
+        # 直接读磁盘缓存时，裁剪结果是副本：用完立即关闭文件 / 解除映射，
+        # 否则每次渲染都会留下一个句柄，Windows 上预生成也无法替换这个缓存文件
+        try:
+            box = self._crop_window(source.size)
+            if box is None:
+                return None
+            if lazy is not None:
+                # 不走内存缓存时，磁盘缓存只解码到裁剪窗口底边所在的行
+                source = _decode_rows(lazy, box[3])
+            return self._compose_region(source, box, ops)
+        finally:
+            if lazy is not None:
+                lazy.close()
+            if mapped is not None:
+                close_raw_canvas(mapped)
+
+    @traced("render.realtime")
     def _realtime_render(self, portrait_key: str, bg_key: str) -> Image.Image:
         canvas_w, canvas_h = self.canvas_size
         canvas = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
 
         # 背景
-        bg = self.assets["backgrounds"].get(bg_key) or self._first_value(self.assets["backgrounds"])
-        if bg:
+        bg_handle = self.assets["backgrounds"].get(bg_key) or self._first_value(self.assets["backgrounds"])
+        if bg_handle:
+            bg = bg_handle.image
             bg_resized = bg.resize((canvas_w, canvas_h), Image.Resampling.LANCZOS)
             canvas.paste(bg_resized, (0, 0))
 
@@ -233,7 +884,8 @@ class CharacterRenderer:
 
         # 立绘
         stand_pos = tuple(layout.get("stand_pos", (0, 0)))
-        portrait = self.assets["portraits"].get(portrait_key) or self._first_value(self.assets["portraits"])
+        portrait_handle = self.assets["portraits"].get(portrait_key) or self._first_value(self.assets["portraits"])
+        portrait: Optional[Image.Image] = portrait_handle.image if portrait_handle else None
         if portrait:
             stand_scale = layout.get("stand_scale", 1.0)
             if stand_scale != 1.0:
@@ -241,12 +893,13 @@ class CharacterRenderer:
                 new_h = int(portrait.height * stand_scale)
                 portrait = portrait.resize((new_w, new_h), Image.Resampling.LANCZOS)
 
-        # 对话框：拉满宽度并贴底
-        dialog_box = self.assets.get("dialog_box")
-        if dialog_box:
-            dialog_box, box_pos = self._fit_dialog_box_to_canvas(dialog_box)
-        else:
-            box_pos = (0, 0)
+        # 对话框：拉满宽度，按 layout.box_pos 放置（未配置时贴底），与预生成底图的合成方式相同
+        box_handle = self.assets.get("dialog_box")
+        dialog_box: Optional[Image.Image] = None
+        box_pos = (0, 0)
+        if box_handle:
+            dialog_box, _ = self._fit_dialog_box_to_canvas(box_handle.image)
+            box_pos = self._resolve_box_position(dialog_box)
 
         stand_on_top = layout.get("stand_on_top", False)
         if not stand_on_top:
@@ -269,32 +922,29 @@ class CharacterRenderer:
 
     def _apply_crop(self, canvas: Image.Image) -> Image.Image:
         """应用裁剪区域（如果启用）"""
-        layout = self.layout
-        enable_crop = layout.get("enable_crop", False)
-
-        if not enable_crop:
+        box = self._crop_window(canvas.size)
+        if box is None:
             return canvas
+        return canvas.crop(box)
 
-        crop_area = layout.get("crop_area")
-        if not crop_area or not isinstance(crop_area, (list, tuple)) or len(crop_area) != 4:
-            return canvas
+    def _crop_window(self, canvas_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """计算裁剪窗口（夹紧到画布范围内）；未启用或区域无效时返回 None"""
+        crop_area = self.spec.crop_area
+        if crop_area is None:
+            return None
 
         x1, y1, x2, y2 = crop_area
 
         # 确保裁剪区域在画布范围内
-        canvas_w, canvas_h = canvas.size
+        canvas_w, canvas_h = canvas_size
         x1 = max(0, min(x1, canvas_w))
         y1 = max(0, min(y1, canvas_h))
         x2 = max(x1, min(x2, canvas_w))
         y2 = max(y1, min(y2, canvas_h))
 
-        # 裁剪图片
         if x2 > x1 and y2 > y1:
-            cropped = canvas.crop((x1, y1, x2, y2))
-            print(f"✂️ 已裁剪图片: ({x1}, {y1}) → ({x2}, {y2}), 输出尺寸: {cropped.size}")
-            return cropped
-
-        return canvas
+            return x1, y1, x2, y2
+        return None
 
     def _fit_dialog_box_to_canvas(self, box_img: Image.Image) -> Tuple[Image.Image, Tuple[int, int]]:
         """Resize dialog box to canvas width and bottom align."""
@@ -310,57 +960,227 @@ class CharacterRenderer:
     # 文本绘制
     # -----------------------
     def _draw_text(self, draw: ImageDraw.ImageDraw, text: str, speaker_name: Optional[str]):
-        style = self.style
-        basic = style.get("basic", {})
-        text_color = self._color_tuple(basic.get("text_color"), (255, 255, 255))
-        name_color = self._color_tuple(basic.get("name_color"), (253, 145, 175))
-        text_size = max(1, int(basic.get("font_size", 40)))
-        name_size = max(1, int(basic.get("name_font_size", text_size)))
-
-        font_text_path = self._resolve_font_path(style.get("font_file"))
-        font_name_path = self._resolve_font_path(style.get("name_font_file"))
-        font_text: FontType = self._get_font(text_size, font_text_path)
-        font_name: FontType = self._get_font(name_size, font_name_path)
+        self._draw_ops(draw, self._layout_text(text, speaker_name))
+
+    @traced("render.layout_text")
+    def _layout_text(self, text: str, speaker_name: Optional[str], with_name: bool = True) -> List[TextOp]:
+        """
+        排版名字与正文，返回待绘制的文字操作列表（不触碰像素）；with_name=False 时只排正文。
+        超出 text_area 的行被截断，需要完整显示时用 render_pages()。
+        """
+        spec = self.spec
+        ops: List[TextOp] = self._layout_name(speaker_name, spec) if with_name else []
+        lines = self._body_lines(text, spec)
+        ops.extend(self._place_lines(lines[:spec.lines_per_page], spec))
+        return ops
+
+    @traced("render.layout_pages")
+    def _layout_pages(self, text: str, speaker_name: Optional[str], with_name: bool = True) -> List[List[TextOp]]:
+        """整段文字排版一次后按页切分；每页都带名字，至少一页"""
+        spec = self.spec
+        name_ops = self._layout_name(speaker_name, spec) if with_name else []
+        lines = self._body_lines(text, spec)
+        per_page = max(1, spec.lines_per_page)
+        return [
+            name_ops + self._place_lines(lines[start:start + per_page], spec)
+            for start in range(0, max(len(lines), 1), per_page)
+        ]
+
+    def _body_lines(self, text: str, spec: RenderSpec) -> List[str]:
+        prefix, suffix = spec.wrapper
+        if prefix or suffix:
+            text = f"{prefix}{text}{suffix}"
+        return self._wrap_text(text, spec.text_font, spec.max_width)
 
-        layout = self.layout
-        text_area = layout.get("text_area", [100, 800, 1800, 1000])
-        name_pos: Tuple[float, float] = layout.get("name_pos", [100, 100])
+    @staticmethod
+    def _place_lines(lines: List[str], spec: RenderSpec) -> List[TextOp]:
+        x1, y1, _, _ = spec.text_area
+        return [((x1, y1 + i * spec.line_height), line, spec.text_font, spec.text_color) for i, line in enumerate(lines)]
 
+    def _speaker(self, speaker_name: Optional[str]) -> Optional[str]:
         if speaker_name is None:
-            speaker_name = self.config.get("meta", {}).get("name", self.char_id)
-
-        # 名字
-        name_drawn = False
-        if style.get("mode") == "advanced":
-            name_drawn = self._draw_advanced_name(draw, speaker_name, name_pos)
-        if not name_drawn:
-            self._draw_basic_name(draw, speaker_name, name_pos, font_name, name_color)
-
-        # 正文
-        text = self._apply_text_wrapper(text, style)
-        x1, y1, x2, y2 = text_area
-        max_width = max(10, x2 - x1)
-        lines = self._wrap_text(text, draw, font_text, max_width)
-        line_height = self._line_height(font_text)
-
-        for i, line in enumerate(lines):
-            y = y1 + i * line_height
-            if y > y2 - line_height:
-                break
-            draw.text((x1, y), line, font=font_text, fill=text_color)
-
-    def _apply_text_wrapper(self, text: str, style: Dict[str, Any]) -> str:
-        wrapper = style.get("text_wrapper", {})
-        if not isinstance(wrapper, dict):
-            return text
-        prefix, suffix = self._resolve_wrapper_tokens(wrapper)
-        w_type = wrapper.get("type", "none")
-        if w_type == "none" or (not prefix and not suffix):
-            return text
+            return self.spec.default_speaker
+        return speaker_name
+
+    def _layout_name(self, speaker_name: Optional[str], spec: Optional[RenderSpec] = None) -> List[TextOp]:
+        """排版名字；speaker_name 为 None 时使用角色配置里的名字"""
+        spec = spec or self.spec
+        speaker_name = speaker_name if speaker_name is not None else spec.default_speaker
+
+        ops: List[TextOp] = []
+        if spec.name_layers is not None:
+            ops.extend(self._layout_advanced_name(speaker_name, spec.name_layers))
+        if not ops:
+            ops.extend(self._layout_basic_name(speaker_name, spec.name_pos, spec.name_font, spec.name_color))
+        return ops
+
+    def default_name_bake(self) -> Optional[Tuple[str, str, List[TextOp]]]:
+        """
+        默认说话人的名字：(说话人, 签名, 文字操作)，供预生成时烘焙进底图。
+        签名覆盖每个名字图层的位置、文本、字体文件与字号、颜色以及画布尺寸，
+        名字相关的样式键（name_color、name_font_size、name_font_file、name_pos、name_layers 等）
+        或字体文件一变，签名随之改变。没有名字可画时返回 None。
+        """
+        speaker = self._speaker(None)
+        ops = self._layout_name(None)
+        if not speaker or not ops:
+            return None
+        parts = []
+        for (x, y), value, font, fill in ops:
+            font_path = getattr(font, "path", None)
+            font_id = font_path if isinstance(font_path, str) else type(font).__name__
+            parts.append((x, y, value, font_id, _stat_signature(font_id), getattr(font, "size", None), tuple(fill)))
+        return str(speaker), result_key(tuple(self.canvas_size), parts), ops
+
+    def _baked_name_state(self) -> Tuple[bool, Optional[str]]:
+        """
+        (预生成底图是否烘焙了名字, 默认说话人)。烘焙的名字与当前样式不一致时说话人为 None，
+        此时所有台词都改用不含名字的底图，直到重新预生成。
+        """
+        if self._baked_name is None:
+            meta = self._read_cache_meta()
+            baked = meta.get("baked_name")
+            if (
+                self.cache_layout != "matrix"
+                or meta.get("cache_layout", "matrix") != "matrix"
+                or not isinstance(baked, dict)
+            ):
+                self._baked_name = (False, None)
+            else:
+                current = self.default_name_bake()
+                valid = (
+                    current is not None
+                    and current[1] == baked.get("signature")
+                    and current[0] == baked.get("speaker")
+                    and CACHE_FORMAT_EXTENSIONS.get(str(meta.get("cache_format"))) == self.cache_ext
+                    and tuple(meta.get("canvas_size", ())) == tuple(self.canvas_size)
+                )
+                self._baked_name = (True, current[0] if valid and current else None)
+        return self._baked_name
+
+    @staticmethod
+    def _draw_ops(
+        draw: ImageDraw.ImageDraw,
+        ops: List[TextOp],
+        origin: Tuple[int, int] = (0, 0),
+    ) -> None:
+        ox, oy = origin
+        for (x, y), value, font, fill in ops:
+            draw_text(draw, (x - ox, y - oy), value, font, fill)
 
-        if not text:
-            return f"{prefix}{suffix}" if (prefix or suffix) else text
-        return f"{prefix}{text}{suffix}"
+    @staticmethod
+    def _op_bbox(op: TextOp) -> Optional[Tuple[int, int, int, int]]:
+        """
+        文字操作可能覆盖的像素范围（保守估计，含绘制原点）。
+        getbbox 需要完整排版一遍，开销与绘制本身相当，这里用步进表宽度 + 字体度量代替，
+        四周各留一个字号的余量覆盖字形外伸与亚像素偏移。
+        """
+        (x, y), value, font, _ = op
+        if not value:
+            return None
+        fx, fy = math.floor(x), math.floor(y)
+        if isinstance(font, ImageFont.FreeTypeFont):
+            with font_lock(font):
+                ascent, descent = font.getmetrics()
+            width = get_advance_cache(font).text_width(value)
+            margin = int(font.size) + 2
+            return (
+                fx - margin,
+                fy - margin,
+                fx + int(math.ceil(width)) + margin,
+                fy + ascent + descent + margin,
+            )
+        left, top, right, bottom = font.getbbox(value)
+        return (
+            fx + min(0, int(left)) - 2,
+            fy + min(0, int(top)) - 2,
+            fx + int(math.ceil(right)) + 2,
+            fy + int(math.ceil(bottom)) + 2,
+        )
+
+    @traced("render.compose_region")
+    def _compose_region(
+        self,
+        base: Image.Image,
+        box: Tuple[int, int, int, int],
+        ops: List[TextOp],
+    ) -> Image.Image:
+        """只取底图的 box 区域并在其上绘制文字，像素与整图绘制后再裁剪一致"""
+        x1, y1, x2, y2 = box
+        visible: List[TextOp] = []
+        ox, oy = x1, y1
+        for op in ops:
+            op_box = self._op_bbox(op)
+            if op_box is None:
+                continue
+            if op_box[0] >= x2 or op_box[2] <= x1 or op_box[1] >= y2 or op_box[3] <= y1:
+                continue
+            visible.append(op)
+            # 平移后的坐标必须非负：Pillow 对负小数坐标的取整方式与正数不同
+            ox = min(ox, math.floor(op[0][0]))
+            oy = min(oy, math.floor(op[0][1]))
+
+        layer = base.crop((ox, oy, x2, y2))
+        if visible:
+            self._draw_ops(ImageDraw.Draw(layer), visible, (ox, oy))
+        if (ox, oy) != (x1, y1):
+            layer = layer.crop((x1 - ox, y1 - oy, x2 - ox, y2 - oy))
+        return layer
+
+    @traced("render.dirty_region")
+    def _render_dirty_region(
+        self,
+        portrait_key: str,
+        bg_key: str,
+        ops: List[TextOp],
+        variant: Optional[str] = None,
+    ) -> Image.Image:
+        """脏区合成：复用输出缓冲区，只还原上次写过的区域、只在文字包围盒内绘制"""
+        base = self._get_base_canvas(portrait_key, bg_key, variant)
+        buffer = self._output_buffer
+        base_key = (portrait_key, bg_key, variant)
+        if buffer is None or buffer.size != base.size or buffer.mode != base.mode:
+            buffer = base.copy()
+            self._output_buffer = buffer
+            self._dirty_boxes = []
+        elif self._output_key != base_key:
+            buffer.paste(base, (0, 0))
+            self._dirty_boxes = []
+        self._output_key = base_key
+
+        canvas_w, canvas_h = buffer.size
+        boxes = [b for b in (self._op_bbox(op) for op in ops) if b]
+        text_box: Optional[Tuple[int, int, int, int]] = None
+        if boxes:
+            text_box = (
+                max(0, min(b[0] for b in boxes)),
+                max(0, min(b[1] for b in boxes)),
+                min(canvas_w, max(b[2] for b in boxes)),
+                min(canvas_h, max(b[3] for b in boxes)),
+            )
+            if text_box[0] >= text_box[2] or text_box[1] >= text_box[3]:
+                text_box = None
+
+        # 还原上次绘制过、且不会被本次图层覆盖的区域
+        for dirty in self._dirty_boxes:
+            if text_box and self._box_contains(text_box, dirty):
+                continue
+            buffer.paste(base.crop(dirty), dirty[:2])
+
+        self._dirty_boxes = []
+        if text_box:
+            buffer.paste(self._compose_region(base, text_box, ops), text_box[:2])
+            self._dirty_boxes.append(text_box)
+        return buffer
+
+    @staticmethod
+    def _box_contains(outer: Tuple[int, int, int, int], inner: Tuple[int, int, int, int]) -> bool:
+        return (
+            outer[0] <= inner[0]
+            and outer[1] <= inner[1]
+            and outer[2] >= inner[2]
+            and outer[3] >= inner[3]
+        )
 
     def _resolve_wrapper_tokens(self, wrapper: Dict[str, Any]) -> Tuple[str, str]:
         w_type = wrapper.get("type", "none")
@@ -375,96 +1195,44 @@ class CharacterRenderer:
             return str(prefix or ""), str(suffix or "")
         return "", ""
 
-    def _draw_basic_name(
+    def _layout_basic_name(
         self,
-        draw: ImageDraw.ImageDraw,
         speaker_name: Optional[str],
         name_pos: Tuple[float, float],
         font: FontType,
         color: Tuple[int, int, int],
-    ) -> None:
+    ) -> List[TextOp]:
         if speaker_name:
-            draw.text(name_pos, speaker_name, font=font, fill=color)
+            return [((name_pos[0], name_pos[1]), speaker_name, font, color)]
+        return []
 
-    def _draw_advanced_name(
+    def _layout_advanced_name(
         self,
-        draw: ImageDraw.ImageDraw,
         speaker_name: Optional[str],
-        name_pos: Tuple[float, float],
-    ) -> bool:
-        advanced = self.style.get("advanced", {})
-        layers_map = advanced.get("name_layers")
-        if not isinstance(layers_map, dict):
-            return False
-
-        target_layers: Optional[List[Dict[str, Any]]] = None
+        layers_map: Dict[str, Optional[Tuple[NameLayer, ...]]],
+    ) -> List[TextOp]:
+        target_layers: Optional[Tuple[NameLayer, ...]] = None
         if speaker_name and speaker_name in layers_map:
             target_layers = layers_map[speaker_name]
         elif "default" in layers_map:
             target_layers = layers_map["default"]
 
-        if not isinstance(target_layers, list):
-            return False
-
-        base_x, base_y = float(name_pos[0]), float(name_pos[1])
-        basic = self.style.get("basic", {})
-        fallback_color = self._color_tuple(basic.get("name_color"), (255, 255, 255))
-        fallback_size = max(1, int(basic.get("name_font_size", 32)))
-        rendered = False
-
-        for entry in target_layers:
-            if not isinstance(entry, dict):
-                continue
-            text_value = entry.get("text", "")
-            if speaker_name is not None:
-                text_value = str(text_value).replace("{name}", speaker_name)
-            else:
-                text_value = str(text_value)
-
-            position = entry.get("position", [0, 0])
-            if (
-                not isinstance(position, (list, tuple))
-                or len(position) != 2
-            ):
-                offset_x, offset_y = 0.0, 0.0
-            else:
-                offset_x = float(position[0])
-                offset_y = float(position[1])
-
-            abs_pos = (base_x + offset_x, base_y + offset_y)
-
-            font_size = entry.get("font_size", fallback_size)
-            font_size = max(1, int(font_size)) if isinstance(font_size, (int, float)) else fallback_size
-            font_file = entry.get("font_file")
-            font = self._get_font(font_size, self._resolve_font_path(font_file))
-
-            color = self._color_tuple(entry.get("font_color"), fallback_color)
-
-            draw.text(abs_pos, text_value, font=font, fill=color)
-            rendered = True
-
-        return rendered
+        if not target_layers:
+            return []
+        if speaker_name is None:
+            return [(layer.position, layer.template, layer.font, layer.color) for layer in target_layers]
+        return [
+            (layer.position, layer.template.replace("{name}", speaker_name), layer.font, layer.color)
+            for layer in target_layers
+        ]
 
-    def _wrap_text(self, text: str, draw: ImageDraw.ImageDraw, font: FontType, max_width: int):
-        lines = []
-        paragraphs = text.split("\n") if text else [""]
-        for para in paragraphs:
-            if not para:
-                lines.append("")
-                continue
-            current = ""
-            for ch in para:
-                if draw.textlength(current + ch, font=font) <= max_width:
-                    current += ch
-                else:
-                    lines.append(current)
-                    current = ch
-            if current:
-                lines.append(current)
-        return lines
+    def _wrap_text(self, text: str, font: FontType, max_width: int):
+        # 步进宽度表按 (字体路径, 字号) 共享，每个字形只测量一次
+        return wrap_text(text, font, max_width)
 
     def _line_height(self, font: FontType) -> Union[int, float]:
-        bbox = font.getbbox("测试")
+        with font_lock(font):
+            bbox = font.getbbox("测试")
         return (bbox[3] - bbox[1]) + 4
 
     @staticmethod
@@ -511,14 +1279,14 @@ class CharacterRenderer:
         return None
 
     def _get_font(self, size: int, font_path: Optional[str]) -> FontType:
-        """Load font with caching; fallback to default when missing."""
+        """Load font via the process-wide registry; fallback to default when missing."""
         cache_key = (size, font_path)
         if cache_key in self.font_cache:
             return self.font_cache[cache_key]
 
         if font_path:
             try:
-                font = ImageFont.truetype(font_path, size)
+                font = load_font(font_path, size)
                 self.font_cache[cache_key] = font
                 return font
             except OSError:
@@ -529,11 +1297,11 @@ class CharacterRenderer:
         return font
 
     @staticmethod
-    def _first_key(mapping: Dict[str, Image.Image]) -> Optional[str]:
+    def _first_key(mapping: Dict[str, AssetHandle]) -> Optional[str]:
         return next(iter(mapping.keys()), None)
 
     @staticmethod
-    def _first_value(mapping: Dict[str, Image.Image]) -> Optional[Image.Image]:
+    def _first_value(mapping: Dict[str, AssetHandle]) -> Optional[AssetHandle]:
         return next(iter(mapping.values()), None)
 
 
@@ -0,0 +1,97 @@
+# core/renderer_registry.py
+"""
+进程内共享的渲染器注册表
+
+每个 (角色, 素材根目录) 只构造一次 CharacterRenderer。之后每次取用时调用 refresh()：
+比较角色配置、素材目录和预生成缓存的 (大小, mtime)，只重载真正变化的部分，
+未变化的素材句柄、字体和底图缓存原样保留。
+GUI 预览和引擎在渲染失败后都从这里取渲染器，不再每次重新解析 YAML、清空全部缓存。
+
+构造（可能包含数秒的预生成）和 refresh() 只持有该角色自己的锁，不会挡住其它角色取用渲染器。
+"""
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    from .renderer import CharacterRenderer
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from renderer import CharacterRenderer  # type: ignore[no-redef]
+
+RendererFactory = Callable[[str, str], CharacterRenderer]
+
+
+class RendererRegistry:
+    """factory: 构造渲染器的函数，默认 CharacterRenderer(char_id, base_path)"""
+
+    def __init__(self, factory: Optional[RendererFactory] = None):
+        self._factory: RendererFactory = factory or CharacterRenderer
+        self._renderers: Dict[Tuple[str, str], CharacterRenderer] = {}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # 只保护上面两个 dict 和计数；构造 / 重载渲染器时持有对应 key 的锁
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.reloads = 0
+
+    def get(self, char_id: str, base_path: str = "assets") -> CharacterRenderer:
+        """取共享渲染器；已存在时先检查文件变化并做最小重载"""
+        key = (char_id, os.path.abspath(base_path))
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = self._key_locks[key] = threading.Lock()
+        with key_lock:
+            with self._lock:
+                renderer = self._renderers.get(key)
+            if renderer is None:
+                renderer = self._factory(char_id, base_path)
+                with self._lock:
+                    self._renderers[key] = renderer
+                    self.created += 1
+                return renderer
+            try:
+                reloaded = renderer.refresh()
+            except Exception:
+                # 配置被删除或写坏：丢掉这个实例，下次取用时重新构造
+                with self._lock:
+                    if self._renderers.get(key) is renderer:
+                        del self._renderers[key]
+                raise
+            with self._lock:
+                if reloaded:
+                    self.reloads += 1
+                else:
+                    self.reused += 1
+            if reloaded:
+                print(f"🔄 角色 {char_id} 已重新加载: {', '.join(reloaded)}")
+            return renderer
+
+    def discard(self, char_id: Optional[str] = None, base_path: str = "assets") -> None:
+        """丢弃指定角色（char_id 为 None 时丢弃全部）的渲染器"""
+        with self._lock:
+            if char_id is None:
+                self._renderers.clear()
+            else:
+                self._renderers.pop((char_id, os.path.abspath(base_path)), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "renderers": len(self._renderers),
+                "created": self.created,
+                "reused": self.reused,
+                "reloads": self.reloads,
+            }
+
+
+_registry = RendererRegistry()
+
+
+def get_renderer_registry() -> RendererRegistry:
+    return _registry
+
+
+def get_renderer(char_id: str, base_path: str = "assets") -> CharacterRenderer:
+    """从进程级注册表取角色的共享渲染器"""
+    return _registry.get(char_id, base_path)
@@ -0,0 +1,244 @@
+# core/submit_pipeline.py
+"""
+发送流水线：剪切输入框文字 → 渲染 → 写入剪贴板 → 粘贴
+
+原先每条消息固定 sleep 0.05 + 0.1 + 0.1 秒；这里改为记录剪贴板序列号后等待它变化（带超时），
+目标程序响应多快就走多快。按键发送函数和剪贴板后端都可以注入，
+配合 MemoryClipboardBackend 可以在 Linux 上测量每个阶段的耗时。
+"""
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from PIL import Image
+
+try:
+    from .clipboard import ClipboardBackend, get_backend
+    from .render_cache import RenderResultCache
+    from .tracing import get_tracer
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from clipboard import ClipboardBackend, get_backend  # type: ignore[no-redef]
+    from render_cache import RenderResultCache  # type: ignore[no-redef]
+    from tracing import get_tracer  # type: ignore[no-redef]
+
+KeySender = Callable[[str], None]
+# 渲染结果可以是一张图，也可以是按页序迭代的多张图（分页渲染）
+RenderFn = Callable[[str], Optional[Union[Image.Image, Iterable[Image.Image]]]]
+CacheKeyFn = Callable[[str], Optional[str]]
+
+STAGE_LABELS = {
+    "cut": "剪切",
+    "cache": "命中结果缓存",
+    "render": "渲染",
+    "encode": "编码",
+    "clipboard": "写入剪贴板",
+    "paste": "粘贴",
+}
+
+
+class SubmitResult:
+    """一次发送的结果与各阶段耗时（毫秒）"""
+
+    def __init__(self):
+        self.status = "pending"  # sent | empty | text_fallback
+        self.text = ""
+        self.cut_timed_out = False
+        self.cache_hit = False
+        self.pages = 1
+        self.stages: Dict[str, float] = {}
+        self.total_ms = 0.0
+
+    def summary(self) -> str:
+        parts = [
+            f"{STAGE_LABELS.get(name, name)} {ms:.1f} ms"
+            for name, ms in self.stages.items()
+        ]
+        if self.pages > 1:
+            parts.append(f"{self.pages} 页")
+        parts.append(f"共 {self.total_ms:.1f} ms")
+        return " · ".join(parts)
+
+
+class SubmitPipeline:
+    """
+    render: 文本 → 图片，失败时返回 None（流水线会把原文粘贴回去）；
+        返回多页图片的可迭代对象时逐页写入剪贴板并粘贴，每页画完就发出，不等其余页。
+    send_keys: 发送组合键，例如 keyboard.send。
+    cut_timeout: 等待 Ctrl+X 更新剪贴板的上限；超时后照旧读取剪贴板。
+        输入框为空时 Ctrl+X 不会改动剪贴板，每次空发送都要等满这段时间，
+        因此默认取旧流程剪切阶段的固定等待（0.05 + 0.1 秒），空发送不会比旧流程慢。
+    publish_timeout: 写入图片后等待剪贴板序列号更新的上限。
+    paste_delay: 粘贴前额外等待的秒数，供个别读取剪贴板较慢的程序使用。
+    page_interval: 分页发送时每页粘贴后、写入下一页前等待的秒数，默认 0。按键只是注入，目标程序处理粘贴时才读取剪贴板，
+        而剪贴板没有"已被读取"的通知可等：目标程序来不及读取时（上一页丢失或下一页被粘贴两次）再按需开启。
+    result_cache / cache_key: 可选的结果缓存；cache_key 把文本映射为缓存键（返回 None 表示不缓存），
+    命中时直接发布已编码的剪贴板数据，跳过渲染和编码。
+    """
+
+    def __init__(
+        self,
+        render: RenderFn,
+        send_keys: KeySender,
+        clipboard: Optional[ClipboardBackend] = None,
+        cut_timeout: float = 0.15,
+        publish_timeout: float = 0.2,
+        paste_delay: float = 0.0,
+        page_interval: float = 0.0,
+        result_cache: Optional[RenderResultCache] = None,
+        cache_key: Optional[CacheKeyFn] = None,
+    ):
+        self.render = render
+        self.send_keys = send_keys
+        self._clipboard = clipboard
+        self.cut_timeout = cut_timeout
+        self.publish_timeout = publish_timeout
+        self.paste_delay = paste_delay
+        self.page_interval = page_interval
+        self.result_cache = result_cache
+        self.cache_key = cache_key
+
+    @property
+    def clipboard(self) -> ClipboardBackend:
+        return self._clipboard or get_backend()
+
+    def run(self) -> SubmitResult:
+        result = SubmitResult()
+        clipboard = self.clipboard
+        tracer = get_tracer()
+        started = time.perf_counter()
+        mark = started
+
+        def stage(name: str) -> None:
+            # 分页发送时同名阶段会出现多次，耗时累加
+            nonlocal mark
+            now = time.perf_counter()
+            result.stages[name] = result.stages.get(name, 0.0) + (now - mark) * 1000
+            if tracer.enabled:
+                tracer.record(f"submit.{name}", mark, now)
+            mark = now
+
+        # 1. 全选并剪切，等待剪贴板序列号变化
+        seq = clipboard.sequence_number()
+        self.send_keys("ctrl+a")
+        self.send_keys("ctrl+x")
+        result.cut_timed_out = not clipboard.wait_for_change(seq, self.cut_timeout)
+        text = clipboard.get_text().strip()
+        stage("cut")
+        result.text = text
+
+        if not text:
+            print("🔕 剪贴板为空或非文本，尝试还原...")
+            self.send_keys("ctrl+v")
+            result.status = "empty"
+            return self._finish(result, started)
+
+        print(f"📝 捕获文本: {text}")
+
+        # 2. 查结果缓存，未命中时渲染并编码
+        key = self._lookup_key(text)
+        cache = self.result_cache
+        payload: Any = cache.get(key) if key and cache is not None else None
+        if payload is not None:
+            result.cache_hit = True
+            stage("cache")
+        else:
+            image = self.render(text)
+            if image is not None and not isinstance(image, Image.Image):
+                self._send_pages(image, text, result, stage)
+                return self._finish(result, started)
+            stage("render")
+            if image is None:
+                self._paste_text(text, result)
+                return self._finish(result, started)
+            try:
+                payload = clipboard.encode_image(image)
+            except Exception as e:
+                print(f"❌ 图片编码失败: {e}")
+                self._paste_text(text, result)
+                return self._finish(result, started)
+            stage("encode")
+            if key and cache is not None:
+                cache.put(key, payload)
+
+        # 3. 写入剪贴板，确认序列号已更新后再粘贴
+        if not self._publish(clipboard, payload, stage):
+            self._paste_text(text, result)
+            return self._finish(result, started)
+
+        # 4. 粘贴
+        self.send_keys("ctrl+v")
+        stage("paste")
+        print("✅ 已执行粘贴发送指令")
+        result.status = "sent"
+        return self._finish(result, started)
+
+    def _publish(self, clipboard: ClipboardBackend, payload: Any, stage: Callable[[str], None]) -> bool:
+        seq = clipboard.sequence_number()
+        if not clipboard.set_payload(payload):
+            stage("clipboard")
+            print("❌ 图片写入剪贴板失败")
+            return False
+        clipboard.wait_for_change(seq, self.publish_timeout)
+        if self.paste_delay > 0:
+            time.sleep(self.paste_delay)
+        stage("clipboard")
+        return True
+
+    def _send_pages(
+        self,
+        pages: Iterable[Image.Image],
+        text: str,
+        result: SubmitResult,
+        stage: Callable[[str], None],
+    ) -> None:
+        """逐页 编码 → 写入剪贴板 → 粘贴；第一页就失败时粘贴原文，之后失败则停在已发出的页"""
+        clipboard = self.clipboard
+        result.pages = 0
+        try:
+            for image in pages:
+                if result.pages and self.page_interval > 0:
+                    # 等目标程序读完上一页再覆盖剪贴板
+                    time.sleep(self.page_interval)
+                    stage("paste")
+                stage("render")
+                try:
+                    payload = clipboard.encode_image(image)
+                except Exception as e:
+                    print(f"❌ 第 {result.pages + 1} 页图片编码失败: {e}")
+                    break
+                stage("encode")
+                if not self._publish(clipboard, payload, stage):
+                    break
+                self.send_keys("ctrl+v")
+                stage("paste")
+                result.pages += 1
+        except Exception as e:
+            print(f"❌ 第 {result.pages + 1} 页渲染失败: {e}")
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+
+        if not result.pages:
+            result.pages = 1
+            self._paste_text(text, result)
+            return
+        print(f"✅ 已依次粘贴 {result.pages} 页")
+        result.status = "sent"
+
+    def _lookup_key(self, text: str) -> Optional[str]:
+        if self.result_cache is None or self.cache_key is None:
+            return None
+        try:
+            return self.cache_key(text)
+        except Exception:
+            return None
+
+    def _paste_text(self, text: str, result: SubmitResult) -> None:
+        result.status = "text_fallback"
+        if self.clipboard.set_text(text):
+            self.send_keys("ctrl+v")
+
+    @staticmethod
+    def _finish(result: SubmitResult, started: float) -> SubmitResult:
+        result.total_ms = (time.perf_counter() - started) * 1000
+        return result
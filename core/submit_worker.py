@@ -0,0 +1,153 @@
+# core/submit_worker.py
+"""
+常驻的发送工作线程
+
+键盘钩子线程只负责把触发请求放进有界队列（永不阻塞），由唯一的工作线程串行执行发送回调，
+渲染器和剪贴板因此不会被两个发送流程同时访问。
+工作线程每次取出请求时会把队列中积压的触发一并取走，一串连按只执行一次（single-flight）。
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+SubmitCallback = Callable[[], None]
+
+_STOP = object()
+
+
+def _percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class SubmitWorker:
+    """单线程 + 有界队列 + 合并连按的发送执行器"""
+
+    def __init__(
+        self,
+        callback: SubmitCallback,
+        queue_size: int = 8,
+        history: int = 256,
+    ):
+        self._callback = callback
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+
+        self.triggers = 0
+        self.runs = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failures = 0
+        self.max_queue_depth = 0
+        self._wait_ms: Deque[float] = deque(maxlen=history)
+        self._run_ms: Deque[float] = deque(maxlen=history)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="submit-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        """请求工作线程退出；正在执行的发送会先完成"""
+        thread = self._thread
+        if not thread:
+            return
+        while True:
+            try:
+                self._queue.put_nowait(_STOP)
+                break
+            except queue.Full:
+                self._drain()
+        thread.join(timeout)
+        self._thread = None
+
+    def submit(self) -> bool:
+        """
+        记录一次触发，立即返回（在键盘钩子线程里调用）。
+        队列已满时丢弃本次触发——队列里已有的请求会覆盖它。返回是否入队成功。
+        """
+        now = time.perf_counter()
+        with self._lock:
+            self.triggers += 1
+        try:
+            self._queue.put_nowait(now)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        depth = self._queue.qsize()
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+        return True
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            waits = list(self._wait_ms)
+            runs = list(self._run_ms)
+            return {
+                "triggers": self.triggers,
+                "runs": self.runs,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "failures": self.failures,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "wait_ms_p50": _percentile(waits, 50),
+                "wait_ms_p95": _percentile(waits, 95),
+                "wait_ms_max": max(waits) if waits else 0.0,
+                "run_ms_p50": _percentile(runs, 50),
+                "run_ms_p95": _percentile(runs, 95),
+            }
+
+    def _drain(self) -> list:
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first] + self._drain()
+            stop = any(item is _STOP for item in batch)
+            triggers = [item for item in batch if item is not _STOP]
+            if triggers:
+                self._run(triggers)  # type: ignore[arg-type]
+            if stop:
+                return
+
+    def _run(self, triggers: list) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self.coalesced += len(triggers) - 1
+            self._wait_ms.append((started - min(triggers)) * 1000)
+        self._busy = True
+        try:
+            self._callback()
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            print(f"❌ 发送回调出错: {e}")
+        finally:
+            self._busy = False
+            with self._lock:
+                self.runs += 1
+                self._run_ms.append((time.perf_counter() - started) * 1000)
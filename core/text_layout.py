@@ -0,0 +1,143 @@
+# core/text_layout.py
+"""
+增量断行引擎
+
+旧实现对每个字符都调用一次 ``draw.textlength(current + ch)``，每次都会重新测量整行，
+断行复杂度随行长呈 O(n²)。这里为每个 (字体路径, 字号) 维护一张字形步进宽度表和
+字偶距修正表，每个字形只测量一次，行宽按增量累加。
+
+为保证与旧实现得到完全相同的断行结果，累加宽度落在 ``max_width`` 附近时会回退为
+对整行做一次精确测量（只发生在每行的断点处，开销可以忽略）。
+"""
+import threading
+import weakref
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple, Union
+
+from PIL import ImageFont
+
+try:
+    from .font_registry import font_lock
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    from font_registry import font_lock  # type: ignore[no-redef]
+
+FontType = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+
+# 估算宽度与上限的差值在该范围内时，改用整行精确测量
+EXACT_MEASURE_TOLERANCE = 1.0
+# 字偶距表上限（CJK 文本的字对组合很多，防止无限增长）
+MAX_KERNING_PAIRS = 65536
+
+
+class GlyphAdvanceCache:
+    """单个字体实例的字形步进宽度 + 字偶距修正表"""
+
+    def __init__(self, font: FontType):
+        self.font = font
+        self.advances: Dict[str, float] = {}
+        self.kerning: Dict[Tuple[str, str], float] = {}
+
+    def advance(self, ch: str) -> float:
+        width = self.advances.get(ch)
+        if width is None:
+            width = self.measure(ch)
+            self.advances[ch] = width
+        return width
+
+    def kern(self, prev: str, ch: str) -> float:
+        pair = (prev, ch)
+        correction = self.kerning.get(pair)
+        if correction is None:
+            correction = self.measure(prev + ch) - self.advance(prev) - self.advance(ch)
+            if len(self.kerning) >= MAX_KERNING_PAIRS:
+                self.kerning.clear()
+            self.kerning[pair] = correction
+        return correction
+
+    def measure(self, text: str) -> float:
+        with font_lock(self.font):
+            return float(self.font.getlength(text))
+
+    def text_width(self, text: str) -> float:
+        """按步进表估算整段文字的宽度"""
+        width = 0.0
+        prev = ""
+        for ch in text:
+            width += self.advance(ch)
+            if prev:
+                width += self.kern(prev, ch)
+            prev = ch
+        return width
+
+
+_lock = threading.Lock()
+_caches_by_path: Dict[Tuple[Any, ...], GlyphAdvanceCache] = {}
+_caches_by_font: MutableMapping[Any, GlyphAdvanceCache] = weakref.WeakKeyDictionary()
+
+
+def font_key(font: FontType) -> Optional[Tuple[Any, ...]]:
+    path = getattr(font, "path", None)
+    if not isinstance(path, str):
+        return None
+    return (
+        path,
+        getattr(font, "size", None),
+        getattr(font, "index", 0),
+        getattr(font, "layout_engine", None),
+    )
+
+
+def get_advance_cache(font: FontType) -> GlyphAdvanceCache:
+    """获取字体对应的步进表；同一 (字体路径, 字号) 在所有渲染器间共享"""
+    key = font_key(font)
+    with _lock:
+        if key is not None:
+            cache = _caches_by_path.get(key)
+            if cache is None:
+                cache = GlyphAdvanceCache(font)
+                _caches_by_path[key] = cache
+            return cache
+
+        cache = _caches_by_font.get(font)
+        if cache is None:
+            cache = GlyphAdvanceCache(font)
+            _caches_by_font[font] = cache
+        return cache
+
+
+def clear_advance_caches() -> None:
+    with _lock:
+        _caches_by_path.clear()
+        _caches_by_font.clear()
+
+
+def wrap_text(text: str, font: FontType, max_width: float) -> List[str]:
+    """逐字断行，结果与逐次 ``textlength(current + ch)`` 的旧实现一致"""
+    cache = get_advance_cache(font)
+    lines: List[str] = []
+    paragraphs = text.split("\n") if text else [""]
+    for para in paragraphs:
+        if not para:
+            lines.append("")
+            continue
+        current = ""
+        width = 0.0
+        prev = ""
+        for ch in para:
+            candidate = width + cache.advance(ch)
+            if prev:
+                candidate += cache.kern(prev, ch)
+            if abs(candidate - max_width) <= EXACT_MEASURE_TOLERANCE:
+                candidate = cache.measure(current + ch)
+
+            if candidate <= max_width:
+                current += ch
+                width = candidate
+                prev = ch
+            else:
+                lines.append(current)
+                current = ch
+                width = cache.advance(ch)
+                prev = ch
+        if current:
+            lines.append(current)
+    return lines
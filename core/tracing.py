@@ -0,0 +1,226 @@
+# core/tracing.py
+"""
+轻量的阶段耗时追踪（按键 → 粘贴 全流程）
+
+用 ``with span("render.draw"):`` 或 ``@traced("render")`` 标记阶段。关闭时 span() 只做一次
+布尔判断并返回共享的空上下文，几乎没有开销；开启后每个 span 记录进固定容量的环形缓冲区，
+可导出为 Chrome trace-event JSON（chrome://tracing 或 https://ui.perfetto.dev 打开），
+并按阶段统计 p50 / p95 / p99。
+
+开启方式：global_config.yaml 中 render.trace: true，或设置环境变量
+GALGAME_TRACE=1（也可以直接写导出路径，例如 GALGAME_TRACE=trace.json）。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+try:
+    from .utils import load_global_config
+except ImportError:  # pragma: no cover - fallback for standalone runs
+    def load_global_config() -> Dict[str, Any]:  # type: ignore[misc]
+        return {}
+
+TRACE_ENV = "GALGAME_TRACE"
+DEFAULT_TRACE_FILE = os.path.join("assets", "cache", "trace.json")
+DEFAULT_CAPACITY = 4096
+
+# (名称, 开始, 结束, 线程 id, 附加参数)；时间为 time.perf_counter() 秒
+SpanRecord = Tuple[str, float, float, int, Optional[Dict[str, Any]]]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class Tracer:
+    """capacity: 环形缓冲区保留的最近 span 数量，统计与导出都基于这些记录"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self._spans: Deque[SpanRecord] = deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._spans.maxlen or 0
+
+    def configure(self, enabled: bool, capacity: Optional[int] = None) -> None:
+        with self._lock:
+            self.enabled = enabled
+            if capacity is not None and capacity != self.capacity:
+                self._spans = deque(self._spans, maxlen=max(1, capacity))
+
+    def record(self, name: str, start: float, end: float, args: Optional[Dict[str, Any]] = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if len(self._spans) == self._spans.maxlen:
+                self.dropped += 1
+            self._spans.append((name, start, end, threading.get_ident(), args))
+
+    def spans(self) -> List[SpanRecord]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self.dropped = 0
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """每个阶段的次数与 p50 / p95 / p99（毫秒），按首次出现的顺序排列"""
+        durations: Dict[str, List[float]] = {}
+        for name, start, end, _, _ in sorted(self.spans(), key=lambda s: s[1]):
+            durations.setdefault(name, []).append((end - start) * 1000)
+        return {
+            name: {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+            }
+            for name, values in durations.items()
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = []
+        for name, start, end, tid, args in self.spans():
+            event: Dict[str, Any] = {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": round(start * 1_000_000, 3),
+                "dur": round((end - start) * 1_000_000, 3),
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> str:
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+    def format_stats(self) -> List[str]:
+        lines = []
+        for name, stat in self.stage_stats().items():
+            lines.append(
+                f"   {name:<24} ×{stat['count']:<5} p50 {stat['p50']:8.2f}  "
+                f"p95 {stat['p95']:8.2f}  p99 {stat['p99']:8.2f} ms"
+            )
+        return lines
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_args", "_start")
+
+    def __init__(self, tracer: Tracer, name: str, args: Optional[Dict[str, Any]]):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._tracer.record(self._name, self._start, time.perf_counter(), self._args)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+_tracer = Tracer()
+_trace_file = DEFAULT_TRACE_FILE
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **args: Any) -> Any:
+    """标记一个阶段；追踪关闭时返回共享的空上下文"""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _Span(_tracer, name, args or None)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """把整个函数记为一个阶段的装饰器；关闭时只多一次布尔判断"""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _tracer.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _tracer.record(name, start, time.perf_counter())
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def configure_tracing() -> bool:
+    """按环境变量 / global_config 开关追踪，返回是否开启"""
+    global _trace_file
+    render_cfg = load_global_config().get("render", {})
+    enabled = bool(render_cfg.get("trace", False))
+    env = os.environ.get(TRACE_ENV, "").strip()
+    if env:
+        enabled = env.lower() not in ("0", "false", "no", "off")
+        if enabled and env.lower() not in ("1", "true", "yes", "on"):
+            _trace_file = env
+    try:
+        capacity = int(render_cfg.get("trace_buffer", DEFAULT_CAPACITY))
+    except (TypeError, ValueError):
+        capacity = DEFAULT_CAPACITY
+    _tracer.configure(enabled, capacity)
+    return enabled
+
+
+def report_tracing() -> Optional[str]:
+    """打印各阶段 p50 / p95 / p99 并导出 Chrome trace；未开启或没有记录时什么也不做"""
+    if not _tracer.enabled or not _tracer.spans():
+        return None
+    print("📈 阶段耗时统计:")
+    for line in _tracer.format_stats():
+        print(line)
+    if _tracer.dropped:
+        print(f"   （环形缓冲区已满，最早的 {_tracer.dropped} 个记录未计入）")
+    try:
+        path = _tracer.export_chrome_trace(_trace_file)
+    except OSError as e:
+        print(f"⚠️ 导出 trace 失败: {e}")
+        return None
+    print(f"🧭 Chrome trace 已导出: {path}")
+    return path
@@ -2,6 +2,7 @@
 
 import json
 import os
+import threading
 from copy import deepcopy
 from typing import Any, Dict, List, Tuple, Mapping, Optional, TextIO
 
@@ -15,10 +16,45 @@ LEGACY_GLOBAL_CONFIG_PATH = os.path.join(os.getcwd(), LEGACY_GLOBAL_CONFIG_FILEN
 
 DEFAULT_CANVAS_SIZE: Tuple[int, int] = (2560, 1440)
 
+# 预生成底图缓存格式 → 文件扩展名
+CACHE_FORMAT_EXTENSIONS: Dict[str, str] = {
+    "jpeg": ".jpg",
+    "png": ".png",
+    "raw": ".rgba",
+}
+
+# 预生成缓存的组织方式：matrix=每个 立绘×背景 一张整图；layered=背景 / 立绘 / 对话框分层保存，渲染时合成
+CACHE_LAYOUTS: Tuple[str, ...] = ("matrix", "layered")
+
+# 影响底图合成的 layout 键；text_area / name_pos 等只影响实时绘制的文字，
+# 改动它们既不需要重建预生成缓存，也不需要丢弃内存中的底图
+COMPOSITE_LAYOUT_KEYS: Tuple[str, ...] = (
+    "_canvas_size",
+    "stand_pos",
+    "stand_scale",
+    "stand_on_top",
+    "box_pos",
+)
+
 DEFAULT_RENDER_CONFIG: Dict[str, Any] = {
     "cache_format": "jpeg",
+    "cache_layout": "matrix",
     "jpeg_quality": 90,
+    "prebuild_workers": 0,
+    "bake_speaker_name": True,
     "use_memory_canvas_cache": True,
+    "memory_cache_mb": 512,
+    "glyph_atlas_mb": 32,
+    "glyph_warmup": 512,
+    "compositing": "full",
+    "result_cache_mb": 64,
+    "result_cache_spill_mb": 0,
+    "trace": False,
+    "trace_buffer": 4096,
+    "sidecar": False,
+    "paginate": False,
+    "page_workers": 0,
+    "page_interval_ms": 0,
 }
 
 DEFAULT_TEXT_WRAPPER: Dict[str, Any] = {
@@ -93,37 +129,82 @@ def _read_config_file(path: str) -> Dict[str, Any]:
         return {}
 
 
-def load_global_config() -> Dict[str, Any]:
-    """Load global_config.yaml (with JSON fallback) and ensure defaults."""
-    source_path = None
-    config: Dict[str, Any] = {}
-    if os.path.exists(GLOBAL_CONFIG_PATH):
-        source_path = GLOBAL_CONFIG_PATH
-        config = _read_config_file(GLOBAL_CONFIG_PATH)
-    elif os.path.exists(LEGACY_GLOBAL_CONFIG_PATH):
-        source_path = LEGACY_GLOBAL_CONFIG_PATH
-        config = _read_config_file(LEGACY_GLOBAL_CONFIG_PATH)
-
-    merged = DEFAULT_CONFIG.copy()
-    merged.update(config)
+# 解析并补全默认值后的全局配置，按源文件 (路径, 大小, mtime) 失效
+_ConfigSignature = Tuple[Optional[str], Optional[Tuple[int, int]]]
+_config_lock = threading.Lock()
+_config_cache: Optional[Tuple[_ConfigSignature, Dict[str, Any], Dict[str, Any]]] = None
+
+
+def _global_config_signature() -> _ConfigSignature:
+    for path in (GLOBAL_CONFIG_PATH, LEGACY_GLOBAL_CONFIG_PATH):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return path, (stat.st_size, stat.st_mtime_ns)
+    return None, None
+
+
+def _merge_global_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
+    merged = deepcopy(DEFAULT_CONFIG)
+    merged.update(deepcopy(config))
 
     _ensure_dict(merged, "render", DEFAULT_RENDER_CONFIG)
-    
+
     # 确保 trigger_hotkey 存在
     if "trigger_hotkey" not in merged or not merged["trigger_hotkey"]:
         merged["trigger_hotkey"] = DEFAULT_CONFIG["trigger_hotkey"]
+    return merged
 
-    if (source_path != GLOBAL_CONFIG_PATH) or merged != config:
-        save_global_config(merged)
 
-    return merged
+def _cached_global_config() -> Tuple[_ConfigSignature, Dict[str, Any], Dict[str, Any]]:
+    """(签名, 文件原始内容, 补全默认值后的配置)；文件未变化时直接返回缓存"""
+    global _config_cache
+    signature = _global_config_signature()
+    with _config_lock:
+        cached = _config_cache
+    if cached is not None and cached[0] == signature:
+        return cached
+
+    source_path = signature[0]
+    config = _read_config_file(source_path) if source_path else {}
+    entry = (signature, config, _merge_global_defaults(config))
+    with _config_lock:
+        _config_cache = entry
+    return entry
+
+
+def load_global_config() -> Dict[str, Any]:
+    """
+    Load global_config.yaml (with JSON fallback) merged with defaults.
+    Read-only: the parsed result is memoized on the file's size and mtime and never
+    written back; call migrate_global_config() to persist defaults / convert legacy JSON.
+    Returns a copy, so callers may modify it freely.
+    """
+    return deepcopy(_cached_global_config()[2])
+
 
+def migrate_global_config() -> bool:
+    """
+    Explicit migration step: convert global_config.json to YAML and fill in missing
+    default keys. Returns True when the file was (re)written.
+    """
+    (source_path, _), config, merged = _cached_global_config()
+    if source_path == GLOBAL_CONFIG_PATH and merged == config:
+        return False
+    save_global_config(merged)
+    return True
 
 
 def save_global_config(config: Dict[str, Any]) -> None:
-    """Persist global config to YAML file."""
-    with open(GLOBAL_CONFIG_PATH, "w", encoding="utf-8") as f:
+    """Persist global config to YAML file (atomically) and drop the memoized copy."""
+    global _config_cache
+    tmp_path = f"{GLOBAL_CONFIG_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         dump_yaml_inline(config, f)
+    os.replace(tmp_path, GLOBAL_CONFIG_PATH)
+    with _config_lock:
+        _config_cache = None
 
 
 def normalize_layout(
@@ -11,6 +11,7 @@ try:
     from core.utils import load_global_config, save_global_config, normalize_layout, normalize_style, dump_yaml_inline  # pyright: ignore[reportAssignmentType]
     from core.renderer import CharacterRenderer
     from core.prebuild import prebuild_character
+    from core.renderer_registry import get_renderer
 except ImportError:
     print("Warning: Core modules not found. Some features may not work.")
     def load_global_config() -> Dict[str, Any]: return {}
@@ -21,6 +22,7 @@ except ImportError:
         return yaml.safe_dump(data, stream=stream, allow_unicode=True, sort_keys=False)
     CharacterRenderer = None
     prebuild_character = None
+    get_renderer = None
 
 # --- 路径常量 ---
 BASE_PATH = "assets"
@@ -18,7 +18,7 @@ from .constants import (
     BASE_PATH, CanvasConfig, COMMON_RESOLUTIONS, DEFAULT_CANVAS_SIZE,
     Z_BG, Z_PORTRAIT_BOTTOM, Z_BOX, Z_PORTRAIT_TOP, Z_TEXT,
     load_global_config, save_global_config, normalize_layout, normalize_style,
-    dump_yaml_inline, CharacterRenderer, prebuild_character
+    dump_yaml_inline, get_renderer, prebuild_character
 )
 from .canvas import ResizableTextItem, ScalableImageItem, CropAreaItem
 from .widgets import NewCharacterDialog, PrebuildProgressDialog
@@ -166,6 +166,10 @@ class MainWindow(QMainWindow):
         action_cache.triggered.connect(self.generate_cache)
         tools_menu.addAction(action_cache)
 
+        action_rebuild = QAction("强制重新生成缓存 (Rebuild Cache)", self)
+        action_rebuild.triggered.connect(self.rebuild_cache)
+        tools_menu.addAction(action_rebuild)
+
         action_sync = QAction("同步/修复配置 (Sync Configs)", self)
         action_sync.triggered.connect(self.sync_all_configs)
         tools_menu.addAction(action_sync)
@@ -1520,14 +1524,18 @@ class MainWindow(QMainWindow):
     def generate_cache(self):
         self._run_generate_cache(show_message=True)
 
-    def _run_generate_cache(self, show_message: bool = True) -> bool:
+    def rebuild_cache(self):
+        """忽略已有缓存，全部重新生成（缓存文件损坏或被手动改动时使用）"""
+        self._run_generate_cache(show_message=True, force=True)
+
+    def _run_generate_cache(self, show_message: bool = True, force: bool = False) -> bool:
         if prebuild_character is None or not self.current_char_id:
             QMessageBox.warning(self, "错误", "无法调用预处理模块")
             return False
 
         self.save_config()
         cache_dir = os.path.join(BASE_PATH, "cache")
-        dialog = PrebuildProgressDialog(self, self.current_char_id, BASE_PATH, cache_dir)
+        dialog = PrebuildProgressDialog(self, self.current_char_id, BASE_PATH, cache_dir, force=force)
         dialog.exec()
 
         if dialog.success:
@@ -1539,7 +1547,7 @@ class MainWindow(QMainWindow):
         return False
 
     def preview_render(self):
-        if CharacterRenderer is None or not self.current_char_id:
+        if get_renderer is None or not self.current_char_id:
             return
 
         if self.cache_outdated and not self.resolution_prompted:
@@ -1557,7 +1565,7 @@ class MainWindow(QMainWindow):
         text, ok = QInputDialog.getText(self, "渲染预览", "输入测试台词:")
         if ok and text:
             try:
-                renderer = CharacterRenderer(self.current_char_id, BASE_PATH)
+                renderer = get_renderer(self.current_char_id, BASE_PATH)
                 p_key = os.path.splitext(
                     self.config["layout"].get("current_portrait", "")
                 )[0]
@@ -1568,16 +1576,15 @@ class MainWindow(QMainWindow):
                 try:
                     pil_img = renderer.render(text, portrait_key=p_key, bg_key=bg_key)
                 except Exception:
-                    # 缓存可能损坏，尝试重建
+                    # 缓存可能过期或缺失，补齐变化的组合后重试（文件损坏时用「强制重新生成缓存」）
                     prebuild_character(
                         self.current_char_id,
                         BASE_PATH,
                         os.path.join(BASE_PATH, "cache"),
-                        force=True
                     )
                     self.cache_outdated = False
                     self.resolution_prompted = False
-                    renderer = CharacterRenderer(self.current_char_id, BASE_PATH)
+                    renderer = get_renderer(self.current_char_id, BASE_PATH)
                     pil_img = renderer.render(text, portrait_key=p_key, bg_key=bg_key)
 
                 pil_img.show()
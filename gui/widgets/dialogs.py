@@ -49,14 +49,15 @@ class NewCharacterDialog(QDialog):
 class PrebuildProgressDialog(QDialog):
     """缓存生成进度对话框"""
 
-    def __init__(self, parent, char_id: str, base_path: str, cache_dir: str):
+    def __init__(self, parent, char_id: str, base_path: str, cache_dir: str, force: bool = False):
         super().__init__(parent)
-        self.setWindowTitle(f"生成缓存 - {char_id}")
+        self.setWindowTitle(f"{'强制重新生成缓存' if force else '生成缓存'} - {char_id}")
         self.setModal(True)
         self.setWindowFlag(Qt.WindowType.WindowCloseButtonHint, False)
 
         self.success = False
         self._had_error = False
+        self._cancelled = False
         self._error_message = ""
 
         layout = QVBoxLayout(self)
@@ -69,7 +70,12 @@ class PrebuildProgressDialog(QDialog):
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.label_detail)
 
-        self.worker = PrebuildWorker(char_id, base_path, cache_dir, self)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel)
+        buttons.rejected.connect(self._request_cancel)
+        self.btn_cancel = buttons.button(QDialogButtonBox.StandardButton.Cancel)
+        layout.addWidget(buttons)
+
+        self.worker = PrebuildWorker(char_id, base_path, cache_dir, self, force=force)
         self.worker.progress.connect(self._on_progress)
         self.worker.finished_ok.connect(self._on_done)
         self.worker.failed.connect(self._on_failed)
@@ -79,6 +85,8 @@ class PrebuildProgressDialog(QDialog):
         if event == "error":
             self._had_error = True
             self._error_message = message or "未知错误"
+        elif event == "cancelled":
+            self._cancelled = True
 
         if total > 0:
             if self.progress_bar.maximum() != total:
@@ -92,6 +100,7 @@ class PrebuildProgressDialog(QDialog):
             "prepare_bg": "处理中...",
             "composite": "生成底图",
             "skip": "缓存已存在",
+            "cancelled": "已取消",
             "done": "完成",
         }
         if event in stage_map:
@@ -103,13 +112,23 @@ class PrebuildProgressDialog(QDialog):
         if message:
             self.label_detail.setText(message)
 
+    def _request_cancel(self):
+        if self.btn_cancel:
+            self.btn_cancel.setEnabled(False)
+        self.label_stage.setText("正在取消...")
+        self.worker.cancel()
+
+    def reject(self):
+        # Esc / 取消按钮都只发出取消请求，等工作线程退出后再关闭
+        self._request_cancel()
+
     def _finish(self):
         self.accept()
 
     def _on_done(self):
         if self._had_error:
             QMessageBox.warning(self, "警告", self._error_message)
-        else:
+        elif not self._cancelled:
             self.success = True
         self._finish()
 
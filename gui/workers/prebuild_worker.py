@@ -1,22 +1,31 @@
 # gui/workers/prebuild_worker.py
 """后台缓存生成线程"""
+import threading
+
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from ..constants import prebuild_character
 
 
 class PrebuildWorker(QThread):
-    """后台执行 prebuild_character 的工作线程"""
+    """后台执行 prebuild_character 的工作线程；force=False 时只重新生成发生变化的组合"""
     
     progress = pyqtSignal(str, int, int, str)  # event, current, total, message
     finished_ok = pyqtSignal()
     failed = pyqtSignal(str)
 
-    def __init__(self, char_id: str, base_path: str, cache_dir: str, parent=None):
+    def __init__(self, char_id: str, base_path: str, cache_dir: str, parent=None, force: bool = False):
         super().__init__(parent)
         self.char_id = char_id
         self.base_path = base_path
         self.cache_dir = cache_dir
+        self.force = force
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求取消：已开始的底图会写完，其余跳过"""
+        self._cancel_event.set()
+        self.requestInterruption()
 
     def _report(self, event: str, current: int, total: int, message: str):
         self.progress.emit(event, current, total, message or "")
@@ -29,8 +38,9 @@ class PrebuildWorker(QThread):
                 self.char_id,
                 self.base_path,
                 self.cache_dir,
-                force=True,
+                force=self.force,
                 progress=self._report,
+                cancel=self._cancel_event.is_set,
             )
             self.finished_ok.emit()
         except Exception as exc:
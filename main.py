@@ -1,5 +1,6 @@
 import os
 from core.engine import GalGameEngine
+from core.utils import migrate_global_config
 
 
 def select_character():
@@ -42,6 +43,8 @@ def select_character():
 
 
 if __name__ == "__main__":
+    if migrate_global_config():
+        print("🛠️ 已补全 global_config.yaml 中缺失的默认配置")
     char_id = select_character()
 
     if char_id:
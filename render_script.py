@@ -0,0 +1,55 @@
+"""
+批量渲染对话脚本：python render_script.py 脚本.yaml -o 输出目录或 out.tar [--jobs N] [--format png]
+                                        [--character 默认角色] [--assets assets] [--force]
+
+脚本格式见 core/batch_render.py。中断后用相同参数再运行一次即可从断点继续。
+"""
+import argparse
+import sys
+
+from core.batch_render import render_script
+from core.render_service import OUTPUT_FORMATS
+from core.utils import migrate_global_config
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="把对话脚本批量渲染成图片序列")
+    parser.add_argument("script", help="YAML / CSV / JSONL 脚本")
+    parser.add_argument("-o", "--output", required=True, help="输出目录，或以 .tar 结尾的 tar 文件")
+    parser.add_argument("--jobs", type=int, default=None, help="工作进程数，默认 CPU 核数")
+    parser.add_argument("--format", default="png", choices=sorted(OUTPUT_FORMATS), help="输出图片格式")
+    parser.add_argument("--quality", type=int, default=90, help="jpeg / webp 质量")
+    parser.add_argument("--character", default=None, help="脚本里没写 character 的台词使用的角色")
+    parser.add_argument("--assets", default="assets", help="素材根目录")
+    parser.add_argument("--force", action="store_true", help="忽略已完成的输出，全部重新渲染")
+    args = parser.parse_args()
+
+    if migrate_global_config():
+        print("🛠️ 已补全 global_config.yaml 中缺失的默认配置")
+    try:
+        stats = render_script(
+            args.script,
+            args.output,
+            base_path=args.assets,
+            jobs=args.jobs,
+            fmt=args.format,
+            quality=args.quality,
+            default_character=args.character,
+            force=args.force,
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(
+        f"✅ 渲染 {stats['rendered']} 条，跳过 {stats['skipped']} 条，失败 {len(stats['failed'])} 条；"
+        f"{stats['seconds']:.2f} s，{stats['lines_per_s']:.1f} 条/s（{stats['jobs']} 进程）"
+    )
+    for message in stats["failed"]:
+        print(f"   ❌ {message}")
+    print(f"📁 输出: {args.output}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
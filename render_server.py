@@ -0,0 +1,48 @@
+"""
+本地渲染服务：python render_server.py [--host 127.0.0.1] [--port 8765] [--workers N] [--queue 16]
+                                    [--assets assets] [--preload 角色1,角色2]
+
+示例:
+    curl -X POST http://127.0.0.1:8765/render -d '{"character": "yuraa", "text": "你好"}' -o out.png
+    curl http://127.0.0.1:8765/metrics
+"""
+import argparse
+
+from core.render_service import RenderService, ServiceError, create_server
+from core.utils import migrate_global_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GalGame 对话图本地渲染服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认只允许本机访问）")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口，0 表示由系统分配")
+    parser.add_argument("--workers", type=int, default=None, help="渲染线程数，默认 CPU 核数")
+    parser.add_argument("--queue", type=int, default=16, help="线程都在忙时最多排队的请求数")
+    parser.add_argument("--assets", default="assets", help="素材根目录")
+    parser.add_argument("--preload", default="", help="启动时预先加载的角色，逗号分隔")
+    args = parser.parse_args()
+
+    if migrate_global_config():
+        print("🛠️ 已补全 global_config.yaml 中缺失的默认配置")
+    service = RenderService(args.assets, workers=args.workers, queue_size=args.queue)
+    for char_id in filter(None, (c.strip() for c in args.preload.split(","))):
+        try:
+            service.render({"character": char_id, "text": ""})
+        except ServiceError as e:
+            print(f"⚠️ 预加载角色 {char_id} 失败: {e}")
+
+    server = create_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🌐 渲染服务已启动: http://{host}:{port}  （{service.workers} 线程，最多 {service.capacity} 个请求同时排队）")
+    print("提示：POST /render 渲染图片，GET /metrics 查看指标，Ctrl+C 退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 渲染服务已退出")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
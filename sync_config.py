@@ -3,7 +3,7 @@ import json
 
 import yaml
 
-from core.utils import dump_yaml_inline
+from core.utils import dump_yaml_inline, migrate_global_config
 
 BASE_PATH = "assets"
 CHAR_DIR = os.path.join(BASE_PATH, "characters")
@@ -79,6 +79,9 @@ def main():
         print(f"❌ 找不到目录: {CHAR_DIR}")
         return
 
+    if migrate_global_config():
+        print("🛠️ 已补全 global_config.yaml 中缺失的默认配置")
+
     print("🔄 开始同步角色配置...")
     chars = [d for d in os.listdir(CHAR_DIR) if os.path.isdir(os.path.join(CHAR_DIR, d))]
     
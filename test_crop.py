@@ -27,6 +27,7 @@ def test_crop_feature():
         # 测试不启用裁剪
         print("\n2. 测试不启用裁剪（默认行为）")
         renderer.layout["enable_crop"] = False
+        renderer.rebuild_spec()
         img_full = renderer.render("这是一个测试文本，用于验证裁剪功能是否正常工作。")
         print(f"   完整图片尺寸: {img_full.size}")
         img_full.save("test_output_full.png")
@@ -43,6 +44,7 @@ def test_crop_feature():
         x2 = x1 + 300
         y2 = canvas_h
         renderer.layout["crop_area"] = [x1, y1, x2, y2]
+        renderer.rebuild_spec()
 
         print(f"   裁剪区域: ({x1}, {y1}) → ({x2}, {y2})")
         print(f"   预期输出尺寸: {x2 - x1} x {y2 - y1}")
@@ -66,6 +68,7 @@ def test_crop_feature():
         x2 = canvas_w // 3
         y2 = canvas_h
         renderer.layout["crop_area"] = [x1, y1, x2, y2]
+        renderer.rebuild_spec()
 
         print(f"   裁剪区域: ({x1}, {y1}) → ({x2}, {y2})")
         img_left = renderer.render("左侧裁剪测试")
@@ -0,0 +1,52 @@
+"""
+测试 CF_DIB 编码：core.dib.encode_dib 与旧的 BMP→BytesIO→切头 做法逐字节一致
+"""
+import os
+import random
+import sys
+from io import BytesIO
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from core.dib import encode_dib
+
+# 含需要行尾补齐的奇数宽度
+SIZES = ((1, 1), (2, 3), (3, 2), (5, 7), (33, 17), (641, 359))
+MODES = ("RGB", "RGBA", "L", "P", "LA")
+
+
+def legacy_dib(image: Image.Image, alpha: bool = False) -> bytes:
+    """旧版 clipboard.set_image 的编码方式（alpha=True 时保存 32 位 BMP）"""
+    buffer = BytesIO()
+    image.convert("RGBA" if alpha else "RGB").save(buffer, "BMP")
+    return buffer.getvalue()[14:]  # 去掉 BMP 文件头，保留 DIB 数据
+
+
+def random_image(mode: str, size, seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    image = Image.frombytes("RGBA", size, bytes(rng.randrange(256) for _ in range(size[0] * size[1] * 4)))
+    return image.convert(mode)
+
+
+def test_dib_matches_bmp():
+    """24 位输出与旧做法逐字节一致"""
+    for mode in MODES:
+        for seed, size in enumerate(SIZES):
+            image = random_image(mode, size, seed)
+            assert bytes(encode_dib(image)) == legacy_dib(image), f"{mode} {size} 与 BMP 输出不一致"
+
+
+def test_dib_alpha_matches_bmp():
+    """32 位 BGRA 输出与 Pillow 保存的 32 位 BMP 逐字节一致"""
+    for seed, size in enumerate(SIZES):
+        image = random_image("RGBA", size, seed)
+        assert bytes(encode_dib(image, alpha=True)) == legacy_dib(image, alpha=True), f"RGBA {size} 与 BMP 输出不一致"
+
+
+if __name__ == "__main__":
+    test_dib_matches_bmp()
+    test_dib_alpha_matches_bmp()
+    print("✅ DIB 编码测试通过")
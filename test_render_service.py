@@ -0,0 +1,80 @@
+"""
+测试渲染服务并发：不同角色的请求在不同线程里同时渲染，共用同一组字体对象和进程级字形图集，
+输出必须与逐个渲染逐字节一致（FreeType 调用按字体串行，见 core/font_registry.font_lock）
+"""
+import os
+import sys
+import tempfile
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.synthetic import make_character
+from core.glyph_atlas import get_glyph_atlas
+from core.render_service import RenderService
+
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+CHARACTERS = ("alice", "bob")
+LINES = (
+    "好的。",
+    "AVATAR WAVE Toyota fjord",
+    "早上好！今天也要元气满满地去上学哦。",
+    "如果明天还下雨的话，我们就改去图书馆吧，那里安静，也有空调。",
+)
+THREADS = 4
+ROUNDS = 3
+
+
+def _requests():
+    return [
+        {"character": char_id, "text": f"{line}（{i}）", "speaker": "测试", "format": "png"}
+        for i, line in enumerate(LINES * 2)
+        for char_id in CHARACTERS
+    ]
+
+
+def _render_concurrently(service: RenderService, requests):
+    results = [None] * len(requests)
+    barrier = threading.Barrier(THREADS)
+
+    def worker(offset: int) -> None:
+        barrier.wait()
+        for i in range(offset, len(requests), THREADS):
+            results[i] = service.render(requests[i])[0]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_characters_match_serial():
+    """图集开启 / 关闭（每行都走 draw.text）时，多线程渲染不同角色都与逐个渲染一致"""
+    atlas = get_glyph_atlas()
+    budget = atlas.budget_bytes
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = os.path.join(tmp, "assets")
+        for seed, char_id in enumerate(CHARACTERS):
+            make_character(assets, char_id=char_id, canvas_size=(640, 360), portraits=1, backgrounds=1,
+                           font_path=FONT if os.path.exists(FONT) else None, seed=seed)
+        service = RenderService(assets, workers=THREADS)
+        requests = _requests()
+        try:
+            for atlas_budget in (budget, 0):
+                atlas.set_budget(atlas_budget)
+                atlas.clear()
+                expected = [service.render(request)[0] for request in requests]
+                for _ in range(ROUNDS):
+                    atlas.clear()
+                    assert _render_concurrently(service, requests) == expected, "并发渲染结果与逐个渲染不一致"
+        finally:
+            atlas.set_budget(budget)
+            service.close()
+
+
+if __name__ == "__main__":
+    test_concurrent_characters_match_serial()
+    print("✅ 渲染服务并发测试通过")